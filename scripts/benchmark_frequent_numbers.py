@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compare the throughput of the native `FrequentNumbersSketch` against
+wrapping `datasketches.frequent_strings_sketch` with JSON encoded numbers.
+
+Usage: ./benchmark_frequent_numbers.py [NUM_VALUES] [LG_MAX_K]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from whylogs.util.dsketch import FrequentItemsSketch, FrequentNumbersSketch
+
+
+def make_data(n, seed=0):
+    """
+    Return a heavy-tailed list of integers and a list of rounded floats
+    """
+    rng = np.random.RandomState(seed)
+    ints = rng.zipf(1.5, n).tolist()
+    floats = np.round(rng.normal(0, 100, n), 1).tolist()
+    return ints, floats
+
+
+def track_each(sketch, values):
+    for x in values:
+        sketch.update(x)
+
+
+def benchmark(n, lg_max_k, repeat=3):
+    ints, floats = make_data(n)
+    candidates = [
+        ("json-wrapped strings sketch", FrequentItemsSketch, track_each),
+        ("native sketch, update()", FrequentNumbersSketch, track_each),
+        (
+            "native sketch, update_array()",
+            FrequentNumbersSketch,
+            lambda sketch, values: sketch.update_array(np.asarray(values)),
+        ),
+    ]
+    print("{:,} values per run, lg_max_k={}".format(n, lg_max_k))
+    for data_name, values in (("ints", ints), ("floats", floats)):
+        print(data_name)
+        for name, sketch_class, track in candidates:
+            seconds = min(
+                timeit.repeat(
+                    lambda: track(sketch_class(lg_max_k), values),
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+            print("    {:<32}{:>14,.0f} values/s".format(name, n / seconds))
+
+
+if __name__ == "__main__":
+    num_values = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lg_max_k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    benchmark(num_values, lg_max_k)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compare reading a multi-message protobuf file with the buffered
+`multi_msg_reader` against reading the length prefixes one byte at a time,
+from a local file and from `fsspec` file objects.
+
+Every `read()` of the unbuffered local file is a system call, and every
+`read()` of the `fsspec` buffered file goes through the Python block cache
+of the remote (e.g. S3) files of `fsspec`, which is what they cost at best.
+
+Usage: ./benchmark_multi_msg_reader.py [NUM_MESSAGES]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import fsspec
+from fsspec.spec import AbstractBufferedFile
+
+from whylogs.proto import DoublesMessage
+from whylogs.util import varint
+from whylogs.util.protobuf import multi_msg_reader, write_multi_msg
+
+
+class RangeFile(AbstractBufferedFile):
+    """
+    `fsspec` file fetching byte ranges of a memory file, as S3 files fetch
+    them with HTTP range requests
+    """
+
+    def _fetch_range(self, start, end):
+        with self.fs.open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+def bytewise_reader(fp, msg_class):
+    """
+    The previous reader: one `read(1)` per byte of every length prefix, and
+    one `read()` per message
+    """
+    msg_bytes = varint.decode_stream(fp)
+    while msg_bytes is not None:
+        yield msg_class.FromString(fp.read(msg_bytes))
+        msg_bytes = varint.decode_stream(fp)
+
+
+def benchmark(n, repeat=3):
+    msgs = [DoublesMessage(count=i, sum=float(i), min=0.0, max=1.0) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "messages.bin")
+        write_multi_msg(msgs, path)
+        fs = fsspec.filesystem("memory")
+        with open(path, "rb") as f:
+            fs.pipe("/messages.bin", f.read())
+        sources = [
+            ("local file", lambda: open(path, "rb")),
+            ("local file, unbuffered", lambda: open(path, "rb", buffering=0)),
+            ("fsspec local file", lambda: fsspec.open(path, "rb").open()),
+            ("fsspec memory file", lambda: fs.open("/messages.bin", "rb")),
+            ("fsspec buffered file", lambda: RangeFile(fs, "/messages.bin")),
+        ]
+        readers = [
+            ("bytewise", bytewise_reader),
+            ("buffered", multi_msg_reader),
+        ]
+        print("{:,} messages, {:,} bytes".format(n, os.path.getsize(path)),)
+        for source_name, open_source in sources:
+            print(source_name)
+            for reader_name, reader in readers:
+
+                def run():
+                    with open_source() as fp:
+                        count = sum(1 for _ in reader(fp, DoublesMessage))
+                    assert count == n
+
+                seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+                print(
+                    "    {:<12}{:>14,.0f} messages/s".format(reader_name, n / seconds)
+                )
+
+
+if __name__ == "__main__":
+    num_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    benchmark(num_messages)
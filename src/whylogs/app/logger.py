@@ -2,10 +2,13 @@
 Class and functions for WhyLogs logging
 """
 import datetime
+import threading
+import time
 from typing import List, Optional
 
 import pandas as pd
 
+from whylogs.app.sampler import AdaptiveSampler
 from whylogs.app.writers import Writer
 from whylogs.core import DatasetProfile
 
@@ -30,6 +33,15 @@ class Logger:
         profile.
     verbose : bool
         Control output verbosity
+    sample_rate : float, optional
+        If specified, only a random sample of the rows of logged dataframes
+        is tracked by the statistics other than the counters and schema.  See
+        :class:`whylogs.core.DatasetProfile`
+    sampler : AdaptiveSampler, optional
+        Sample rows at a rate adjusted to keep logging within a budget.  The
+        fraction of the rows logged by this logger which were sampled is
+        recorded as the `sample_rate` of the profile, so the sampler can be
+        shared by several loggers.  Cannot be combined with `sample_rate`.
     """
 
     def __init__(
@@ -39,16 +51,29 @@ class Logger:
         session_timestamp: Optional[datetime.datetime] = None,
         writers=List[Writer],
         verbose: bool = False,
+        sample_rate: float = None,
+        sampler: AdaptiveSampler = None,
     ):
+        if sample_rate is not None and sampler is not None:
+            raise ValueError("Specify either sample_rate or sampler")
         if session_timestamp is None:
             session_timestamp = datetime.datetime.now(datetime.timezone.utc)
         self.dataset_name = dataset_name
         self.writers = writers
         self.verbose = verbose
+        self.sampler = sampler
+        # Profiles are not thread-safe.  With the adaptive sampler, batches
+        # are profiled without the lock, which is only held to merge them
+        # into the logger's profile
+        self._lock = threading.Lock()
+        # Number of rows logged, and sampled, with the adaptive sampler
+        self._rows = 0
+        self._sampled_rows = 0
         self._profile = DatasetProfile(
             dataset_name,
             data_timestamp=dataset_timestamp,
             session_timestamp=session_timestamp,
+            sample_rate=sample_rate,
         )
         self._active = True
 
@@ -66,8 +91,13 @@ class Logger:
             print("WARNING: attempting to flush a closed logger")
             return
 
-        for writer in self.writers:
-            writer.write(self._profile)
+        with self._lock:
+            profiles = list(self._profile.segments.values())
+            if len(self._profile.columns) > 0 or len(profiles) == 0:
+                profiles.insert(0, self._profile)
+            for writer in self.writers:
+                for profile in profiles:
+                    writer.write(profile)
 
     def close(self):
         """
@@ -81,7 +111,7 @@ class Logger:
 
         self._active = False
 
-    def log_dataframe(self, df: pd.DataFrame):
+    def log_dataframe(self, df: pd.DataFrame, segment_by: list = None):
         """
         Generate and log a WhyLogs DatasetProfile from a pandas dataframe
 
@@ -89,10 +119,50 @@ class Logger:
         ----------
         df : pd.DataFrame
             Dataframe to log
+        segment_by : list, optional
+            Column names to segment the data by.  A separate profile is
+            written for every segment; use ``$segment`` in the writer
+            templates to give them distinct outputs.  Segmented dataframes
+            are not sampled by the adaptive sampler.
         """
         if not self.is_active():
             return
-        self._profile.track_dataframe(df)
+        if self.sampler is None:
+            with self._lock:
+                self._profile.track_dataframe(df, segment_by=segment_by)
+            return
+        # Batches are profiled without the lock, so that the CPU time of the
+        # sampled rows can be measured, and then merged under the lock
+        with self._lock:
+            batch = self._profile._new_segment(())
+        # Only sampled by the adaptive sampler
+        batch.sample_rate = None
+        if segment_by is not None:
+            # Segments are not sampled, nor counted in the sample rate
+            batch.track_dataframe(df, segment_by=segment_by)
+            with self._lock:
+                batch.sample_rate = self._profile.sample_rate
+                self._profile.merge_into(batch)
+            return
+        start = time.thread_time()
+        sampled_rows = batch.track_dataframe_sample(df, self.sampler.rate)
+        cpu_time = time.thread_time() - start
+        self.sampler.record(len(df), sampled_rows, cpu_time)
+        with self._lock:
+            batch.sample_rate = self._profile.sample_rate
+            self._profile.merge_into(batch)
+            self._rows += len(df)
+            self._sampled_rows += sampled_rows
+            if self._sampled_rows > 0:
+                self._profile.sample_rate = self._sampled_rows / self._rows
+
+    @property
+    def shed_rows(self):
+        """
+        Number of rows logged by this logger which were only counted, and not
+        tracked by the other statistics, by the adaptive sampler
+        """
+        return self._rows - self._sampled_rows
 
     def is_active(self):
         """
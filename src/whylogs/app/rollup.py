@@ -0,0 +1,347 @@
+"""
+Roll up dataset profiles into coarser time buckets, e.g. profiles written
+every minute into hourly or daily profiles
+"""
+import collections
+import glob
+import hashlib
+import json
+import os
+import uuid
+from logging import getLogger as _getLogger
+
+import pandas as pd
+
+from whylogs.app.session import BUCKET_FREQUENCIES
+from whylogs.core import DatasetProfile
+from whylogs.util.data import get_valid_filename
+
+#: Extension entry of the bookkeeping of a rolled up profile written by
+#: :func:`rollup_files`: the input files merged into it, relative to the
+#: output directory, under ``inputs``, and the inputs whose ``on_complete``
+#: action may not have been applied yet, under ``pending``.  See
+#: :attr:`DatasetProfile.extensions`
+ROLLUP_EXTENSION = "rollup"
+#: Suffix appended to the input files by ``rollup_files(on_complete="mark")``
+ROLLED_UP_SUFFIX = ".rolledup"
+#: Default maximum number of rolled up profiles held in memory
+DEFAULT_MAX_GROUPS = 64
+_ON_COMPLETE = (None, "delete", "mark")
+_TMP_SUFFIX = ".tmp"
+
+logger = _getLogger(__name__)
+
+
+def rollup_bucket(profile: DatasetProfile, bucket: str = "hour"):
+    """
+    Return the time bucket of a profile: its data timestamp, or its session
+    timestamp if it has none, floored in UTC
+
+    Parameters
+    ----------
+    profile : DatasetProfile
+    bucket : str
+        One of :data:`whylogs.app.session.BUCKET_FREQUENCIES`
+
+    Returns
+    -------
+    bucket_timestamp : pd.Timestamp
+    """
+    try:
+        freq = BUCKET_FREQUENCIES[bucket]
+    except KeyError:
+        raise ValueError(
+            "Unsupported bucket: {}.  Use one of {}".format(
+                bucket, list(BUCKET_FREQUENCIES)
+            )
+        )
+    timestamp = profile.data_timestamp
+    if timestamp is None:
+        timestamp = profile.session_timestamp
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC").floor(freq)
+
+
+def rollup_key(profile: DatasetProfile, bucket: str = "hour"):
+    """
+    Return the key of the rolled up profile which a profile is merged into:
+    a tuple of its sorted tags and its time bucket
+    """
+    return tuple(sorted(profile.tags.items())), rollup_bucket(profile, bucket)
+
+
+def _new_rollup(key: tuple):
+    tags, bucket_timestamp = key
+    tags = dict(tags)
+    session_id = uuid.uuid5(uuid.NAMESPACE_URL, _key_string(key)).hex
+    return DatasetProfile(
+        name=tags["Name"],
+        data_timestamp=bucket_timestamp.to_pydatetime(),
+        session_timestamp=bucket_timestamp.to_pydatetime(),
+        tags=tags,
+        session_id=session_id,
+    )
+
+
+def _key_string(key: tuple):
+    tags, bucket_timestamp = key
+    return json.dumps([tags, bucket_timestamp.isoformat()])
+
+
+def rollup(profiles, bucket: str = "hour"):
+    """
+    Merge profiles by tags and time bucket.
+
+    Profiles of different sessions, timestamps and sample rates are merged,
+    see :func:`DatasetProfile.merge`.  The rolled up profiles are stamped
+    with the start of their bucket, as both the data and session timestamp,
+    and a session ID derived from their tags and bucket.
+
+    Parameters
+    ----------
+    profiles : iterable
+        `DatasetProfile` objects to roll up.  They are not modified
+    bucket : str
+        Time bucket of the rolled up profiles.  One of
+        :data:`whylogs.app.session.BUCKET_FREQUENCIES`
+
+    Returns
+    -------
+    rollups : dict
+        Rolled up profiles, keyed by :func:`rollup_key`
+    """
+    rollups = {}
+    for profile in profiles:
+        key = rollup_key(profile, bucket)
+        merged = rollups.get(key)
+        if merged is None:
+            merged = _new_rollup(key)
+            rollups[key] = merged
+        merged.merge_into(profile, same_session=False)
+    return rollups
+
+
+def expand_paths(patterns):
+    """
+    Expand directories and glob patterns into a sorted list of files.
+    Directories are searched recursively.  Files marked as rolled up (see
+    :data:`ROLLED_UP_SUFFIX`) are skipped.
+
+    Parameters
+    ----------
+    patterns : list
+        Paths of files or directories, or glob patterns
+
+    Returns
+    -------
+    paths : list
+        Absolute paths of the matching files
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, name) for name in files)
+        else:
+            paths.update(
+                p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)
+            )
+    return sorted(
+        os.path.abspath(p)
+        for p in paths
+        if not p.endswith(ROLLED_UP_SUFFIX) and not p.endswith(_TMP_SUFFIX)
+    )
+
+
+def rollup_path(output_dir: str, key: tuple):
+    """
+    Return the path of the output file of the rolled up profile of a key.
+    See :func:`rollup_key`
+    """
+    tags, bucket_timestamp = key
+    digest = hashlib.sha1(json.dumps(tags).encode("utf-8")).hexdigest()[:12]
+    filename = "{}_{}.bin".format(bucket_timestamp.strftime("%Y%m%dT%H%M%SZ"), digest)
+    return os.path.join(output_dir, get_valid_filename(dict(tags)["Name"]), filename)
+
+
+def _read_rollup(path: str):
+    """
+    Read a rolled up profile lazily: only its properties are parsed
+    """
+    with open(path, "rb") as f:
+        return DatasetProfile.from_protobuf_string(f.read(), lazy=True)
+
+
+def _rollup_entry(profile: DatasetProfile, output_dir: str):
+    """
+    Return the input files recorded in a rolled up profile, and the pending
+    ``(action, inputs)``, as absolute paths
+    """
+
+    def absolute(paths):
+        return [os.path.normpath(os.path.join(output_dir, p)) for p in paths]
+
+    entry = profile.extensions.get(ROLLUP_EXTENSION, {})
+    inputs = absolute(entry.get("inputs", []))
+    pending = entry.get("pending")
+    if pending is None:
+        return inputs, (None, [])
+    return inputs, (pending["action"], absolute(pending["inputs"]))
+
+
+def _set_rollup_entry(
+    profile: DatasetProfile, output_dir: str, inputs: list, pending: tuple
+):
+    def relative(paths):
+        return [os.path.relpath(p, output_dir) for p in paths]
+
+    entry = {"inputs": relative(inputs)}
+    action, paths = pending
+    if action is not None and len(paths) > 0:
+        entry["pending"] = {"action": action, "inputs": relative(paths)}
+    profile.extensions[ROLLUP_EXTENSION] = entry
+
+
+def _complete(action: str, paths: list):
+    """
+    Apply an ``on_complete`` action to the inputs which still exist
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        if action == "delete":
+            os.remove(path)
+        elif action == "mark":
+            os.replace(path, path + ROLLED_UP_SUFFIX)
+
+
+def _write_rollup(path: str, profile: DatasetProfile):
+    data = profile.to_protobuf().SerializeToString()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write atomically, so that an interrupted rollup never leaves a partial
+    # output, whose inputs would be skipped when resuming
+    tmp_path = path + _TMP_SUFFIX
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def rollup_files(
+    paths,
+    output_dir: str,
+    bucket: str = "hour",
+    max_groups: int = DEFAULT_MAX_GROUPS,
+    on_complete: str = None,
+):
+    """
+    Roll up protobuf profile files by tags and time bucket, see
+    :func:`rollup`, and write the rolled up profiles to `output_dir`.
+
+    The inputs are read one at a time and merged into at most `max_groups`
+    rolled up profiles held in memory.  When more groups are seen, the least
+    recently updated profile is written out, and merged with its output
+    file again if more of its inputs follow, so memory stays bounded however
+    the inputs are ordered.  Ordering the inputs by time keeps every output
+    from being written more than once.
+
+    Outputs are written to ``<output_dir>/<name>/<bucket start>_<tags
+    hash>.bin`` (see :func:`rollup_path`), and record the inputs merged into
+    them (see :data:`ROLLUP_EXTENSION`).  Inputs recorded in the outputs are
+    skipped, so an interrupted rollup can be resumed by running it again,
+    and new inputs are merged into the existing outputs.  Use a separate
+    `output_dir` for every bucket size.  Existing outputs are parsed lazily:
+    only the columns of those which new inputs are merged into are loaded.
+
+    With `on_complete`, the inputs are recorded as pending in their output,
+    and only dropped from the record when the output is next written, once
+    the inputs are deleted or marked.  Pending inputs which still exist when
+    a rollup is resumed, e.g. after a crash between writing an output and
+    completing its inputs, are deleted or marked first.  Without
+    `on_complete`, inputs are recorded for as long as they exist.
+
+    Parameters
+    ----------
+    paths : list
+        Files of serialized `DatasetProfileMessage`, e.g. written by the
+        ``protobuf`` output format.  See :func:`expand_paths`
+    output_dir : str
+        Directory of the rolled up profiles.  Inputs within it are skipped
+    bucket : str
+        Time bucket of the rolled up profiles.  One of
+        :data:`whylogs.app.session.BUCKET_FREQUENCIES`
+    max_groups : int
+        Maximum number of rolled up profiles held in memory
+    on_complete : str, optional
+        What to do with the inputs once their output is written: ``"delete"``
+        them, or ``"mark"`` them by appending :data:`ROLLED_UP_SUFFIX` to
+        their name.  By default, inputs are left untouched
+
+    Returns
+    -------
+    outputs : list
+        Sorted paths of the output files written
+    """
+    if on_complete not in _ON_COMPLETE:
+        raise ValueError(
+            "Unsupported on_complete: {}.  Use one of {}".format(
+                on_complete, _ON_COMPLETE
+            )
+        )
+    if max_groups < 1:
+        raise ValueError("max_groups must be positive")
+    output_dir = os.path.abspath(output_dir)
+    done = set()
+    for path in expand_paths([output_dir]):
+        inputs, (action, pending) = _rollup_entry(_read_rollup(path), output_dir)
+        _complete(action, pending)
+        done.update(inputs)
+        done.update(pending)
+
+    # Rolled up profiles held in memory, in least recently updated order,
+    # with the inputs recorded in them and the new inputs merged into them
+    groups = collections.OrderedDict()
+    outputs = set()
+
+    def flush(key):
+        profile, inputs, new_inputs = groups.pop(key)
+        path = rollup_path(output_dir, key)
+        if on_complete is None:
+            inputs += new_inputs
+        _set_rollup_entry(profile, output_dir, inputs, (on_complete, new_inputs))
+        _write_rollup(path, profile)
+        outputs.add(path)
+        logger.debug("Wrote %s from %d new inputs", path, len(new_inputs))
+        _complete(on_complete, new_inputs)
+
+    for path in paths:
+        path = os.path.abspath(path)
+        if path in done or path.startswith(output_dir + os.sep):
+            continue
+        with open(path, "rb") as f:
+            profile = DatasetProfile.from_protobuf_string(f.read())
+        key = rollup_key(profile, bucket)
+        group = groups.pop(key, None)
+        if group is None:
+            output_path = rollup_path(output_dir, key)
+            if os.path.exists(output_path):
+                merged = _read_rollup(output_path)
+                # Inputs which were deleted or marked are no longer recorded
+                inputs = [
+                    p for p in _rollup_entry(merged, output_dir)[0] if os.path.exists(p)
+                ]
+            else:
+                merged, inputs = _new_rollup(key), []
+            group = (merged, inputs, [])
+        groups[key] = group
+        merged, inputs, new_inputs = group
+        merged.merge_into(profile, same_session=False)
+        new_inputs.append(path)
+        done.add(path)
+        if len(groups) > max_groups:
+            flush(next(iter(groups)))
+
+    while groups:
+        flush(next(iter(groups)))
+    return sorted(outputs)
@@ -0,0 +1,139 @@
+"""
+Adaptive row sampling to keep logging within a resource budget
+"""
+import threading
+import time
+
+
+class AdaptiveSampler:
+    """
+    Adjust a row sampling rate to keep profiling within a budget.
+
+    The sampler observes the number of rows logged and the CPU time spent
+    profiling them.  At the end of every `window`, the sampling rate is set
+    so that, at the observed load, the sampled rows stay within the budgets.
+    All methods are thread-safe.
+
+    Parameters
+    ----------
+    max_rows_per_second : float, optional
+        Maximum number of sampled rows per second
+    max_cpu_fraction : float, optional
+        Maximum fraction of (wall clock) time spent profiling, e.g. ``0.05``
+        for 5% of one core
+    min_rate : float
+        Lower limit for the sampling rate
+    window : float
+        Number of seconds between sampling rate adjustments
+    clock : callable, optional
+        Function returning the current time in seconds.  Defaults to
+        `time.monotonic`
+    """
+
+    def __init__(
+        self,
+        max_rows_per_second: float = None,
+        max_cpu_fraction: float = None,
+        min_rate: float = 0.001,
+        window: float = 1.0,
+        clock=None,
+    ):
+        if max_rows_per_second is None and max_cpu_fraction is None:
+            raise ValueError("Specify max_rows_per_second and/or max_cpu_fraction")
+        if not 0 < min_rate <= 1:
+            raise ValueError("min_rate must be in (0, 1]")
+        if clock is None:
+            clock = time.monotonic
+        self.max_rows_per_second = max_rows_per_second
+        self.max_cpu_fraction = max_cpu_fraction
+        self.min_rate = min_rate
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rate = 1.0
+        self._rows = 0
+        self._sampled_rows = 0
+        self._window_start = clock()
+        self._window_rows = 0
+        self._window_cpu_time = 0.0
+
+    @property
+    def rate(self):
+        """
+        Current sampling rate
+        """
+        return self._rate
+
+    @property
+    def rows(self):
+        """
+        Total number of rows recorded
+        """
+        return self._rows
+
+    @property
+    def sampled_rows(self):
+        """
+        Number of rows which were sampled
+        """
+        return self._sampled_rows
+
+    @property
+    def shed_rows(self):
+        """
+        Number of rows which were not sampled
+        """
+        return self._rows - self._sampled_rows
+
+    @property
+    def effective_rate(self):
+        """
+        Fraction of all the rows recorded over the lifetime of the sampler
+        which were sampled.  This is not the sampling rate of any one profile
+        if the sampler is shared, or outlives the profiles: see
+        :class:`whylogs.app.logger.Logger`, which counts the rows of its own
+        profile
+        """
+        with self._lock:
+            if self._rows == 0:
+                return 1.0
+            return self._sampled_rows / self._rows
+
+    def record(self, rows: int, sampled_rows: int, cpu_time: float):
+        """
+        Record the outcome of profiling a batch of rows, and adjust the
+        sampling rate if the current window has elapsed.
+
+        Parameters
+        ----------
+        rows : int
+            Number of rows logged
+        sampled_rows : int
+            Number of rows which were sampled
+        cpu_time : float
+            CPU time spent profiling the rows, in seconds
+        """
+        with self._lock:
+            self._rows += rows
+            self._sampled_rows += sampled_rows
+            self._window_rows += rows
+            self._window_cpu_time += cpu_time
+            now = self._clock()
+            elapsed = now - self._window_start
+            if elapsed < self.window:
+                return
+            self._rate = self._target_rate(elapsed)
+            self._window_start = now
+            self._window_rows = 0
+            self._window_cpu_time = 0.0
+
+    def _target_rate(self, elapsed: float):
+        rate = 1.0
+        if self.max_rows_per_second is not None and self._window_rows > 0:
+            rows_per_second = self._window_rows / elapsed
+            rate = min(rate, self.max_rows_per_second / rows_per_second)
+        if self.max_cpu_fraction is not None and self._window_cpu_time > 0:
+            cpu_fraction = self._window_cpu_time / elapsed
+            # Profiling time is roughly proportional to the sampling rate
+            rate = min(rate, self._rate * self.max_cpu_fraction / cpu_fraction)
+        return max(self.min_rate, rate)
@@ -10,6 +10,11 @@ import pandas as pd
 from whylogs.app.config import SessionConfig, WriterConfig, load_config
 from whylogs.app.logger import Logger
 from whylogs.app.writers import Writer, writer_from_config
+from whylogs.util.data import group_indices
+
+#: Pandas frequencies of the time buckets supported by
+#: :func:`Session.log_dataframe`
+BUCKET_FREQUENCIES = {"minute": "min", "hour": "H", "day": "D"}
 
 
 class Session:
@@ -39,6 +44,10 @@ class Session:
         self.verbose = verbose
         self._active = True
         self._loggers = {}
+        # Loggers of the time buckets of `log_dataframe`, by dataset name and
+        # bucket timestamp, and the latest bucket timestamp, by dataset name
+        self._bucket_loggers = {}
+        self._latest_buckets = {}
         self._session_time = datetime.datetime.now()
 
     def __enter__(self):
@@ -104,6 +113,7 @@ class Session:
         dataset_name: Optional[str] = None,
         datetime_column: Optional = None,
         datetime_format: Optional[str] = None,
+        bucket: str = "hour",
     ):
         """
         Perform statistics caluclations and log a pandas dataframe
@@ -119,12 +129,91 @@ class Session:
             split the dataframe into multiple batches
         datetime_format : str
             Specify a datetime format.  See `datetime.strftime`
+        bucket : str
+            Time bucket to split the dataframe into when `datetime_column` is
+            specified: ``"minute"``, ``"hour"`` or ``"day"``.  See
+            :data:`BUCKET_FREQUENCIES`
+
+        Notes
+        -----
+        When `datetime_column` is specified, the rows are floored to their
+        time bucket (in UTC) and every bucket is logged by a logger for its
+        timestamp, separate from the loggers of :func:`Session.logger`.  The
+        logger of a bucket stays open, accumulating later batches, until a
+        batch has rows of a later bucket of the same dataset: it is then
+        closed, which writes its profile.  Rows which arrive for a bucket
+        that was already closed are logged by a new logger, whose profile
+        has its own session ID: include ``$session_id`` in the writer
+        templates to keep both outputs.  Rows without a timestamp are logged
+        by a logger without a dataset timestamp, which stays open until the
+        session is closed.  Include ``$dataset_timestamp`` in the writer
+        templates to write the buckets to separate outputs.
         """
         if not self.is_active():
             return
 
-        with self.logger(dataset_name, datetime_column, datetime_format) as logger:
-            logger.log_dataframe(df)
+        if datetime_column is None:
+            with self.logger(dataset_name) as logger:
+                logger.log_dataframe(df)
+            return
+
+        try:
+            freq = BUCKET_FREQUENCIES[bucket]
+        except KeyError:
+            raise ValueError(
+                "Unsupported bucket: {}.  Use one of {}".format(
+                    bucket, list(BUCKET_FREQUENCIES)
+                )
+            )
+        if dataset_name is None:
+            dataset_name = self.project
+        timestamps = pd.to_datetime(
+            df[datetime_column], format=datetime_format, utc=True
+        )
+        buckets = timestamps.dt.floor(freq)
+        for (bucket_timestamp,), indices in group_indices([buckets]):
+            if bucket_timestamp is not None:
+                bucket_timestamp = bucket_timestamp.to_pydatetime()
+            logger = self._bucket_logger(dataset_name, bucket_timestamp)
+            logger.log_dataframe(df.iloc[indices])
+        self._close_old_buckets(dataset_name)
+
+    def _bucket_logger(
+        self, dataset_name: str, bucket_timestamp: Optional[datetime.datetime]
+    ):
+        """
+        Return the open logger of a time bucket, creating it if needed
+        """
+        key = (dataset_name, bucket_timestamp)
+        logger = self._bucket_loggers.get(key)
+        if logger is None:
+            logger = Logger(
+                dataset_name=dataset_name,
+                dataset_timestamp=bucket_timestamp,
+                session_timestamp=self._session_time,
+                writers=self.writers,
+                verbose=self.verbose,
+            )
+            self._bucket_loggers[key] = logger
+        if bucket_timestamp is not None:
+            latest = self._latest_buckets.get(dataset_name)
+            if latest is None or bucket_timestamp > latest:
+                self._latest_buckets[dataset_name] = bucket_timestamp
+        return logger
+
+    def _close_old_buckets(self, dataset_name: str):
+        """
+        Close the loggers of the time buckets of a dataset which are older
+        than its latest bucket
+        """
+        latest = self._latest_buckets.get(dataset_name)
+        for key, logger in list(self._bucket_loggers.items()):
+            name, bucket_timestamp = key
+            if name != dataset_name or bucket_timestamp is None:
+                continue
+            if bucket_timestamp < latest:
+                logger.close()
+                del self._bucket_loggers[key]
 
     def close(self):
         """
@@ -138,6 +227,9 @@ class Session:
         for name, logger in self._loggers.items():
             if logger.is_active():
                 logger.close()
+        for logger in self._bucket_loggers.values():
+            logger.close()
+        self._bucket_loggers = {}
 
     def is_active(self):
         """
@@ -21,6 +21,7 @@ from ..core.datasetprofile import (
     get_dataset_frame,
 )
 from ..util import time
+from ..util.data import get_valid_filename
 from ..util.protobuf import message_to_json
 
 DEFAULT_PATH_TEMPLATE = "$name/$session_id"
@@ -130,6 +131,8 @@ class Writer(ABC):
         * ``session_timestamp``: session time in UTC epoch milliseconds
         * ``dataset_timestamp``: timestamp for the data in UTC epoch ms
         * ``session_id``: Unique identifier for the session
+        * ``segment``: segment of the data, as comma separated
+          ``column=value`` pairs, or ``all`` for unsegmented profiles
         """
         dataset_timestamp = "batch"
         if profile.data_timestamp is not None:
@@ -139,9 +142,20 @@ class Writer(ABC):
             "session_timestamp": str(time.to_utc_ms(profile.session_timestamp)),
             "dataset_timestamp": dataset_timestamp,
             "session_id": profile.session_id or "missing-session-id",
+            "segment": _segment_name(profile),
         }
 
 
+def _segment_name(profile: DatasetProfile):
+    segment = profile.segment
+    if len(segment) == 0:
+        return "all"
+    return ",".join(
+        "{}={}".format(get_valid_filename(column), get_valid_filename(value))
+        for column, value in segment
+    )
+
+
 class LocalWriter(Writer):
     """
     WhyLogs Writer class that can write to disk.
@@ -3,6 +3,7 @@ import logging
 import click
 
 from whylogs.cli import init
+from whylogs.cli.rollup import rollup
 from whylogs.logs import __version__ as whylogs_version
 
 try:
@@ -42,6 +43,7 @@ Welcome to WhyLogs CLI!
 Supported basic commands:
 
 - whylogs init : create a new WhyLogs project
+- whylogs rollup : roll up profiles into time buckets
 """
     logger = _set_up_logger()
     if verbose:
@@ -49,6 +51,7 @@ Supported basic commands:
 
 
 cli.add_command(init)
+cli.add_command(rollup)
 
 
 def main():
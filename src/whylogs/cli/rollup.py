@@ -0,0 +1,55 @@
+import click
+
+from whylogs.app.rollup import DEFAULT_MAX_GROUPS, expand_paths, rollup_files
+from whylogs.app.session import BUCKET_FREQUENCIES
+
+
+@click.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option(
+    "--output-dir",
+    "-o",
+    required=True,
+    help="Directory of the rolled up profiles. Use one per bucket size.",
+)
+@click.option(
+    "--bucket",
+    "-b",
+    type=click.Choice(list(BUCKET_FREQUENCIES)),
+    default="hour",
+    show_default=True,
+    help="Time bucket of the rolled up profiles.",
+)
+@click.option(
+    "--max-groups",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_GROUPS,
+    show_default=True,
+    help="Maximum number of rolled up profiles held in memory.",
+)
+@click.option(
+    "--delete-inputs",
+    "on_complete",
+    flag_value="delete",
+    help="Delete the inputs once they are rolled up.",
+)
+@click.option(
+    "--mark-inputs",
+    "on_complete",
+    flag_value="mark",
+    help="Rename the inputs with a .rolledup suffix once they are rolled up.",
+)
+def rollup(inputs, output_dir, bucket, max_groups, on_complete):
+    """
+    Roll up protobuf dataset profiles into time buckets.
+
+    INPUTS are profile files, directories or glob patterns.  Profiles with the
+    same tags are merged by time bucket, and written to OUTPUT_DIR.  Inputs
+    already rolled up into OUTPUT_DIR are skipped, so an interrupted rollup
+    can be resumed by running it again.
+    """
+    paths = expand_paths(inputs)
+    outputs = rollup_files(
+        paths, output_dir, bucket, max_groups=max_groups, on_complete=on_complete
+    )
+    click.echo(f"Wrote {len(outputs)} rolled up profiles to {output_dir}")
@@ -3,12 +3,21 @@ Defines the ColumnProfile class for tracking per-column statistics
 """
 from whylogs.core.statistics import CountersTracker, NumberTracker, SchemaTracker
 from whylogs.core.statistics.datatypes import StringTracker
+from whylogs.core.statistics.exactcounter import ExactCounter
 from whylogs.core.statistics.hllsketch import HllSketch
+from whylogs.core.statistics.reservoir import ReservoirSampler
+from whylogs.core.statistics.thetasketch import ThetaSketch, TypedThetaSketch
 from whylogs.core.types import TypedDataConverter
-from whylogs.proto import ColumnMessage, ColumnSummary, InferredType
+from whylogs.proto import (
+    ColumnMessage,
+    ColumnSummary,
+    InferredType,
+    UniqueCountSummary,
+)
 from whylogs.util.dsketch import FrequentItemsSketch
 
 import pandas as pd
+import typing
 
 _TYPES = InferredType.Type
 _NUMERIC_TYPES = {_TYPES.FRACTIONAL, _TYPES.INTEGRAL}
@@ -21,22 +30,43 @@ class ColumnProfile:
 
     The primary method for
 
+    The number and string trackers, which hold most of the memory of a
+    column profile, are only allocated when the column sees a number or a
+    string, so that columns of a single type, or only nulls, stay small in
+    very wide and sparse datasets.  Never populated trackers are not
+    serialized.
+
     Parameters
     ----------
     name : str (required)
         Name of the column profile
-    number_tracker : NumberTracker
-        Implements numeric data statisics tracking
-    string_tracker : StringTracker
-        Implements string data-type statistics tracking
+    number_tracker : NumberTracker, optional
+        Implements numeric data statisics tracking.  Allocated on first use
+        if not specified
+    string_tracker : StringTracker, optional
+        Implements string data-type statistics tracking.  Allocated on first
+        use if not specified
     schema_tracker : SchemaTracker
         Implements tracking of schema-related information
     counters : CountersTracker
         Keep count of various things
     frequent_tiems : FrequentItemsSketch
         Keep track of all frequent items, even for mixed datatype features
-    cardinality_tracker : HllSketch
-        Track feature cardinality (even for mixed data types)
+    cardinality_tracker : HllSketch, TypedThetaSketch
+        Track feature cardinality (even for mixed data types).  If a
+        `TypedThetaSketch` is given, its number and string partitions are
+        replaced by the theta sketches of `number_tracker` and
+        `string_tracker`, so that each value is only hashed once and the
+        column cardinality is derived from the per-type sketches.  The
+        string partition then tracks all the raw strings, as the string
+        tracker does on its own.
+    exact_counter : ExactCounter, optional
+        If specified, distinct values are counted exactly instead of being
+        fed to the cardinality and frequent item sketches.  Once the counter
+        exceeds its threshold, its counts are replayed into the sketches and
+        the column switches to sketching.  See :func:`ColumnProfile.promote`
+    reservoir : ReservoirSampler, optional
+        If specified, keep a bounded random sample of the raw values
 
     TODO:
         * Proper TypedDataConverter type checking
@@ -51,58 +81,248 @@ class ColumnProfile:
         schema_tracker: SchemaTracker = None,
         counters: CountersTracker = None,
         frequent_items: FrequentItemsSketch = None,
-        cardinality_tracker: HllSketch = None,
+        cardinality_tracker: typing.Union[HllSketch, TypedThetaSketch] = None,
+        exact_counter: ExactCounter = None,
+        reservoir: ReservoirSampler = None,
     ):
         # Handle default values
         if counters is None:
             counters = CountersTracker()
-        if number_tracker is None:
-            number_tracker = NumberTracker()
-        if string_tracker is None:
-            string_tracker = StringTracker()
         if schema_tracker is None:
             schema_tracker = SchemaTracker()
         if frequent_items is None:
             frequent_items = FrequentItemsSketch()
         if cardinality_tracker is None:
             cardinality_tracker = HllSketch()
+        elif isinstance(cardinality_tracker, TypedThetaSketch):
+            # The shared sketch needs the trackers' theta sketches
+            if number_tracker is None:
+                number_tracker = NumberTracker()
+            if string_tracker is None:
+                string_tracker = StringTracker()
+            cardinality_tracker = TypedThetaSketch(
+                numbers=number_tracker.theta_sketch,
+                strings=string_tracker.theta_sketch,
+                other=cardinality_tracker.other,
+                converted=cardinality_tracker.converted,
+            )
         # Assign values
         self.column_name = name
-        self.number_tracker = number_tracker
-        self.string_tracker = string_tracker
+        self._number_tracker = number_tracker
+        self._string_tracker = string_tracker
         self.schema_tracker = schema_tracker
         self.counters = counters
         self.frequent_items = frequent_items
         self.cardinality_tracker = cardinality_tracker
+        self.exact_counter = exact_counter
+        self.reservoir = reservoir
+
+    @property
+    def number_tracker(self):
+        """
+        Numeric statistics of the column, allocated on first access
+        """
+        if self._number_tracker is None:
+            self._number_tracker = NumberTracker()
+        return self._number_tracker
+
+    @number_tracker.setter
+    def number_tracker(self, x: NumberTracker):
+        self._number_tracker = x
+
+    @property
+    def string_tracker(self):
+        """
+        String statistics of the column, allocated on first access
+        """
+        if self._string_tracker is None:
+            self._string_tracker = StringTracker()
+        return self._string_tracker
+
+    @string_tracker.setter
+    def string_tracker(self, x: StringTracker):
+        self._string_tracker = x
 
-    def track(self, value):
+    def track(self, value, batch: bool = False):
         """
         Add `value` to tracking statistics.
+
+        Set `batch` to True if `value` is part of a batch of values which is
+        also passed to :func:`ColumnProfile.update_batch`
         """
         self.counters.increment_count()
         if value is None:
             self.counters.increment_null()
             return
 
-        # TODO: ignore this if we already know the data type
-        if isinstance(value, str):
-            self.string_tracker.update(value)
-
         # TODO: Implement real typed data conversion
         typed_data = TypedDataConverter.convert(value)
+        self._track_counts(typed_data)
+        self._track_statistics(value, typed_data, batch)
 
-        if not pd.isnull(typed_data):
-            self.cardinality_tracker.update(typed_data)
-            self.frequent_items.update(typed_data)
-        dtype = TypedDataConverter.get_type(typed_data)
-        self.schema_tracker.track(dtype)
+    def update_batch(self, values):
+        """
+        Update the statistics which are tracked a batch at a time: the string
+        length distributions and the reservoir sample.
+
+        Parameters
+        ----------
+        values : np.ndarray, list
+            Values which were tracked with ``batch=True``
+        """
+        if self._string_tracker is not None:
+            self._string_tracker.update_lengths(values)
+        if self.reservoir is not None:
+            self.reservoir.update(values)
+
+    def track_counts(self, value, n: int = 1):
+        """
+        Add `value`, seen `n` times, to the counters and schema tracking only.
+
+        Together with :func:`ColumnProfile.track_sample`, this allows the
+        counts to be kept exact while only a sample of the values are tracked
+        by the other statistics.
+        """
+        self.counters.increment_count(n)
+        if value is None:
+            self.counters.increment_null(n)
+            return
+        self._track_counts(TypedDataConverter.convert(value), n)
+
+    def track_sample(self, value, batch: bool = False):
+        """
+        Add `value` to all tracking statistics except the counters and schema.
+
+        See :func:`ColumnProfile.track_counts` and :func:`ColumnProfile.track`
+        """
+        if value is None:
+            return
+        self._track_statistics(value, TypedDataConverter.convert(value), batch)
 
+    def _track_counts(self, typed_data, n: int = 1):
+        dtype = TypedDataConverter.get_type(typed_data)
+        self.schema_tracker.track(dtype, n)
         if isinstance(typed_data, bool):
             # Note: bools are sub-classes of ints in python, so we should check
             # for bool type first
-            self.counters.increment_bool()
-        elif isinstance(typed_data, (float, int)):
-            self.number_tracker.track(typed_data)
+            self.counters.increment_bool(n)
+
+    def _track_statistics(self, value, typed_data, batch: bool = False):
+        # TODO: ignore this if we already know the data type
+        if isinstance(value, str):
+            self.string_tracker.update(value, sketches=False, lengths=not batch)
+        if self.reservoir is not None and not batch:
+            self.reservoir.add(value)
+
+        # When counting exactly, the sketches are populated on promotion
+        if not self._track_exact(value):
+            self._update_sketches(value, typed_data)
+
+        if not isinstance(typed_data, bool) and isinstance(typed_data, (float, int)):
+            # NaN is ignored by the number tracker, so it does not allocate it
+            if self._number_tracker is not None or not pd.isnull(typed_data):
+                self.number_tracker.track(typed_data, sketches=False)
+
+    def _track_exact(self, value):
+        """
+        Count `value` exactly, if possible.  Returns True if the sketches
+        should not be updated with `value`.
+        """
+        if self.exact_counter is None:
+            return False
+        if not self.exact_counter.update(value):
+            self.promote()
+            return False
+        if self.exact_counter.is_full():
+            # Replaying the counts takes care of `value` as well
+            self.promote()
+        return True
+
+    def _update_sketches(self, value, typed_data, weight: int = 1):
+        """
+        Update only the cardinality and frequent item sketches with a non-null
+        value and its converted value
+        """
+        # A TypedThetaSketch updates the trackers' theta sketches itself
+        theta = not self.shared_cardinality
+        if isinstance(value, str):
+            self.string_tracker.update_sketches(value, weight, theta=theta)
+        null = pd.api.types.is_scalar(typed_data) and pd.isnull(typed_data)
+        if not theta:
+            # Raw strings are tracked even if they were converted to nulls
+            self.cardinality_tracker.update(None if null else typed_data, value)
+        if null:
+            return
+        if theta:
+            self.cardinality_tracker.update(typed_data)
+        self.frequent_items.update(typed_data, weight)
+        if not isinstance(typed_data, bool) and isinstance(typed_data, (float, int)):
+            self.number_tracker.update_sketches(typed_data, weight, theta=theta)
+
+    @property
+    def shared_cardinality(self):
+        """
+        Whether the cardinality is tracked with a :class:`TypedThetaSketch`
+        shared with the number and string trackers
+        """
+        return isinstance(self.cardinality_tracker, TypedThetaSketch)
+
+    def promote(self):
+        """
+        Stop counting values exactly: replay the exact counts into the
+        sketches with weighted updates.  Does nothing if the column is not
+        counting exactly.
+        """
+        exact_counter = self.exact_counter
+        if exact_counter is None:
+            return
+        self.exact_counter = None
+        for value, count in exact_counter.items():
+            typed_data = TypedDataConverter.convert(value)
+            self._update_sketches(value, typed_data, count)
+
+    def _promoted(self):
+        """
+        Return a column profile with the exact counts replayed into the
+        sketches.  This object is not modified.
+
+        Returns `self` if not counting exactly.
+        """
+        if self.exact_counter is None:
+            return self
+        # The sketches are still empty, so only the other trackers are shared
+        number_tracker = None
+        if self._number_tracker is not None:
+            number_tracker = NumberTracker(
+                variance=self._number_tracker.variance,
+                floats=self._number_tracker.floats,
+                ints=self._number_tracker.ints,
+                histogram=self._number_tracker.histogram,
+            )
+        string_tracker = None
+        if self._string_tracker is not None:
+            string_tracker = StringTracker(
+                self._string_tracker.count,
+                length=self._string_tracker.length,
+                token_length=self._string_tracker.token_length,
+            )
+        column = ColumnProfile(
+            self.column_name,
+            number_tracker=number_tracker,
+            string_tracker=string_tracker,
+            schema_tracker=self.schema_tracker,
+            counters=self.counters,
+            cardinality_tracker=self._empty_cardinality_tracker(),
+            exact_counter=self.exact_counter,
+            reservoir=self.reservoir,
+        )
+        column.promote()
+        return column
+
+    def _empty_cardinality_tracker(self):
+        if self.shared_cardinality:
+            return TypedThetaSketch()
+        return HllSketch()
 
     def to_summary(self):
         """
@@ -113,6 +333,20 @@ class ColumnProfile:
         summary : ColumnSummary
             Protobuf summary message.
         """
+        if self.exact_counter is not None:
+            # Below the threshold the sketches are exact, except for HLL.  The
+            # frequent items sketch stringifies its items, so the unique count
+            # comes from the counter, which tells "1" and 1 apart
+            n_unique = len(self.exact_counter)
+            summary = self._promoted().to_summary()
+            if n_unique > 0:
+                summary.unique_count.CopyFrom(
+                    UniqueCountSummary(
+                        estimate=n_unique, upper=n_unique, lower=n_unique
+                    )
+                )
+            return summary
+
         schema = None
         if self.schema_tracker is not None:
             schema = self.schema_tracker.to_summary()
@@ -122,10 +356,10 @@ class ColumnProfile:
             frequent_items=self.frequent_items.to_summary(),
             unique_count=self.cardinality_tracker.to_summary(_UNIQUE_COUNT_BOUNDS_STD),
         )
-        if self.string_tracker is not None and self.string_tracker.count > 0:
-            opts["string_summary"] = self.string_tracker.to_summary()
-        if self.number_tracker is not None and self.number_tracker.count > 0:
-            opts["number_summary"] = self.number_tracker.to_summary()
+        if self._string_tracker is not None and self._string_tracker.count > 0:
+            opts["string_summary"] = self._string_tracker.to_summary()
+        if self._number_tracker is not None and self._number_tracker.count > 0:
+            opts["number_summary"] = self._number_tracker.to_summary()
 
         if schema is not None:
             opts["schema"] = schema
@@ -136,6 +370,17 @@ class ColumnProfile:
         """
         Merge this columprofile with another.
 
+        If both columns are counting values exactly, so does the merged column
+        (until the merged counts exceed the threshold).
+
+        If either column uses a shared :class:`TypedThetaSketch`, so does the
+        merged column, and the cardinality is derived from the per-type
+        sketches.  The other column must then use a shared sketch as well,
+        or not have tracked any value: the `HllSketch` statistics cannot be
+        merged into the per-type sketches, and a ValueError is raised.
+
+        If either column keeps a reservoir sample, so does the merged column.
+
         Parameters
         ----------
         other : ColumnProfile
@@ -145,52 +390,214 @@ class ColumnProfile:
         merged : ColumnProfile
             A new, merged column profile.
         """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another column profile into this one, in place.  The trackers
+        are merged directly, without copying them.  `other` is not modified.
+
+        See :func:`ColumnProfile.merge`
+
+        Parameters
+        ----------
+        other : ColumnProfile
+
+        Returns
+        -------
+        self : ColumnProfile
+        """
         assert self.column_name == other.column_name
+        if self.exact_counter is not None and other.exact_counter is not None:
+            self.exact_counter.merge_into(other.exact_counter)
+        else:
+            self.promote()
+            other = other._promoted()
+
+        if other._number_tracker is not None:
+            if self._number_tracker is None:
+                self._number_tracker = other._number_tracker.copy()
+            else:
+                self._number_tracker.merge_into(other._number_tracker)
+        if other._string_tracker is not None:
+            if self._string_tracker is None:
+                self._string_tracker = other._string_tracker.copy()
+            else:
+                self._string_tracker.merge_into(other._string_tracker)
+        self.schema_tracker.merge_into(other.schema_tracker)
+        self.counters.merge_into(other.counters)
+        self.frequent_items.merge_into(other.frequent_items)
+        self._merge_cardinality_tracker_into(other)
+        if other.reservoir is not None:
+            if self.reservoir is None:
+                self.reservoir = other.reservoir.copy()
+            else:
+                self.reservoir.merge_into(other.reservoir)
+        if self.exact_counter is not None and self.exact_counter.is_full():
+            self.promote()
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def _merge_cardinality_tracker_into(self, other):
+        if self.shared_cardinality != other.shared_cardinality:
+            hll = other if self.shared_cardinality else self
+            if not hll.cardinality_tracker.is_empty():
+                raise ValueError(
+                    "Cannot merge the cardinality of column {} with a shared "
+                    "cardinality sketch and an HLL sketch".format(self.column_name)
+                )
+        if not (self.shared_cardinality or other.shared_cardinality):
+            self.cardinality_tracker.merge_into(other.cardinality_tracker)
+        elif not other.shared_cardinality:
+            # Empty
+            pass
+        elif self.shared_cardinality:
+            # Number and string partitions are merged along with their trackers
+            self.cardinality_tracker.other.merge_into(other.cardinality_tracker.other)
+            self.cardinality_tracker.converted.merge_into(
+                other.cardinality_tracker.converted
+            )
+        else:
+            self.cardinality_tracker = TypedThetaSketch(
+                numbers=self.number_tracker.theta_sketch,
+                strings=self.string_tracker.theta_sketch,
+                other=other.cardinality_tracker.other.copy(),
+                converted=other.cardinality_tracker.converted.copy(),
+            )
+
+    def copy(self):
+        """
+        Return a copy of this column profile
+
+        Returns
+        -------
+        column_profile : ColumnProfile
+        """
+        exact_counter = None
+        if self.exact_counter is not None:
+            exact_counter = self.exact_counter.copy()
+        reservoir = None
+        if self.reservoir is not None:
+            reservoir = self.reservoir.copy()
+        number_tracker = None
+        if self._number_tracker is not None:
+            number_tracker = self._number_tracker.copy()
+        string_tracker = None
+        if self._string_tracker is not None:
+            string_tracker = self._string_tracker.copy()
         return ColumnProfile(
             self.column_name,
-            number_tracker=self.number_tracker.merge(other.number_tracker),
-            string_tracker=self.string_tracker.merge(other.string_tracker),
-            schema_tracker=self.schema_tracker.merge(other.schema_tracker),
-            counters=self.counters.merge(other.counters),
-            frequent_items=self.frequent_items.merge(other.frequent_items),
-            cardinality_tracker=self.cardinality_tracker.merge(
-                other.cardinality_tracker
-            ),
+            number_tracker=number_tracker,
+            string_tracker=string_tracker,
+            schema_tracker=self.schema_tracker.copy(),
+            counters=self.counters.copy(),
+            frequent_items=self.frequent_items.copy(),
+            # The number and string partitions of a TypedThetaSketch are
+            # replaced by the copied trackers' sketches
+            cardinality_tracker=self.cardinality_tracker.copy(),
+            exact_counter=exact_counter,
+            reservoir=reservoir,
         )
 
     def to_protobuf(self):
         """
         Return the object serialized as a protobuf message
 
+        Columns with a shared :class:`TypedThetaSketch` are written with an
+        empty HLL `cardinality_tracker`: the number and string partitions are
+        stored with their trackers, and the other partitions are returned by
+        :func:`ColumnProfile.cardinality_state`, to be stored alongside the
+        message.  Readers of the message alone therefore see an empty HLL
+        sketch, while :func:`ColumnProfile.from_protobuf` rebuilds an
+        approximate shared sketch from the number and string partitions.
+        Unallocated number and string trackers are not written.
+
         Returns
         -------
         message : ColumnMessage
         """
-        return ColumnMessage(
+        if self.exact_counter is not None:
+            return self._promoted().to_protobuf()
+
+        if self.shared_cardinality:
+            # A valid sketch, for readers which do not know about sharing
+            cardinality_tracker = HllSketch().to_protobuf()
+        else:
+            cardinality_tracker = self.cardinality_tracker.to_protobuf()
+        opts = dict(
             name=self.column_name,
             counters=self.counters.to_protobuf(),
             schema=self.schema_tracker.to_protobuf(),
-            numbers=self.number_tracker.to_protobuf(),
-            strings=self.string_tracker.to_protobuf(),
             frequent_items=self.frequent_items.to_protobuf(),
-            cardinality_tracker=self.cardinality_tracker.to_protobuf(),
+            cardinality_tracker=cardinality_tracker,
         )
+        if self._number_tracker is not None:
+            opts["numbers"] = self._number_tracker.to_protobuf()
+        if self._string_tracker is not None:
+            opts["strings"] = self._string_tracker.to_protobuf()
+        return ColumnMessage(**opts)
+
+    def cardinality_state(self):
+        """
+        Return the partitions of a shared :class:`TypedThetaSketch` which are
+        not written by :func:`ColumnProfile.to_protobuf`, as a dict of
+        serialized theta sketches by partition name.  None if the
+        cardinality is not shared.
+        """
+        if self.exact_counter is not None:
+            return self._promoted().cardinality_state()
+        if not self.shared_cardinality:
+            return None
+        return {
+            "other": self.cardinality_tracker.other.serialize(),
+            "converted": self.cardinality_tracker.converted.serialize(),
+        }
 
     @staticmethod
-    def from_protobuf(message):
+    def from_protobuf(message, cardinality_state: dict = None):
         """
         Load from a protobuf message
 
+        Parameters
+        ----------
+        message : ColumnMessage
+        cardinality_state : dict, optional
+            Output of :func:`ColumnProfile.cardinality_state` for the column.
+            If specified, the cardinality is tracked with a shared
+            :class:`TypedThetaSketch`.  Without it, a column written with a
+            shared sketch (an empty HLL sketch, although values were
+            tracked) gets a shared sketch of its number and string
+            partitions only: values of other types are not counted, and
+            strings converted to numbers are counted twice
+
         Returns
         -------
         column_profile : ColumnProfile
         """
+        counters = CountersTracker.from_protobuf(message.counters)
+        if cardinality_state is not None:
+            cardinality_tracker = TypedThetaSketch(
+                other=ThetaSketch.deserialize(cardinality_state["other"]),
+                converted=ThetaSketch.deserialize(cardinality_state["converted"]),
+            )
+        else:
+            cardinality_tracker = HllSketch.from_protobuf(message.cardinality_tracker)
+            if cardinality_tracker.is_empty() and counters.count > counters.null_count:
+                cardinality_tracker = TypedThetaSketch()
+        number_tracker = None
+        if message.HasField("numbers"):
+            number_tracker = NumberTracker.from_protobuf(message.numbers)
+        string_tracker = None
+        if message.HasField("strings"):
+            string_tracker = StringTracker.from_protobuf(message.strings)
         return ColumnProfile(
             message.name,
-            counters=CountersTracker.from_protobuf(message.counters),
+            counters=counters,
             schema_tracker=SchemaTracker.from_protobuf(message.schema),
-            number_tracker=NumberTracker.from_protobuf(message.numbers),
-            string_tracker=StringTracker.from_protobuf(message.strings),
+            number_tracker=number_tracker,
+            string_tracker=string_tracker,
             frequent_items=FrequentItemsSketch.from_protobuf(message.frequent_items),
-            cardinality_tracker=HllSketch.from_protobuf(message.cardinality_tracker),
+            cardinality_tracker=cardinality_tracker,
         )
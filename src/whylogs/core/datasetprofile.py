@@ -1,8 +1,14 @@
 """
 Defines the primary interface class for tracking dataset statistics.
 """
+import collections.abc
+import concurrent.futures
 import datetime
+import inspect
 import io
+import itertools
+import mmap
+import os
 from collections import OrderedDict
 from uuid import uuid4
 
@@ -11,8 +17,20 @@ import pandas as pd
 import typing
 
 from whylogs.core import ColumnProfile
+from whylogs.core.extensions import ProfileExtensions, decode_bytes, encode_bytes
+from whylogs.core.statistics.covariancetracker import CovarianceTracker
+from whylogs.core.statistics.exactcounter import ExactCounter
+from whylogs.core.statistics.reservoir import (
+    DEFAULT_RESERVOIR_MAX_BYTES,
+    ReservoirSampler,
+)
+from whylogs.core.statistics.rowtracker import RowTracker
+from whylogs.core.statistics.thetasketch import TypedThetaSketch
+from whylogs.core.statistics.vectortracker import VectorTracker, is_vector
+from whylogs.core.summaryconverters import scale_column_summary
 from whylogs.core.types.typeddataconverter import TYPES
 from whylogs.proto import (
+    ColumnMessage,
     ColumnsChunkSegment,
     DatasetMetadataSegment,
     DatasetProfileMessage,
@@ -20,16 +38,62 @@ from whylogs.proto import (
     DatasetSummary,
     MessageSegment,
 )
-from whylogs.util import time
-from whylogs.util.data import getter, remap
+from whylogs.util import time, varint
+from whylogs.util.data import flatten_dataframe, getter, group_indices, remap
 from whylogs.util.dsketch import FrequentNumbersSketch
 from whylogs.util.time import from_utc_ms, to_utc_ms
-from google.protobuf.internal.decoder import _DecodeVarint32
+from google.protobuf.internal.decoder import _DecodeVarint, _DecodeVarint32
 from google.protobuf.internal.encoder import _VarintBytes
 
 COLUMN_CHUNK_MAX_LEN_IN_BYTES = (
     int(1e6) - 10
 )  #: Used for chunking serialized dataset profile messages
+# Names of the extension entries of a profile holding the state which has
+# no field in the protobuf messages.  See :mod:`whylogs.core.extensions`
+#: Extension entry of the row sampling rate of a profile
+SAMPLE_RATE_EXTENSION = "sample_rate"
+#: Extension entry of the serialized vector column trackers, by column
+VECTORS_EXTENSION = "vectors"
+#: Extension entry of the serialized covariance tracker
+COVARIANCE_EXTENSION = "covariance"
+#: Extension entry of the serialized row tracker
+ROWS_EXTENSION = "rows"
+#: Extension entry of the tracking options of a profile which differ from
+#: their defaults, so that deserialized profiles track new data the same way
+OPTIONS_EXTENSION = "options"
+#: Tracking options of a profile, serialized under :data:`OPTIONS_EXTENSION`
+_OPTIONS = (
+    "exact_threshold",
+    "shared_cardinality",
+    "flatten",
+    "flatten_depth",
+    "flatten_arrays",
+    "reservoir_size",
+    "reservoir_max_bytes",
+)
+#: Column extension entry of the serialized string length distributions, and
+#: of their summaries in dataset summaries
+STRING_LENGTHS_EXTENSION = "string_lengths"
+#: Column extension entry of the serialized reservoir sample
+RESERVOIR_EXTENSION = "reservoir"
+#: Column extension entry of the partitions of a shared cardinality sketch,
+#: whose presence marks the column as sharing it.  See
+#: :func:`ColumnProfile.cardinality_state`
+CARDINALITY_EXTENSION = "cardinality"
+#: Summary extension entry of the per-dimension statistics of a vector column.
+#: See :func:`VectorTracker.dimension_summary`
+VECTOR_SUMMARY_EXTENSION = "vector"
+#: Summary extension entry of the correlation matrix of the covariance
+#: columns.  See :func:`CovarianceTracker.correlation_summary`
+CORRELATION_SUMMARY_EXTENSION = "correlation"
+#: Summary extension entry of the row statistics.  See
+#: :func:`RowTracker.summary`
+ROWS_SUMMARY_EXTENSION = "rows"
+#: Prefix of the tags holding the segment values of a segment profile
+SEGMENT_TAG_PREFIX = "whylogs.segment."
+#: Metadata key of the last segment of a chunked profile, holding its number
+#: of segments.  See :func:`DatasetProfile.chunk_iterator`
+SEGMENTS_METADATA_KEY = "whylogs.segments.count"
 TYPENUM_COLUMN_NAMES = OrderedDict()
 for k in TYPES.keys():
     TYPENUM_COLUMN_NAMES[k] = "type_" + k.lower() + "_count"
@@ -85,7 +149,8 @@ class DatasetProfile:
     session_timestamp : datetime.datetime
         Timestamp of the dataset
     columns : dict
-        Dictionary lookup of `ColumnProfile`s
+        Dictionary lookup of `ColumnProfile`s.  Can also be a
+        :class:`LazyColumns`, which deserializes the columns on first access
     tags : dict
         A dictionary of key->value. Can be used upstream for aggregating data. Tags must match when merging
         with another dataset profile object.
@@ -94,6 +159,66 @@ class DatasetProfile:
         and can be dropped when merging with another dataset profile object.
     session_id : str
         The unique session ID run. Should be a UUID.
+    exact_threshold : int, optional
+        If specified, new columns count their distinct values exactly until
+        more than `exact_threshold` distinct values are seen, after which they
+        switch to sketches.  See :class:`whylogs.core.ColumnProfile`
+    shared_cardinality : bool
+        If True, new columns derive their cardinality from the number and
+        string theta sketches instead of keeping a separate HLL sketch.  See
+        :class:`whylogs.core.statistics.thetasketch.TypedThetaSketch`
+    sample_rate : float, optional
+        If specified, :func:`DatasetProfile.track_dataframe` keeps the
+        counters and schema exact, but only tracks a random (Bernoulli) sample
+        of the rows with the other statistics.  Count estimates in summaries
+        are scaled by ``1 / sample_rate``.  Vector columns are not
+        sampled.
+    vectors : dict
+        Dictionary lookup of `VectorTracker`s, which track the columns whose
+        values are 1D numpy arrays (e.g. embeddings) instead of column
+        profiles
+    flatten : bool
+        If True, columns of nested dicts in tracked dataframes are expanded
+        into columns with dotted names.  See
+        :func:`whylogs.util.data.flatten_dataframe`
+    flatten_depth : int, optional
+        Maximum number of nesting levels to expand.  Unlimited by default
+    flatten_arrays : str
+        How to flatten list values: ``"keep"``, ``"length"`` or ``"index"``
+    covariance_columns : list, optional
+        Numeric columns of the tracked dataframes to track the pairwise
+        covariances and correlations of.  See :class:`CovarianceTracker`
+    reservoir_size : int, optional
+        If specified, new columns keep a uniform random sample of up to
+        `reservoir_size` raw values, e.g. to inspect examples when a drift
+        alert fires.  See :class:`ReservoirSampler`
+    reservoir_max_bytes : int
+        Maximum number of bytes of the sampled values of each column
+    track_rows : bool
+        If True, estimate the number of distinct rows and the frequent null
+        patterns of the tracked dataframes.  See :class:`RowTracker`
+    random_state : int, np.random.Generator, optional
+        Seed or generator of the random numbers of the row sampling and of
+        the reservoir samples.  Segments and copies of the profile share the
+        generator.  Default = a generator seeded from the OS
+
+    The state of these trackers has no field in the protobuf messages, and
+    is serialized as extension state, see :mod:`whylogs.core.extensions`.
+
+    Attributes
+    ----------
+    covariance : CovarianceTracker, None
+        Covariance tracker of the `covariance_columns`
+    rows : RowTracker, None
+        Row tracker, if `track_rows` is True
+    segments : dict
+        Profiles of the segments tracked with
+        :func:`DatasetProfile.track_dataframe`, keyed by segment (a tuple of
+        ``(column, value)`` pairs)
+    extensions : dict
+        Extension entries of the profile which are not handled by this
+        class (e.g. the bookkeeping of :mod:`whylogs.app.rollup`), by name.
+        They are serialized with the profile
     """
 
     def __init__(
@@ -105,10 +230,24 @@ class DatasetProfile:
         tags: typing.Dict[str, str] = None,
         metadata: typing.Dict[str, str] = None,
         session_id: str = None,
+        exact_threshold: int = None,
+        shared_cardinality: bool = False,
+        sample_rate: float = None,
+        vectors: dict = None,
+        flatten: bool = False,
+        flatten_depth: int = None,
+        flatten_arrays: str = "keep",
+        covariance_columns: list = None,
+        reservoir_size: int = None,
+        reservoir_max_bytes: int = DEFAULT_RESERVOIR_MAX_BYTES,
+        track_rows: bool = False,
+        random_state=None,
     ):
         # Default values
         if columns is None:
             columns = {}
+        if vectors is None:
+            vectors = {}
         if tags is None:
             tags = dict()
         if metadata is None:
@@ -122,6 +261,24 @@ class DatasetProfile:
         self._tags = dict(tags)
         self._metadata = metadata.copy()
         self.columns = columns
+        self.vectors = vectors
+        self.exact_threshold = exact_threshold
+        self.shared_cardinality = shared_cardinality
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.sample_rate = sample_rate
+        self.flatten = flatten
+        self.flatten_depth = flatten_depth
+        self.flatten_arrays = flatten_arrays
+        self.covariance = None
+        if covariance_columns is not None:
+            self.covariance = CovarianceTracker(covariance_columns)
+        self.reservoir_size = reservoir_size
+        self.reservoir_max_bytes = reservoir_max_bytes
+        self.rows = RowTracker() if track_rows else None
+        self.random_state = np.random.default_rng(random_state)
+        self.segments = {}
+        self.extensions = {}
 
         # Store Name attribute
         self._tags["Name"] = name
@@ -134,6 +291,22 @@ class DatasetProfile:
     def tags(self):
         return self._tags.copy()
 
+    @property
+    def segment(self):
+        """
+        The segment of the dataset this profile describes, as a tuple of
+        ``(column, value)`` pairs sorted by column.  Empty if the profile is
+        not a segment.
+        """
+        n = len(SEGMENT_TAG_PREFIX)
+        return tuple(
+            sorted(
+                (k[n:], v)
+                for k, v in self._tags.items()
+                if k.startswith(SEGMENT_TAG_PREFIX)
+            )
+        )
+
     @property
     def metadata(self):
         return self._metadata.copy()
@@ -176,13 +349,95 @@ class DatasetProfile:
             for column_name, data in columns.items():
                 self._track_single_column(column_name, data)
 
+    def _new_column(self, column_name):
+        exact_counter = None
+        if self.exact_threshold is not None:
+            exact_counter = ExactCounter(self.exact_threshold)
+        cardinality_tracker = None
+        if self.shared_cardinality:
+            cardinality_tracker = TypedThetaSketch()
+        reservoir = None
+        if self.reservoir_size is not None:
+            reservoir = ReservoirSampler(
+                self.reservoir_size,
+                self.reservoir_max_bytes,
+                random_state=self.random_state,
+            )
+        return ColumnProfile(
+            column_name,
+            cardinality_tracker=cardinality_tracker,
+            exact_counter=exact_counter,
+            reservoir=reservoir,
+        )
+
+    def _new_segment(self, segment):
+        tags = self.tags
+        for column, value in segment:
+            tags[SEGMENT_TAG_PREFIX + column] = value
+        return DatasetProfile(
+            self.name,
+            data_timestamp=self.data_timestamp,
+            session_timestamp=self.session_timestamp,
+            tags=tags,
+            metadata=self.metadata,
+            session_id=self.session_id,
+            exact_threshold=self.exact_threshold,
+            shared_cardinality=self.shared_cardinality,
+            sample_rate=self.sample_rate,
+            flatten=self.flatten,
+            flatten_depth=self.flatten_depth,
+            flatten_arrays=self.flatten_arrays,
+            covariance_columns=self.covariance_columns,
+            reservoir_size=self.reservoir_size,
+            reservoir_max_bytes=self.reservoir_max_bytes,
+            track_rows=self.rows is not None,
+            random_state=self.random_state,
+        )
+
     def _track_single_column(self, column_name, data):
+        if column_name in self.vectors or (
+            is_vector(data) and column_name not in self.columns
+        ):
+            values = np.empty(1, dtype=object)
+            values[0] = data
+            self._track_vectors(column_name, values)
+            return
+        self._get_column(column_name).track(data)
+
+    def _get_column(self, column_name):
         try:
-            prof = self.columns[column_name]
+            return self.columns[column_name]
         except KeyError:
-            prof = ColumnProfile(column_name)
+            prof = self._new_column(column_name)
             self.columns[column_name] = prof
-        prof.track(data)
+            return prof
+
+    def _is_vector_column(self, column_name, x: np.ndarray):
+        if column_name in self.vectors:
+            return True
+        if x.dtype != object or column_name in self.columns:
+            return False
+        for value in x:
+            if value is not None:
+                return is_vector(value)
+        return False
+
+    def _track_vectors(self, column_name, values: np.ndarray):
+        """
+        Track a batch of vectors (or nulls), given as an object array
+        """
+        try:
+            tracker = self.vectors[column_name]
+        except KeyError:
+            tracker = VectorTracker()
+            self.vectors[column_name] = tracker
+        nulls = pd.isnull(values)
+        n_nulls = int(nulls.sum())
+        if n_nulls > 0:
+            tracker.increment_null(n_nulls)
+            values = values[~nulls]
+        if len(values) > 0:
+            tracker.update(values)
 
     def track_array(self, x: np.ndarray, columns=None):
         """
@@ -203,20 +458,109 @@ class DatasetProfile:
         columns = [str(c) for c in columns]
         return self.track_dataframe(pd.DataFrame(x, columns=columns))
 
-    def track_dataframe(self, df: pd.DataFrame):
+    def track_dataframe(self, df: pd.DataFrame, segment_by: list = None):
         """
         Track statistics for a dataframe
 
+        If the profile has a `sample_rate`, all rows are counted but only a
+        sample of the rows is tracked by the other statistics.
+
         Parameters
         ----------
         df : pandas.DataFrame
             DataFrame to track
+        segment_by : list, optional
+            Column names to segment the data by.  If specified, the rows of
+            each segment (each distinct combination of values of the columns)
+            are tracked by a separate profile in `self.segments`, instead of
+            by this profile.  Segments are keyed by tuples of
+            ``(column, value)`` pairs sorted by column, and the values are
+            stored in the tags of the segment profiles.
+
+        Returns
+        -------
+        segments : dict, None
+            If `segment_by` is specified, `self.segments`
         """
+        df = self._flatten(df)
+        if segment_by is not None:
+            for segment, indices in _segment_indices(df, segment_by):
+                try:
+                    prof = self.segments[segment]
+                except KeyError:
+                    prof = self._new_segment(segment)
+                    self.segments[segment] = prof
+                prof._track_flat_dataframe(df.iloc[indices])
+            return self.segments
+        self._track_flat_dataframe(df)
+
+    def _flatten(self, df: pd.DataFrame):
+        if not self.flatten:
+            return df
+        return flatten_dataframe(df, self.flatten_depth, self.flatten_arrays)
+
+    def _track_flat_dataframe(self, df: pd.DataFrame):
+        if self.rows is not None:
+            self.rows.update(df)
+        if self.sample_rate is not None:
+            self._track_flat_dataframe_sample(df, self.sample_rate)
+            return
+        if self.covariance is not None:
+            self.covariance.update(df)
         for col in df.columns:
             col_str = str(col)
             x = df[col].values
+            if self._is_vector_column(col_str, x):
+                self._track_vectors(col_str, x)
+                continue
+            prof = self._get_column(col_str)
             for xi in x:
-                self.track(col_str, xi)
+                prof.track(xi, batch=True)
+            prof.update_batch(x)
+
+    def track_dataframe_sample(self, df: pd.DataFrame, sample_rate: float):
+        """
+        Track the counters and schema of all rows of a dataframe, and all
+        other statistics for a random (Bernoulli) sample of the rows.
+
+        This does not change the `sample_rate` of the profile, which is used
+        to scale the estimates in summaries.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            DataFrame to track
+        sample_rate : float
+            Probability of a row being sampled
+
+        Returns
+        -------
+        sampled_rows : int
+            Number of rows in the sample
+        """
+        df = self._flatten(df)
+        if self.rows is not None:
+            self.rows.update(df)
+        return self._track_flat_dataframe_sample(df, sample_rate)
+
+    def _track_flat_dataframe_sample(self, df: pd.DataFrame, sample_rate: float):
+        sample = self.random_state.random(len(df)) < sample_rate
+        if self.covariance is not None:
+            self.covariance.update(df[sample])
+        for col in df.columns:
+            col_str = str(col)
+            x = df[col].values
+            if self._is_vector_column(col_str, x):
+                self._track_vectors(col_str, x)
+                continue
+            prof = self._get_column(col_str)
+            for xi, n in _count_groups(x):
+                prof.track_counts(xi, n)
+            x_sample = x[sample]
+            for xi in x_sample:
+                prof.track_sample(xi, batch=True)
+            prof.update_batch(x_sample)
+        return int(sample.sum())
 
     def to_properties(self):
         """
@@ -245,6 +589,77 @@ class DatasetProfile:
             metadata=metadata,
         )
 
+    @property
+    def covariance_columns(self):
+        """
+        Columns tracked by the covariance tracker, or None
+        """
+        if self.covariance is None:
+            return None
+        return list(self.covariance.columns)
+
+    def _extensions(self):
+        """
+        Return the profile level extension entries: the state of the
+        trackers which has no field in the protobuf messages, and
+        `self.extensions`
+        """
+        entries = dict(self.extensions)
+        if self.sample_rate is not None:
+            entries[SAMPLE_RATE_EXTENSION] = self.sample_rate
+        if len(self.vectors) > 0:
+            entries[VECTORS_EXTENSION] = {
+                name: encode_bytes(vectors.serialize())
+                for name, vectors in self.vectors.items()
+            }
+        if self.covariance is not None:
+            entries[COVARIANCE_EXTENSION] = encode_bytes(self.covariance.serialize())
+        if self.rows is not None:
+            entries[ROWS_EXTENSION] = encode_bytes(self.rows.serialize())
+        defaults = inspect.signature(DatasetProfile).parameters
+        options = {
+            name: getattr(self, name)
+            for name in _OPTIONS
+            if getattr(self, name) != defaults[name].default
+        }
+        if len(options) > 0:
+            entries[OPTIONS_EXTENSION] = options
+        return ProfileExtensions(entries)
+
+    def _state_properties(self, columns: bool = True):
+        """
+        Return the dataset properties, with the extension state of the
+        profile.  Set `columns` to False to leave out the extension state of
+        the columns, see :func:`DatasetProfile._serialized_columns`
+        """
+        properties = self.to_properties()
+        extensions = self._extensions()
+        if columns:
+            if isinstance(self.columns, LazyColumns):
+                # The state of the columns which were never accessed is unchanged
+                extensions.columns.update(self.columns.unloaded_states())
+            for name, column in _loaded_columns(self.columns):
+                if column.counters.count > 0:
+                    state = _column_state(column)
+                    if len(state) > 0:
+                        extensions.columns[name] = state
+        extensions.write(properties.metadata)
+        return properties
+
+    def _serialized_columns(self):
+        """
+        Iterate over the populated columns, serialized: yield ``(name,
+        message, state)`` tuples, where `message` is the serialized
+        `ColumnMessage` and `state` is the dict of the column extension
+        entries
+        """
+        if isinstance(self.columns, LazyColumns):
+            yield from self.columns.serialized_items()
+        for name, column in _loaded_columns(self.columns):
+            if column.counters.count > 0:
+                message = column.to_protobuf().SerializeToString()
+                yield name, message, _column_state(column)
+
     def to_summary(self):
         """
         Generate a summary of the statistics
@@ -258,10 +673,39 @@ class DatasetProfile:
         column_summaries = {
             name: colprof.to_summary() for name, colprof in self.columns.items()
         }
+        if self.sample_rate is not None:
+            for summary in column_summaries.values():
+                scale_column_summary(summary, self.sample_rate)
+        for name, vectors in self.vectors.items():
+            column_summaries[name] = vectors.to_summary()
 
-        return DatasetSummary(
-            properties=self.to_properties(), columns=column_summaries,
-        )
+        properties = self.to_properties()
+        self._summary_extensions().write(properties.metadata)
+        return DatasetSummary(properties=properties, columns=column_summaries)
+
+    def _summary_extensions(self):
+        """
+        Return the extension entries of the summary, for the statistics
+        which have no field in the summary messages
+        """
+        extensions = ProfileExtensions()
+        if self.sample_rate is not None:
+            extensions.profile[SAMPLE_RATE_EXTENSION] = self.sample_rate
+        if self.covariance is not None:
+            extensions.profile[
+                CORRELATION_SUMMARY_EXTENSION
+            ] = self.covariance.correlation_summary()
+        if self.rows is not None:
+            extensions.profile[ROWS_SUMMARY_EXTENSION] = self.rows.summary()
+        for name, column in self.columns.items():
+            lengths = _string_lengths_summary(column._string_tracker)
+            if lengths is not None:
+                extensions.column(name)[STRING_LENGTHS_EXTENSION] = lengths
+        for name, vectors in self.vectors.items():
+            dimensions = vectors.dimension_summary()
+            if dimensions is not None:
+                extensions.column(name)[VECTOR_SUMMARY_EXTENSION] = dimensions
+        return extensions
 
     def flat_summary(self):
         """
@@ -275,27 +719,76 @@ class DatasetProfile:
         return flatten_summary(summary)
 
     def _column_message_iterator(self):
+        """
+        Iterate over the populated columns, serialized one at a time: yield
+        ``(message, state)`` pairs of their `ColumnMessage` and their
+        extension entries.  See :func:`DatasetProfile._serialized_columns`
+        """
         self.validate()
-        for col in self.columns.items():
-            yield col.to_protobuf()
+        for name, message, state in self._serialized_columns():
+            column_message = ColumnMessage.FromString(message)
+            column_message.name = name
+            yield column_message, state
 
-    def chunk_iterator(self):
+    def chunk_iterator(self, max_len: int = COLUMN_CHUNK_MAX_LEN_IN_BYTES):
         """
-        Generate an iterator to iterate over chunks of data
+        Generate an iterator to iterate over chunks of data: `MessageSegment`
+        messages, which can be reassembled with :func:`reassemble_segments`.
+
+        Columns are serialized one at a time, so only about one chunk is in
+        memory, however large the profile.  All the segments share a unique
+        marker.  The segments are, in order:
+
+        * the dataset properties, without the state of the columns
+        * chunks of columns of at most `max_len` bytes, together with their
+          extension entries.  The entries of each chunk follow it, as dataset
+          properties holding only extension entries (see
+          :mod:`whylogs.core.extensions`).  Larger columns are in a chunk of
+          their own
+        * dataset properties holding only the number of segments, see
+          :data:`SEGMENTS_METADATA_KEY`
+
+        Chunks can be written to a file with
+        :func:`whylogs.util.protobuf.write_multi_msg`.
+
+        Parameters
+        ----------
+        max_len : int
+            Maximum size of a chunk of columns, in bytes
+
+        Returns
+        -------
+        segments : iterator
+            Iterator of `MessageSegment` messages
         """
         # Generate unique identifier
         marker = self.session_id + str(uuid4())
 
         # Generate metadata
-        properties = self.to_properties()
+        properties = self._state_properties(columns=False)
 
         yield MessageSegment(
-            marker=marker, metadata=DatasetMetadataSegment(properties=properties,)
+            marker=marker,
+            metadata=DatasetMetadataSegment(marker=marker, properties=properties),
         )
+        count = 1
 
         chunked_columns = self._column_message_iterator()
-        for msg in columns_chunk_iterator(chunked_columns, marker):
-            yield MessageSegment(columns=msg)
+        for msg, states in _column_chunks(chunked_columns, marker, max_len):
+            yield MessageSegment(marker=marker, columns=msg)
+            count += 1
+            if len(states.metadata) > 0:
+                yield MessageSegment(
+                    marker=marker,
+                    metadata=DatasetMetadataSegment(marker=marker, properties=states),
+                )
+                count += 1
+
+        trailer = DatasetProperties(metadata={SEGMENTS_METADATA_KEY: str(count + 1)})
+        yield MessageSegment(
+            marker=marker,
+            metadata=DatasetMetadataSegment(marker=marker, properties=trailer),
+        )
 
     def validate(self):
         """
@@ -312,7 +805,7 @@ class DatasetProfile:
             assert getattr(self, attr) is not None
         assert all(isinstance(tag, str) for tag in self.tags.values())
 
-    def merge(self, other):
+    def merge(self, other, same_session: bool = True):
         """
         Merge this profile with another dataset profile object.
 
@@ -321,36 +814,173 @@ class DatasetProfile:
         Parameters
         ----------
         other : DatasetProfile
+        same_session : bool
+            If True, the profiles must have the same session ID and
+            timestamps.  If False, only their tags must match, and the session
+            and timestamps of this profile are kept, e.g. to roll up profiles
+            of consecutive time periods (see :mod:`whylogs.app.rollup`)
+
+        Profiles with different sample rates can be merged: the merged
+        `sample_rate` is the average of their rates (1 for profiles which
+        were not sampled), weighted by their numbers of rows.  The totals
+        scaled by it in summaries are unbiased, while the scaled counts of
+        single values are approximate if the rates differ much.  The
+        merged profile samples the data it tracks next at that rate.
 
         Returns
         -------
         merged : DatasetProfile
             New, merged DatasetProfile
         """
+        return self.copy().merge_into(other, same_session)
+
+    def merge_into(self, other, same_session: bool = True):
+        """
+        Merge another dataset profile into this one, in place.  The trackers
+        are merged directly, without copying them.  `other` is not modified.
+
+        Only the columns of `other` are visited: columns missing from this
+        profile are copied, and never populated columns are skipped, so the
+        cost of merging sparse profiles of very wide datasets scales with
+        their populated columns.
+
+        See :func:`DatasetProfile.merge`
+
+        Parameters
+        ----------
+        other : DatasetProfile
+        same_session : bool
+            If True, the profiles must have the same session ID and timestamps
+
+        Returns
+        -------
+        self : DatasetProfile
+        """
         self.validate()
         other.validate()
 
-        assert self.session_id == other.session_id
-        assert self.session_timestamp == other.session_timestamp
-        assert self.data_timestamp == other.data_timestamp
+        if same_session:
+            assert self.session_id == other.session_id
+            assert self.session_timestamp == other.session_timestamp
+            assert self.data_timestamp == other.data_timestamp
         assert self.tags == other.tags
+        if self.sample_rate != other.sample_rate:
+            self.sample_rate = _merged_sample_rate(self, other)
+
+        for col_name, other_column in other.columns.items():
+            if other_column.counters.count == 0:
+                # Never populated
+                continue
+            this_column = self.columns.get(col_name)
+            if this_column is None:
+                self.columns[col_name] = other_column.copy()
+            else:
+                this_column.merge_into(other_column)
+
+        for name, other_vectors in other.vectors.items():
+            self.vectors.setdefault(name, VectorTracker()).merge_into(other_vectors)
+
+        if other.covariance is not None:
+            if self.covariance is None:
+                self.covariance = CovarianceTracker(other.covariance.columns)
+            self.covariance.merge_into(other.covariance)
+
+        if other.rows is not None:
+            if self.rows is None:
+                self.rows = RowTracker()
+            self.rows.merge_into(other.rows)
+
+        for segment, other_segment in other.segments.items():
+            this_segment = self.segments.get(segment)
+            if this_segment is None:
+                this_segment = self._new_segment(segment)
+                this_segment.sample_rate = other_segment.sample_rate
+                self.segments[segment] = this_segment
+            this_segment.merge_into(other_segment, same_session)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this profile
 
-        columns_set = set(list(self.columns.keys()) + list(other.columns.keys()))
-        columns = {}
-        for col_name in columns_set:
-            empty_column = ColumnProfile(col_name)
-            this_column = self.columns.get(col_name, empty_column)
-            other_column = other.columns.get(col_name, empty_column)
-            columns[col_name] = this_column.merge(other_column)
-
-        return DatasetProfile(
+        Returns
+        -------
+        profile : DatasetProfile
+        """
+        profile = DatasetProfile(
             name=self.name,
             session_id=self.session_id,
             session_timestamp=self.session_timestamp,
             data_timestamp=self.data_timestamp,
-            columns=columns,
+            columns=_copy_columns(self.columns),
             tags=self.tags,
             metadata=self.metadata,
+            exact_threshold=self.exact_threshold,
+            shared_cardinality=self.shared_cardinality,
+            sample_rate=self.sample_rate,
+            vectors={k: v.copy() for k, v in self.vectors.items()},
+            flatten=self.flatten,
+            flatten_depth=self.flatten_depth,
+            flatten_arrays=self.flatten_arrays,
+            reservoir_size=self.reservoir_size,
+            reservoir_max_bytes=self.reservoir_max_bytes,
+            random_state=self.random_state,
+        )
+        if self.covariance is not None:
+            profile.covariance = self.covariance.copy()
+        if self.rows is not None:
+            profile.rows = self.rows.copy()
+        profile.segments = {k: v.copy() for k, v in self.segments.items()}
+        profile.extensions = dict(self.extensions)
+        return profile
+
+    @staticmethod
+    def merge_many(profiles, n_jobs: int = 1, chunk_size: int = 64):
+        """
+        Merge a collection of profiles into one.
+
+        The profiles are consumed one at a time and merged in a balanced
+        binary tree: only one partial result per level of the tree is held
+        in memory, so an iterator of profiles is never held in memory.
+        Partial results are merged in place (see
+        :func:`DatasetProfile.merge_into`), and the input profiles are not
+        modified.
+
+        With ``n_jobs > 1``, chunks of `chunk_size` profiles are merged in a
+        process pool, and the partial results are merged pairwise by the
+        pool as they complete.  Profiles are passed to the workers as
+        serialized protobuf messages, together with their segments.  The
+        merged profile has a new random generator.
+
+        Parameters
+        ----------
+        profiles : iterable
+            `DatasetProfile` objects, or serialized `DatasetProfileMessage`
+            bytes, to merge.  All must have the same session and tags
+        n_jobs : int
+            Number of worker processes.  With 1, the profiles are merged in
+            this process
+        chunk_size : int
+            Number of profiles merged by a worker at a time
+
+        Returns
+        -------
+        merged : DatasetProfile
+            New, merged profile.  None if `profiles` is empty
+        """
+        if n_jobs > 1:
+            merged = _merge_many_parallel(profiles, n_jobs, chunk_size)
+            if merged is None:
+                return None
+            return _deserialize_profile(merged)
+        return _merge_tree(
+            (DatasetProfile.from_protobuf_string(profile), True)
+            if isinstance(profile, bytes)
+            else (profile, False)
+            for profile in profiles
         )
 
     def serialize_delimited(self) -> bytes:
@@ -374,21 +1004,28 @@ class DatasetProfile:
 
     def to_protobuf(self) -> DatasetProfileMessage:
         """
-        Return the object serialized as a protobuf message
+        Return the object serialized as a protobuf message.  Never populated
+        columns are not written.  Lazily loaded columns which were never
+        accessed are written without being deserialized.
 
         Returns
         -------
         message : DatasetProfileMessage
         """
-        properties = self.to_properties()
+        properties = self._state_properties()
+        columns = {
+            k: v.to_protobuf()
+            for k, v in _loaded_columns(self.columns)
+            if v.counters.count > 0
+        }
+        if isinstance(self.columns, LazyColumns):
+            # Columns which were never accessed are written unchanged
+            columns.update(self.columns.unloaded_messages())
 
-        return DatasetProfileMessage(
-            properties=properties,
-            columns={k: v.to_protobuf() for k, v in self.columns.items()},
-        )
+        return DatasetProfileMessage(properties=properties, columns=columns)
 
     @staticmethod
-    def from_protobuf(message: DatasetProfileMessage):
+    def from_protobuf(message: DatasetProfileMessage, lazy: bool = False):
         """
         Load from a protobuf message
 
@@ -397,48 +1034,168 @@ class DatasetProfile:
         message : DatasetProfileMessage
             The protobuf message.  Should match the output of
             `DatasetProfile.to_protobuf()`
+        lazy : bool
+            If True, the columns are only deserialized when they are first
+            accessed.  See :class:`LazyColumns`
 
         Returns
         -------
         dataset_profile : DatasetProfile
         """
-        return DatasetProfile(
-            name=message.properties.tags["Name"],
-            session_id=message.properties.session_id,
-            session_timestamp=from_utc_ms(message.properties.session_timestamp),
-            data_timestamp=from_utc_ms(message.properties.data_timestamp),
-            columns={
-                k: ColumnProfile.from_protobuf(v) for k, v in message.columns.items()
-            },
-            tags=dict(message.properties.tags),
-            metadata=dict(message.properties.metadata),
+        return DatasetProfile._from_protobuf(
+            message.properties, dict(message.columns), lazy
         )
 
     @staticmethod
-    def from_protobuf_string(data: bytes):
+    def _from_protobuf(
+        properties: DatasetProperties, messages: dict, lazy: bool, states: dict = None
+    ):
+        """
+        Load from the properties and the (possibly serialized) column
+        messages of a `DatasetProfileMessage`.  `states` are column extension
+        entries stored outside of the properties, by column name
+        """
+        metadata = dict(properties.metadata)
+        extensions = ProfileExtensions.pop(metadata)
+        if states is not None:
+            extensions.columns.update(states)
+        entries = dict(extensions.profile)
+        sample_rate = entries.pop(SAMPLE_RATE_EXTENSION, None)
+        covariance = entries.pop(COVARIANCE_EXTENSION, None)
+        if covariance is not None:
+            covariance = CovarianceTracker.deserialize(decode_bytes(covariance))
+        rows = entries.pop(ROWS_EXTENSION, None)
+        if rows is not None:
+            rows = RowTracker.deserialize(decode_bytes(rows))
+        options = entries.pop(OPTIONS_EXTENSION, {})
+        vectors = {
+            name: VectorTracker.deserialize(decode_bytes(value))
+            for name, value in entries.pop(VECTORS_EXTENSION, {}).items()
+        }
+        states = extensions.columns
+        if lazy:
+            columns = LazyColumns(messages, states)
+        else:
+            columns = {
+                name: _column_from_protobuf(message, states.get(name))
+                for name, message in messages.items()
+            }
+        profile = DatasetProfile(
+            name=properties.tags["Name"],
+            session_id=properties.session_id,
+            session_timestamp=from_utc_ms(properties.session_timestamp),
+            data_timestamp=from_utc_ms(properties.data_timestamp),
+            columns=columns,
+            tags=dict(properties.tags),
+            metadata=metadata,
+            sample_rate=sample_rate,
+            vectors=vectors,
+            **options,
+        )
+        profile.covariance = covariance
+        profile.rows = rows
+        # Entries handled by other components are kept as they are
+        profile.extensions = entries
+        return profile
+
+    @staticmethod
+    def from_protobuf_string(data: bytes, lazy: bool = False):
         """
         Deserialize a serialized `DatasetProfileMessage`
 
         Parameters
         ----------
         data : bytes
-            The serialized message
+            The serialized message, or any bytes-like object
+        lazy : bool
+            If True, only the properties are parsed up front.  The columns
+            are kept serialized, and are only parsed and deserialized when
+            they are first accessed.  See :class:`LazyColumns`
 
         Returns
         -------
         profile : DatasetProfile
             The deserialized dataset profile
         """
+        if lazy:
+            properties, messages = _split_profile_message(data)
+            return DatasetProfile._from_protobuf(properties, messages, lazy=True)
         msg = DatasetProfileMessage.FromString(data)
         return DatasetProfile.from_protobuf(msg)
 
     @staticmethod
-    def _parse_delimited_generator(data: bytes):
-        pos = 0
-        data_len = len(data)
-        while pos < data_len:
-            pos, profile = DatasetProfile.parse_delimited_single(data, pos)
-            yield profile
+    def _parse_delimited_generator(data, lazy: bool = False):
+        """
+        Iterate over the profiles of delimited data in a bytes-like object,
+        parsing every message from a view of `data` rather than a copy
+        """
+        with memoryview(data) as view:
+            pos = 0
+            data_len = len(view)
+            while pos < data_len:
+                msg_len, pos = _DecodeVarint32(view, pos)
+                if pos + msg_len > data_len:
+                    raise ValueError("Truncated message")
+                with view[pos : pos + msg_len] as msg_buf:
+                    profile = DatasetProfile.from_protobuf_string(msg_buf, lazy=lazy)
+                pos += msg_len
+                yield profile
+
+    @staticmethod
+    def _parse_delimited_stream(f, lazy: bool = False):
+        msg_len = varint.decode_stream(f)
+        while msg_len is not None:
+            msg_buf = f.read(msg_len)
+            if len(msg_buf) < msg_len:
+                raise ValueError("Truncated message")
+            yield DatasetProfile.from_protobuf_string(msg_buf, lazy=lazy)
+            msg_len = varint.decode_stream(f)
+
+    @staticmethod
+    def iter_delimited(f, lazy: bool = False):
+        """
+        Iterate over the profiles of delimited data (see
+        :func:`DatasetProfile.parse_delimited`) in a file, without reading
+        the whole file.
+
+        Files are memory mapped, and every message is parsed from a view of
+        the map, so only one message and one profile are in memory at a
+        time.  File objects which cannot be memory mapped, such as
+        `io.BytesIO`, are read one message at a time.
+
+        Parameters
+        ----------
+        f : str, file-object, bytes
+            Path of the file, binary file object, or bytes-like object to read
+            from.  File objects are read from their current position
+        lazy : bool
+            If True, the columns of the profiles are only deserialized when
+            they are first accessed.  See :class:`LazyColumns`
+
+        Returns
+        -------
+        profiles : iterator
+            Iterator of the dataset profiles
+        """
+        if isinstance(f, str):
+            with open(f, "rb") as fp:
+                yield from DatasetProfile.iter_delimited(fp, lazy=lazy)
+            return
+        if not hasattr(f, "read"):
+            yield from DatasetProfile._parse_delimited_generator(f, lazy=lazy)
+            return
+        try:
+            fileno = f.fileno()
+            start = f.tell()
+            size = os.fstat(fileno).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            yield from DatasetProfile._parse_delimited_stream(f, lazy=lazy)
+            return
+        if size <= start:
+            return
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view, view[start:] as body:
+                yield from DatasetProfile._parse_delimited_generator(body, lazy=lazy)
 
     @staticmethod
     def parse_delimited_single(data: bytes, pos=0):
@@ -460,9 +1217,9 @@ class DatasetProfile:
         """
         msg_len, new_pos = _DecodeVarint32(data, pos)
         pos = new_pos
-        msg_buf = data[pos : pos + msg_len]
+        with memoryview(data) as view, view[pos : pos + msg_len] as msg_buf:
+            profile = DatasetProfile.from_protobuf_string(msg_buf)
         pos += msg_len
-        profile = DatasetProfile.from_protobuf_string(msg_buf)
         return pos, profile
 
     @staticmethod
@@ -484,10 +1241,417 @@ class DatasetProfile:
         profiles : list
             List of all Dataset profile objects
 
+        See also :func:`DatasetProfile.iter_delimited`, which does not need
+        the whole data in memory
+
         """
         return list(DatasetProfile._parse_delimited_generator(data))
 
 
+class LazyColumns(collections.abc.MutableMapping):
+    """
+    Mapping of column names to column profiles, which are kept serialized
+    until they are first accessed.
+
+    Loading a profile with ``lazy=True`` (see
+    :func:`DatasetProfile.from_protobuf_string`) only parses its properties,
+    so looking at a few columns of a very wide profile does not pay for
+    deserializing the sketches of all the others.  Accessing a column
+    deserializes and keeps it.  Iterating over the names, ``in`` and
+    ``len()`` do not deserialize any column, but iterating over the values
+    or items deserializes all of them.
+
+    Parameters
+    ----------
+    messages : dict
+        Serialized `ColumnMessage` bytes, or `ColumnMessage` objects, by
+        column name
+    states : dict, optional
+        Column extension entries, by column name.  See
+        :mod:`whylogs.core.extensions`
+    """
+
+    def __init__(self, messages: dict, states: dict = None):
+        if states is None:
+            states = {}
+        self._messages = dict(messages)
+        self._states = {k: v for k, v in states.items() if k in self._messages}
+        self._columns = {}
+
+    def __getitem__(self, name):
+        column = self._columns.get(name)
+        if column is not None:
+            return column
+        message = self._messages.pop(name)
+        column = _column_from_protobuf(message, self._states.pop(name, None))
+        self._columns[name] = column
+        return column
+
+    def __setitem__(self, name, column: ColumnProfile):
+        self._messages.pop(name, None)
+        self._states.pop(name, None)
+        self._columns[name] = column
+
+    def __delitem__(self, name):
+        if name in self._columns:
+            del self._columns[name]
+        else:
+            del self._messages[name]
+            self._states.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._columns or name in self._messages
+
+    def __iter__(self):
+        # Iterate over a snapshot, since accessing a column moves it
+        return iter(list(self._columns) + list(self._messages))
+
+    def __len__(self):
+        return len(self._columns) + len(self._messages)
+
+    def is_loaded(self, name):
+        """
+        Return True if the column `name` was deserialized
+        """
+        return name in self._columns
+
+    def loaded_items(self):
+        """
+        Return the ``(name, column)`` pairs of the deserialized columns
+        """
+        return self._columns.items()
+
+    def unloaded_messages(self):
+        """
+        Return the ``(name, message)`` pairs of the serialized columns, as
+        `ColumnMessage` objects
+        """
+        for name, message in self._messages.items():
+            if isinstance(message, bytes):
+                message = ColumnMessage.FromString(message)
+            yield name, message
+
+    def serialized_items(self):
+        """
+        Return ``(name, message, state)`` tuples of the serialized columns,
+        with the serialized `ColumnMessage` and the extension entries of the
+        column
+        """
+        for name, message in self._messages.items():
+            if not isinstance(message, bytes):
+                message = message.SerializeToString()
+            yield name, message, self._states.get(name, {})
+
+    def unloaded_states(self):
+        """
+        Return the ``(name, state)`` pairs of the extension entries of the
+        serialized columns
+        """
+        return self._states.items()
+
+    def copy(self):
+        """
+        Return a copy of this mapping.  The deserialized columns are copied,
+        and the serialized ones are shared
+        """
+        columns = LazyColumns(self._messages, self._states)
+        columns._columns = {k: v.copy() for k, v in self._columns.items()}
+        return columns
+
+
+def _loaded_columns(columns):
+    """
+    Return the ``(name, column)`` pairs of the deserialized columns of a dict
+    or :class:`LazyColumns`
+    """
+    if isinstance(columns, LazyColumns):
+        return columns.loaded_items()
+    return columns.items()
+
+
+def _copy_columns(columns):
+    if isinstance(columns, LazyColumns):
+        return columns.copy()
+    return {k: v.copy() for k, v in columns.items()}
+
+
+def _column_state(column: ColumnProfile):
+    """
+    Return the extension entries of a column, for its state which has no
+    field in the `ColumnMessage`
+    """
+    state = {}
+    strings = column._string_tracker
+    if strings is not None and not strings.length.is_empty():
+        state[STRING_LENGTHS_EXTENSION] = encode_bytes(strings.serialize_lengths())
+    if column.reservoir is not None:
+        state[RESERVOIR_EXTENSION] = encode_bytes(column.reservoir.serialize())
+    cardinality = column.cardinality_state()
+    if cardinality is not None:
+        state[CARDINALITY_EXTENSION] = {
+            name: encode_bytes(value) for name, value in cardinality.items()
+        }
+    return state
+
+
+def _column_from_protobuf(message, state: dict = None):
+    """
+    Load a column profile from its (possibly serialized) message and its
+    extension entries.  See :func:`DatasetProfile._state_properties`
+    """
+    if isinstance(message, bytes):
+        message = ColumnMessage.FromString(message)
+    if state is None:
+        return ColumnProfile.from_protobuf(message)
+    cardinality = state.get(CARDINALITY_EXTENSION)
+    if cardinality is not None:
+        cardinality = {
+            name: decode_bytes(value) for name, value in cardinality.items()
+        }
+    column = ColumnProfile.from_protobuf(message, cardinality)
+    lengths = state.get(STRING_LENGTHS_EXTENSION)
+    if lengths is not None:
+        column.string_tracker.deserialize_lengths(decode_bytes(lengths))
+    reservoir = state.get(RESERVOIR_EXTENSION)
+    if reservoir is not None:
+        column.reservoir = ReservoirSampler.deserialize(decode_bytes(reservoir))
+    return column
+
+
+# Protobuf wire types
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+_WIRE_FIXED32 = 5
+
+
+def _wire_fields(data: bytes, pos: int, end: int):
+    """
+    Iterate over the length delimited fields of a serialized protobuf message
+    between `pos` and `end`, yielding ``(field_number, start, end)`` tuples.
+    Other fields are skipped.
+    """
+    while pos < end:
+        tag, pos = _DecodeVarint32(data, pos)
+        wire_type = tag & 7
+        if wire_type == _WIRE_LENGTH_DELIMITED:
+            size, pos = _DecodeVarint32(data, pos)
+            yield tag >> 3, pos, pos + size
+            pos += size
+        elif wire_type == _WIRE_VARINT:
+            _, pos = _DecodeVarint(data, pos)
+        elif wire_type == _WIRE_FIXED64:
+            pos += 8
+        elif wire_type == _WIRE_FIXED32:
+            pos += 4
+        else:
+            raise ValueError("Unsupported wire type: {}".format(wire_type))
+    if pos != end:
+        raise ValueError("Truncated message")
+
+
+def _split_profile_message(data: bytes):
+    """
+    Parse the properties of a serialized `DatasetProfileMessage`, and return
+    them with the serialized `ColumnMessage` of every column, without parsing
+    the columns
+    """
+    properties_field = DatasetProfileMessage.DESCRIPTOR.fields_by_name[
+        "properties"
+    ].number
+    columns_field = DatasetProfileMessage.DESCRIPTOR.fields_by_name["columns"].number
+    properties = DatasetProperties()
+    messages = {}
+    for number, start, end in _wire_fields(data, 0, len(data)):
+        if number == properties_field:
+            properties.MergeFromString(data[start:end])
+        elif number == columns_field:
+            # Map entries have the key as field 1 and the value as field 2.
+            # Copy them, as `data` may be a view of a buffer which is reused
+            name, message = "", b""
+            for entry_number, entry_start, entry_end in _wire_fields(data, start, end):
+                if entry_number == 1:
+                    name = bytes(data[entry_start:entry_end]).decode("utf-8")
+                elif entry_number == 2:
+                    message = bytes(data[entry_start:entry_end])
+            messages[name] = message
+    return properties, messages
+
+
+def _segment_indices(df: pd.DataFrame, segment_by: list):
+    """
+    Return an iterator of ``(segment, indices)`` pairs, where `segment` is a
+    tuple of ``(column, value)`` pairs sorted by column (values are converted
+    to strings, null values to ``"None"``) and `indices` are the positions of
+    the rows of the segment.  See :func:`whylogs.util.data.group_indices`
+    """
+    for values, indices in group_indices([df[col] for col in segment_by]):
+        segment = [(col, str(value)) for col, value in zip(segment_by, values)]
+        yield tuple(sorted(segment)), indices
+
+
+def _row_count(profile: DatasetProfile):
+    """
+    Return the number of rows tracked by a profile, from the exact counters
+    of its columns
+    """
+    counts = [column.counters.count for column in profile.columns.values()]
+    counts.extend(v.count + v.null_count for v in profile.vectors.values())
+    return max(counts, default=0)
+
+
+def _merged_sample_rate(x: DatasetProfile, y: DatasetProfile):
+    """
+    Return the sample rate of the merge of two profiles: the average of
+    their rates, weighted by their numbers of rows.  See
+    :func:`DatasetProfile.merge`
+    """
+    rows = [_row_count(x), _row_count(y)]
+    if sum(rows) == 0:
+        # Both are empty: keep the rate they were set up to sample at
+        return x.sample_rate if x.sample_rate is not None else y.sample_rate
+    rates = [1.0 if p.sample_rate is None else p.sample_rate for p in (x, y)]
+    rate = (rows[0] * rates[0] + rows[1] * rates[1]) / sum(rows)
+    if rate >= 1.0:
+        return None
+    return rate
+
+
+def _serialize_profile(profile):
+    """
+    Serialize a profile for a worker process, as the list of the serialized
+    profile and of its segments
+    """
+    if isinstance(profile, bytes):
+        return [profile]
+    return [
+        p.to_protobuf().SerializeToString()
+        for p in itertools.chain([profile], profile.segments.values())
+    ]
+
+
+def _deserialize_profile(messages: list):
+    """
+    Deserialize the output of :func:`_serialize_profile`
+    """
+    profile = DatasetProfile.from_protobuf_string(messages[0])
+    for message in messages[1:]:
+        segment = DatasetProfile.from_protobuf_string(message)
+        segment.random_state = profile.random_state
+        profile.segments[segment.segment] = segment
+    return profile
+
+
+def _merge_tree(profiles):
+    """
+    Merge an iterable of ``(profile, owned)`` pairs in a balanced binary
+    tree, holding one partial result per level.  Profiles which are not
+    `owned` are copied before they are merged into
+    """
+    partials = []
+    for profile, owned in profiles:
+        level = 0
+        while len(partials) > 0 and partials[-1][0] == level:
+            _, left, left_owned = partials.pop()
+            profile, owned = _merge_pair(left, left_owned, profile), True
+            level += 1
+        partials.append((level, profile, owned))
+    merged = None
+    for _, profile, owned in reversed(partials):
+        if merged is None:
+            merged = profile if owned else profile.copy()
+        else:
+            merged = _merge_pair(profile, owned, merged)
+    return merged
+
+
+def _merge_pair(left, owned: bool, right):
+    if owned:
+        return left.merge_into(right)
+    return left.merge(right)
+
+
+def _merge_serialized(profiles: list):
+    """
+    Merge profiles serialized by :func:`_serialize_profile` in a worker
+    process, returning the serialized result
+    """
+    merged = _merge_tree((_deserialize_profile(p), True) for p in profiles)
+    return _serialize_profile(merged)
+
+
+def _merge_many_parallel(profiles, n_jobs: int, chunk_size: int):
+    """
+    Merge profiles in a process pool, returning the serialized result.
+
+    Partial results are merged pairwise as they complete, so besides the
+    chunks of the running tasks, at most one partial result is held
+    """
+    profiles = iter(profiles)
+    pending = set()
+    waiting = None
+    exhausted = False
+    with concurrent.futures.ProcessPoolExecutor(n_jobs) as pool:
+        while True:
+            # Bound the number of chunks held in memory
+            if not exhausted and len(pending) < 2 * n_jobs:
+                chunk = list(itertools.islice(profiles, chunk_size))
+                if len(chunk) > 0:
+                    messages = [_serialize_profile(p) for p in chunk]
+                    pending.add(pool.submit(_merge_serialized, messages))
+                    continue
+                exhausted = True
+            if len(pending) == 0:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if waiting is None:
+                    waiting = future.result()
+                else:
+                    pair = [waiting, future.result()]
+                    pending.add(pool.submit(_merge_serialized, pair))
+                    waiting = None
+    return waiting
+
+
+def _count_groups(x: np.ndarray):
+    """
+    Return an iterator of ``(value, count)`` pairs, grouping the values of an
+    array which are counted identically by :func:`ColumnProfile.track_counts`.
+
+    The counters and schema only depend on the type of a value after type
+    conversion, and on whether it is null.  Numeric arrays are therefore
+    grouped into NaN and non-NaN values, while the distinct values of other
+    arrays are counted (values of different types which compare equal, such
+    as ``1``, ``1.0`` and ``True``, are counted separately).
+    """
+    if len(x) == 0:
+        return
+    if x.dtype.kind in "biufc":
+        # All elements are numpy scalars of the same type
+        nan = pd.isnull(x)
+        n_nan = int(nan.sum())
+        if n_nan > 0:
+            yield x[nan][0], n_nan
+        if n_nan < len(x):
+            yield x[~nan][0], len(x) - n_nan
+        return
+    counts = {}
+    try:
+        for xi in x:
+            key = (type(xi), xi)
+            counts[key] = counts.get(key, 0) + 1
+    except TypeError:
+        # Unhashable values
+        for xi in x:
+            yield xi, 1
+        return
+    for (_, xi), n in counts.items():
+        yield xi, n
+
+
 def columns_chunk_iterator(iterator, marker: str):
     """
     Create an iterator to return column messages in batches
@@ -523,6 +1687,117 @@ def columns_chunk_iterator(iterator, marker: str):
         yield message
 
 
+def _column_chunks(iterator, marker: str, max_len: int):
+    """
+    Group ``(message, state)`` pairs of columns into `ColumnsChunkSegment`
+    messages and `DatasetProperties` holding their extension entries, of at
+    most `max_len` bytes together.  Larger columns are in a chunk of their
+    own
+    """
+    chunk = ColumnsChunkSegment(marker=marker)
+    states = ProfileExtensions()
+    content_len = 0
+    for col_message, state in iterator:
+        message_len = col_message.ByteSize() + sum(
+            len(k) + len(v) for k, v in state.items()
+        )
+        if content_len + message_len > max_len and len(chunk.columns) > 0:
+            yield chunk, _extension_properties(states)
+            chunk = ColumnsChunkSegment(marker=marker)
+            states = ProfileExtensions()
+            content_len = 0
+        chunk.columns.append(col_message)
+        if len(state) > 0:
+            states.columns[col_message.name] = state
+        content_len += message_len
+    if len(chunk.columns) > 0:
+        yield chunk, _extension_properties(states)
+
+
+def _extension_properties(extensions: ProfileExtensions):
+    properties = DatasetProperties()
+    extensions.write(properties.metadata)
+    return properties
+
+
+def reassemble_segments(segments, lazy: bool = False):
+    """
+    Reassemble the dataset profiles split into segments by
+    :func:`DatasetProfile.chunk_iterator`.
+
+    Segments are grouped by their marker, so the segments of different
+    profiles can be interleaved, in any order.  A profile is yielded as soon
+    as all its segments were seen, as counted by its last segment (see
+    :data:`SEGMENTS_METADATA_KEY`).  Profiles without that count are yielded
+    once all the segments were seen.
+
+    Parameters
+    ----------
+    segments : iterable
+        `MessageSegment` messages, e.g. read from a file with
+        ``multi_msg_reader(f, MessageSegment)``
+    lazy : bool
+        If True, the columns are kept serialized until they are first
+        accessed.  See :class:`LazyColumns`
+
+    Returns
+    -------
+    profiles : iterator
+        Iterator of the reassembled dataset profiles
+    """
+    # Properties, columns, number of segments seen and extension entries, by
+    # marker.  The extension entries of the segments are all stored under
+    # the same metadata key, so they are merged separately
+    pending = OrderedDict()
+    for segment in segments:
+        item = segment.WhichOneof("item")
+        if item is None:
+            continue
+        part = getattr(segment, item)
+        marker = segment.marker or part.marker
+        group = pending.get(marker)
+        if group is None:
+            group = pending[marker] = [DatasetProperties(), {}, 0, ProfileExtensions()]
+        properties, columns, _, extensions = group
+        group[2] += 1
+        if item == "metadata":
+            part_properties = DatasetProperties()
+            part_properties.CopyFrom(part.properties)
+            extensions.update(ProfileExtensions.pop(part_properties.metadata))
+            properties.MergeFrom(part_properties)
+        else:
+            for col_message in part.columns:
+                if lazy:
+                    columns[col_message.name] = col_message.SerializeToString()
+                else:
+                    columns[col_message.name] = col_message
+        expected = properties.metadata.get(SEGMENTS_METADATA_KEY)
+        if expected is not None and group[2] >= int(expected):
+            del pending[marker]
+            yield _profile_from_segments(properties, columns, lazy, extensions)
+
+    for marker, (properties, columns, count, _) in pending.items():
+        if SEGMENTS_METADATA_KEY in properties.metadata:
+            raise ValueError(
+                "Missing segments of profile {}: got {} of {}".format(
+                    marker, count, properties.metadata[SEGMENTS_METADATA_KEY]
+                )
+            )
+    for properties, columns, _, extensions in pending.values():
+        yield _profile_from_segments(properties, columns, lazy, extensions)
+
+
+def _profile_from_segments(
+    properties: DatasetProperties,
+    columns: dict,
+    lazy: bool,
+    extensions: ProfileExtensions,
+):
+    properties.metadata.pop(SEGMENTS_METADATA_KEY, None)
+    extensions.write(properties.metadata)
+    return DatasetProfile._from_protobuf(properties, columns, lazy)
+
+
 def flatten_summary(dataset_summary: DatasetSummary) -> dict:
     """
     Flatten a DatasetSummary
@@ -545,6 +1820,24 @@ def flatten_summary(dataset_summary: DatasetSummary) -> dict:
             frequent_strings : pandas.Series
                 Series of frequent string counts with (column name, counts)
                 key, val pairs.  `counts` are a pandas Series.
+            string_lengths : pandas.DataFrame
+                Only if the summary has string columns.  Count, min, max and
+                quantiles of the string lengths (``length_*``) and of the
+                number of tokens per string (``token_length_*``), by column
+            vectors : pandas.Series
+                Only if the summary has vector columns.  Series of
+                per-dimension statistics with (column name, statistics) key,
+                value pairs.  The statistics are a `pandas.DataFrame` of the
+                ``mean``, ``variance`` and ``nan_count`` of each dimension
+            correlation : pandas.DataFrame
+                Only if the profile tracked covariances.  Pairwise Pearson
+                correlation matrix of the covariance columns
+            rows : pandas.Series
+                Only if the profile tracked rows.  Row count, distinct row
+                estimate and duplicate rate
+            null_patterns : pandas.Series
+                Only if the profile tracked rows.  Frequent null patterns, as
+                comma separated null columns -> count estimate
 
     Notes
     -----
@@ -560,12 +1853,94 @@ def flatten_summary(dataset_summary: DatasetSummary) -> dict:
     frequent_strings = flatten_dataset_frequent_strings(dataset_summary)
     frequent_numbers = flatten_dataset_frequent_numbers(dataset_summary)
     summary = get_dataset_frame(dataset_summary)
-    return {
+    flat = {
         "summary": summary,
         "hist": hist,
         "frequent_strings": frequent_strings,
         "frequent_numbers": frequent_numbers,
     }
+    extensions = ProfileExtensions.pop(dict(dataset_summary.properties.metadata))
+    string_lengths = {
+        name: _flatten_string_lengths(entries[STRING_LENGTHS_EXTENSION])
+        for name, entries in extensions.columns.items()
+        if STRING_LENGTHS_EXTENSION in entries
+    }
+    if len(string_lengths) > 0:
+        flat["string_lengths"] = pd.DataFrame(string_lengths).T
+        flat["string_lengths"].index.name = "column"
+    vectors = {
+        name: pd.DataFrame(
+            entries[VECTOR_SUMMARY_EXTENSION], columns=["mean", "variance", "nan_count"]
+        ).astype({"mean": np.float64, "variance": np.float64})
+        for name, entries in extensions.columns.items()
+        if VECTOR_SUMMARY_EXTENSION in entries
+    }
+    if len(vectors) > 0:
+        flat["vectors"] = pd.Series(vectors)
+    correlation = extensions.profile.get(CORRELATION_SUMMARY_EXTENSION)
+    if correlation is not None:
+        flat["correlation"] = pd.DataFrame(
+            correlation["correlation"],
+            index=correlation["columns"],
+            columns=correlation["columns"],
+            dtype=np.float64,
+        )
+    rows = extensions.profile.get(ROWS_SUMMARY_EXTENSION)
+    if rows is not None:
+        flat["rows"] = pd.Series(
+            {
+                key: rows[key]
+                for key in ("count", "distinct_estimate", "duplicate_rate")
+            }
+        )
+        flat["null_patterns"] = pd.Series(
+            {
+                ",".join(columns): estimate
+                for columns, estimate in rows["null_patterns"]
+            },
+            dtype=np.float64,
+        )
+    return flat
+
+
+def _string_lengths_summary(strings):
+    """
+    Return the summary extension entry of the length distributions of a
+    string tracker, None if there are none
+    """
+    if strings is None:
+        return None
+    entry = {}
+    for name, summary in (
+        ("length", strings.length_summary()),
+        ("token_length", strings.token_length_summary()),
+    ):
+        if summary is not None:
+            entry[name] = {
+                "count": summary.count,
+                "min": summary.min,
+                "max": summary.max,
+                "quantiles": list(summary.quantiles.quantiles),
+                "quantile_values": list(summary.quantiles.quantile_values),
+            }
+    if len(entry) == 0:
+        return None
+    return entry
+
+
+def _flatten_string_lengths(entry: dict):
+    flat = OrderedDict()
+    for name in ("length", "token_length"):
+        summary = entry.get(name)
+        if summary is None:
+            continue
+        for key in ("count", "min", "max"):
+            flat["{}_{}".format(name, key)] = summary[key]
+        for q, value in zip(
+            _quantile_strings(summary["quantiles"]), summary["quantile_values"]
+        ):
+            flat["{}_{}".format(name, q)] = value
+    return flat
 
 
 def _quantile_strings(quantiles: list):
@@ -0,0 +1,146 @@
+"""
+Extension state of serialized dataset profiles and summaries.
+
+The protobuf messages of profiles and summaries are defined by the
+`whylogs-proto` submodule, which has no fields for the state of the
+optional trackers of :class:`whylogs.core.DatasetProfile` (vector columns,
+string length distributions, covariances, row statistics, reservoir
+samples, ...).  Instead of one metadata key per tracker, all of it is
+stored under a single reserved key of the metadata of the
+`DatasetProperties`, :data:`EXTENSIONS_METADATA_KEY`, as a JSON document::
+
+    {
+        "version": 1,
+        "profile": {<entry name>: <value>, ...},
+        "columns": {<column name>: {<entry name>: <value>, ...}, ...}
+    }
+
+Values are JSON values.  Binary state, such as serialized sketches, is
+base64 encoded with :func:`encode_bytes`.  The key is removed from the
+metadata when a profile is loaded, so it never shows up in
+:attr:`DatasetProfile.metadata`.
+
+Readers refuse documents of a newer :data:`EXTENSIONS_VERSION`, rather than
+silently dropping state they do not understand, and keep the entries they do
+not know about (see :attr:`DatasetProfile.extensions`), so they are written
+back unchanged.
+"""
+import base64
+import json
+
+#: Metadata key holding the extension state
+EXTENSIONS_METADATA_KEY = "whylogs.extensions"
+#: Version of the extension document written by this library
+EXTENSIONS_VERSION = 1
+
+
+class ProfileExtensions:
+    """
+    Extension entries of a profile (or summary) and of its columns
+
+    Parameters
+    ----------
+    profile : dict, optional
+        Profile level entries, by name
+    columns : dict, optional
+        Column level entries, as dicts of entries by name, by column name
+    """
+
+    def __init__(self, profile: dict = None, columns: dict = None):
+        if profile is None:
+            profile = {}
+        if columns is None:
+            columns = {}
+        self.profile = profile
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.profile) + len(self.columns)
+
+    def column(self, name: str):
+        """
+        Return the entries of a column, adding them if missing
+        """
+        return self.columns.setdefault(name, {})
+
+    def update(self, other):
+        """
+        Add the entries of another `ProfileExtensions`, e.g. those of the
+        segments of a chunked profile.  Entries of `other` win
+        """
+        self.profile.update(other.profile)
+        for name, entries in other.columns.items():
+            self.column(name).update(entries)
+        return self
+
+    def encode(self):
+        """
+        Return the JSON document of the entries
+
+        Returns
+        -------
+        value : str
+        """
+        return json.dumps(
+            {
+                "version": EXTENSIONS_VERSION,
+                "profile": self.profile,
+                "columns": self.columns,
+            },
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def decode(value: str):
+        """
+        Load the output of :func:`ProfileExtensions.encode`.  Raises a
+        ValueError for documents of an unsupported version
+
+        Returns
+        -------
+        extensions : ProfileExtensions
+        """
+        document = json.loads(value)
+        version = document.get("version")
+        if not isinstance(version, int) or not 1 <= version <= EXTENSIONS_VERSION:
+            raise ValueError("Unsupported extensions version: {}".format(version))
+        return ProfileExtensions(document.get("profile"), document.get("columns"))
+
+    def write(self, metadata):
+        """
+        Store the entries in a metadata mapping (a dict or the metadata of a
+        protobuf message), unless there are none
+        """
+        if len(self) > 0:
+            metadata[EXTENSIONS_METADATA_KEY] = self.encode()
+
+    @staticmethod
+    def pop(metadata):
+        """
+        Remove the entries from a metadata mapping (a dict or the metadata of
+        a protobuf message) and return them.  Empty if there are none
+
+        Returns
+        -------
+        extensions : ProfileExtensions
+        """
+        if EXTENSIONS_METADATA_KEY not in metadata:
+            return ProfileExtensions()
+        value = metadata[EXTENSIONS_METADATA_KEY]
+        del metadata[EXTENSIONS_METADATA_KEY]
+        return ProfileExtensions.decode(value)
+
+
+def encode_bytes(data: bytes):
+    """
+    Encode binary state as an extension value
+    """
+    return base64.b64encode(data).decode("ascii")
+
+
+def decode_bytes(value: str):
+    """
+    Decode the output of :func:`encode_bytes`
+    """
+    return base64.b64decode(value)
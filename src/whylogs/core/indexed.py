@@ -0,0 +1,607 @@
+"""
+Indexed layout of serialized dataset profiles, to read a few columns of a
+large profile without parsing the others.
+
+The layout is::
+
+    magic | properties | column 1 | ... | column n | index | footer
+
+* `properties` is the serialized `DatasetProperties` of the profile,
+  without the state of the columns
+* every column is its serialized `ColumnMessage`, followed by its
+  extension entries (see :mod:`whylogs.core.extensions`) as JSON, if it
+  has any
+* `index` is JSON, mapping column names to the offsets and lengths of their
+  message and extension entries
+* `footer` holds the offset and length of the index, and the magic bytes
+
+Offsets are relative to the start of the layout.  A reader seeks to the
+footer, reads the index, and then only reads the requested columns.
+
+Many profiles can be stored in an archive file with a similar index, see
+:class:`ProfileArchiveWriter` and :class:`ProfileArchiveReader`.
+"""
+import collections
+import datetime
+import io
+import json
+import mmap
+import os
+import struct
+import weakref
+
+import numpy as np
+
+from whylogs.core.datasetprofile import DatasetProfile, _column_from_protobuf
+from whylogs.proto import ColumnMessage, DatasetProperties
+from whylogs.util.time import to_utc_ms
+
+#: Magic bytes at the start and the end of the indexed layout
+INDEXED_MAGIC = b"WHYLOGSI"
+_FOOTER = struct.Struct("<QQ8s")
+_SERIAL_VERSION = 2
+
+
+def write_indexed(profile: DatasetProfile, f):
+    """
+    Write a profile in the indexed layout
+
+    Parameters
+    ----------
+    profile : DatasetProfile
+    f : file
+        Binary file object to write to
+
+    Returns
+    -------
+    size : int
+        Number of bytes written
+    """
+    pos = 0
+
+    def write(data: bytes):
+        nonlocal pos
+        f.write(data)
+        entry = [pos, len(data)]
+        pos += len(data)
+        return entry
+
+    write(INDEXED_MAGIC)
+    properties = profile._state_properties(columns=False)
+    index = {
+        "version": _SERIAL_VERSION,
+        "properties": write(properties.SerializeToString()),
+        "columns": {},
+    }
+    for name, message, state in profile._serialized_columns():
+        entry = write(message)
+        if len(state) > 0:
+            entry.append(write(json.dumps(state).encode("utf-8")))
+        index["columns"][name] = entry
+    index_offset, index_length = write(json.dumps(index).encode("utf-8"))
+    write(_FOOTER.pack(index_offset, index_length, INDEXED_MAGIC))
+    return pos
+
+
+def serialize_indexed(profile: DatasetProfile):
+    """
+    Serialize a profile in the indexed layout.  See :func:`write_indexed`
+
+    Returns
+    -------
+    data : bytes
+    """
+    with io.BytesIO() as f:
+        write_indexed(profile, f)
+        return f.getvalue()
+
+
+class IndexedProfileReader:
+    """
+    Read the columns of a profile in the indexed layout (see
+    :func:`write_indexed`).  Only the footer, the index and the requested
+    columns are read, and the properties when they are needed.
+
+    Can be used as a context manager.
+
+    Parameters
+    ----------
+    f : str, file, bytes-like
+        Path, seekable binary file object, or buffer (e.g. `bytes`, or a
+        `memoryview` of a memory map) of the indexed layout.  A path is
+        opened and closed by :func:`IndexedProfileReader.close`
+    """
+
+    def __init__(self, f):
+        self._owns_file = isinstance(f, str)
+        if self._owns_file:
+            f = open(f, "rb")
+        if hasattr(f, "read"):
+            self._file, self._buffer = f, None
+            end = f.seek(0, io.SEEK_END)
+        else:
+            self._file, self._buffer = None, memoryview(f)
+            end = len(self._buffer)
+        if end < _FOOTER.size:
+            raise ValueError("Not an indexed profile")
+        footer = self._read_range(end - _FOOTER.size, _FOOTER.size)
+        index_offset, index_length, magic = _FOOTER.unpack(footer)
+        if magic != INDEXED_MAGIC:
+            raise ValueError("Not an indexed profile")
+        self._start = end - _FOOTER.size - index_length - index_offset
+        index = json.loads(self._read([index_offset, index_length]).decode("utf-8"))
+        if index["version"] != _SERIAL_VERSION:
+            raise ValueError("Unsupported serial version: {}".format(index["version"]))
+        self._properties_entry = index["properties"]
+        self._columns = index["columns"]
+        self._properties = None
+
+    def _read_range(self, pos: int, length: int):
+        if self._buffer is not None:
+            data = bytes(self._buffer[pos : pos + length])
+        else:
+            self._file.seek(pos)
+            data = self._file.read(length)
+        if pos < 0 or len(data) != length:
+            raise ValueError("Truncated indexed profile")
+        return data
+
+    def _read(self, entry: list):
+        offset, length = entry[:2]
+        return self._read_range(self._start + offset, length)
+
+    @property
+    def column_names(self):
+        """
+        Names of the columns
+        """
+        return list(self._columns)
+
+    @property
+    def properties(self):
+        """
+        Dataset properties, without the state of the columns
+        """
+        if self._properties is None:
+            self._properties = DatasetProperties.FromString(
+                self._read(self._properties_entry)
+            )
+        return self._properties
+
+    def read_column_message(self, name: str):
+        """
+        Read the `ColumnMessage` of a column.  Raises a KeyError if the
+        column does not exist
+        """
+        return ColumnMessage.FromString(self._read(self._columns[name]))
+
+    def _column_state(self, name: str):
+        entry = self._columns[name]
+        if len(entry) < 3:
+            return {}
+        return json.loads(self._read(entry[2]).decode("utf-8"))
+
+    def read_column(self, name: str):
+        """
+        Read a column.  Raises a KeyError if the column does not exist
+
+        Returns
+        -------
+        column : ColumnProfile
+        """
+        return _column_from_protobuf(
+            self._read(self._columns[name]), self._column_state(name)
+        )
+
+    def read_profile(self, columns: list = None, lazy: bool = False):
+        """
+        Read the profile, with only some of its columns
+
+        Parameters
+        ----------
+        columns : list, optional
+            Names of the columns to read.  All columns by default
+        lazy : bool
+            If True, the columns which are read are only deserialized when
+            first accessed.  See :class:`whylogs.core.datasetprofile.LazyColumns`
+
+        Returns
+        -------
+        profile : DatasetProfile
+        """
+        if columns is None:
+            columns = self.column_names
+        messages = {}
+        states = {}
+        for name in columns:
+            messages[name] = self._read(self._columns[name])
+            state = self._column_state(name)
+            if len(state) > 0:
+                states[name] = state
+        return DatasetProfile._from_protobuf(self.properties, messages, lazy, states)
+
+    def close(self):
+        """
+        Close the file, if it was opened by this reader, and release the
+        buffer.  Profiles which were read stay valid
+        """
+        if self._owns_file:
+            self._file.close()
+        if self._buffer is not None:
+            self._buffer.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+#: Magic bytes at the start and the end of a profile archive
+ARCHIVE_MAGIC = b"WHYLOGSA"
+_ARCHIVE_VERSION = 1
+_ARCHIVE_INDEX_HEADER = struct.Struct("<BQ")
+# Data timestamp (in UTC epoch milliseconds), offset and length of every
+# profile
+_ARCHIVE_TABLE_DTYPE = np.dtype(
+    [("data_timestamp", "<i8"), ("offset", "<u8"), ("length", "<u8")]
+)
+# Data timestamp of the profiles without one
+_NO_TIMESTAMP = np.iinfo(np.int64).min
+
+#: Entry of the index of a profile archive.  `data_timestamp` is in UTC epoch
+#: milliseconds, or None
+ArchiveEntry = collections.namedtuple(
+    "ArchiveEntry",
+    ["name", "tags", "data_timestamp", "session_id", "offset", "length"],
+)
+
+
+class ProfileArchiveWriter:
+    """
+    Write dataset profiles to an archive file, which can be searched and read
+    at random by :class:`ProfileArchiveReader`.
+
+    The archive is a sequence of profiles, each in the indexed layout (see
+    :func:`write_indexed`), followed by an index and a footer::
+
+        magic | profile 1 | ... | profile n | index | footer
+
+    The index is made of a table of the data timestamp, offset and length of
+    every profile, and the JSON list of their names, tags and session IDs.
+    The footer holds the offset and length of the index, and the magic
+    bytes.
+
+    Profiles are appended after the footer of an existing archive, and the
+    index of all the profiles is written on :func:`ProfileArchiveWriter.close`,
+    so the previous index is left as unused space.  The new index is synced
+    to disk before the footer which makes it reachable, and a reader of an
+    archive whose last append was interrupted (e.g. by a crash) falls back
+    to the previous footer, so the archive keeps its earlier profiles.  The
+    unreachable bytes are truncated by the next append.  An archive written
+    with mode ``"w"`` is written to a temporary file, which only replaces
+    the archive once it is closed.
+
+    If an error occurs within a ``with`` block, the append is aborted, see
+    :func:`ProfileArchiveWriter.abort`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the archive
+    mode : str
+        ``"a"`` to append to the archive if it exists, or ``"w"`` to
+        overwrite it
+    """
+
+    def __init__(self, path: str, mode: str = "a"):
+        if mode not in ("a", "w"):
+            raise ValueError("Unsupported mode: {}".format(mode))
+        self._path = path
+        self._entries = []
+        if mode == "a" and os.path.exists(path) and os.path.getsize(path) > 0:
+            with ProfileArchiveReader(path) as reader:
+                self._entries = reader.entries
+                self._initial_size = reader.size
+            self._tmp_path = None
+            self._file = open(path, "r+b")
+            # Drop the remains of an interrupted append
+            self._file.truncate(self._initial_size)
+            self._file.seek(self._initial_size)
+        else:
+            self._tmp_path = path + ".tmp"
+            self._file = open(self._tmp_path, "w+b")
+            self._file.write(ARCHIVE_MAGIC)
+            self._initial_size = 0
+        self._pos = self._file.tell()
+
+    def write(self, profile: DatasetProfile):
+        """
+        Append a profile to the archive
+        """
+        size = write_indexed(profile, self._file)
+        tags = profile.tags
+        self._entries.append(
+            ArchiveEntry(
+                profile.name,
+                tags,
+                to_utc_ms(profile.data_timestamp),
+                profile.session_id,
+                self._pos,
+                size,
+            )
+        )
+        self._pos += size
+
+    def close(self):
+        """
+        Write the index and close the archive
+        """
+        if self._file.closed:
+            return
+        table = np.array(
+            [
+                (
+                    _NO_TIMESTAMP if e.data_timestamp is None else e.data_timestamp,
+                    e.offset,
+                    e.length,
+                )
+                for e in self._entries
+            ],
+            dtype=_ARCHIVE_TABLE_DTYPE,
+        )
+        metadata = json.dumps(
+            [[e.name, e.tags, e.session_id] for e in self._entries]
+        ).encode("utf-8")
+        index = b"".join(
+            [
+                _ARCHIVE_INDEX_HEADER.pack(_ARCHIVE_VERSION, len(self._entries)),
+                table.tobytes(),
+                metadata,
+            ]
+        )
+        self._file.write(index)
+        self._sync()
+        self._file.write(_FOOTER.pack(self._pos, len(index), ARCHIVE_MAGIC))
+        self._sync()
+        self._file.close()
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self._path)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def abort(self):
+        """
+        Close the archive without writing the profiles written so far,
+        truncating it back to its previous state (or removing the temporary
+        file of mode ``"w"``).  This only covers errors within this process:
+        after a crash, readers fall back to the previous index instead
+        """
+        if self._file.closed:
+            return
+        if self._tmp_path is not None:
+            self._file.close()
+            os.remove(self._tmp_path)
+            return
+        self._file.truncate(self._initial_size)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ProfileArchiveReader:
+    """
+    Search and read the profiles of an archive written by
+    :class:`ProfileArchiveWriter`.
+
+    The archive is memory mapped: opening it only reads the footer and the
+    table of the index, and reading a profile only touches its bytes.  The
+    names, tags and session IDs of the profiles are parsed when first
+    needed.  If the last append to the archive was interrupted, the archive
+    is read as it was before it.
+
+    Can be used as a context manager.
+
+    Parameters
+    ----------
+    path : str
+        Path of the archive
+
+    Attributes
+    ----------
+    size : int
+        Size of the archive up to the end of its footer.  Bytes after it are
+        the remains of an interrupted append
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._table = None
+        self._metadata_view = None
+        self._metadata = None
+        self._readers = weakref.WeakSet()
+        try:
+            self._load_index()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load_index(self):
+        if len(self._buffer) < len(ARCHIVE_MAGIC) + _FOOTER.size or (
+            self._buffer[: len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC
+        ):
+            raise ValueError("Not a profile archive")
+        # Search back from the end for the last complete footer
+        end = len(self._buffer)
+        while True:
+            index = self._index(end)
+            if index is not None:
+                break
+            magic = self._mmap.rfind(ARCHIVE_MAGIC, len(ARCHIVE_MAGIC), end - 1)
+            if magic < 0:
+                raise ValueError("Not a profile archive, or an incomplete one")
+            end = magic + len(ARCHIVE_MAGIC)
+        self.size = end
+        pos = _ARCHIVE_INDEX_HEADER.size
+        n = _ARCHIVE_INDEX_HEADER.unpack_from(index)[1]
+        self._table = np.frombuffer(index, _ARCHIVE_TABLE_DTYPE, n, pos)
+        self._metadata_view = index[pos + self._table.nbytes :]
+
+    def _index(self, end: int):
+        """
+        Return the index of the footer ending at `end`, None if there is no
+        valid footer there
+        """
+        footer_start = end - _FOOTER.size
+        if footer_start < len(ARCHIVE_MAGIC):
+            return None
+        index_offset, index_length, magic = _FOOTER.unpack(
+            self._buffer[footer_start:end]
+        )
+        if (
+            magic != ARCHIVE_MAGIC
+            or index_offset + index_length != footer_start
+            or index_length < _ARCHIVE_INDEX_HEADER.size
+        ):
+            return None
+        index = self._buffer[index_offset:footer_start]
+        version, n = _ARCHIVE_INDEX_HEADER.unpack_from(index)
+        if version != _ARCHIVE_VERSION:
+            index.release()
+            raise ValueError("Unsupported serial version: {}".format(version))
+        if _ARCHIVE_INDEX_HEADER.size + n * _ARCHIVE_TABLE_DTYPE.itemsize > len(index):
+            index.release()
+            return None
+        return index
+
+    def __len__(self):
+        return len(self._table)
+
+    def _get_metadata(self):
+        if self._metadata is None:
+            self._metadata = json.loads(bytes(self._metadata_view).decode("utf-8"))
+        return self._metadata
+
+    @property
+    def entries(self):
+        """
+        List of the :data:`ArchiveEntry` of every profile, in the order they
+        were written
+        """
+        entries = []
+        for (name, tags, session_id), (timestamp, offset, length) in zip(
+            self._get_metadata(), self._table.tolist()
+        ):
+            if timestamp == _NO_TIMESTAMP:
+                timestamp = None
+            entries.append(
+                ArchiveEntry(name, tags, timestamp, session_id, offset, length)
+            )
+        return entries
+
+    def find(
+        self,
+        name: str = None,
+        tags: dict = None,
+        start: datetime.datetime = None,
+        end: datetime.datetime = None,
+    ):
+        """
+        Return the positions of the profiles matching all the filters, in the
+        order they were written
+
+        Parameters
+        ----------
+        name : str, optional
+            Dataset name
+        tags : dict, optional
+            Tags which the profiles must have, with the same values
+        start, end : datetime.datetime, optional
+            Range of data timestamps, including `start` and excluding `end`.
+            Profiles without a data timestamp are excluded if either is
+            specified
+
+        Returns
+        -------
+        positions : list
+        """
+        timestamps = self._table["data_timestamp"]
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None or end is not None:
+            mask &= timestamps != _NO_TIMESTAMP
+        if start is not None:
+            mask &= timestamps >= to_utc_ms(start)
+        if end is not None:
+            mask &= timestamps < to_utc_ms(end)
+        positions = np.flatnonzero(mask).tolist()
+        if name is None and tags is None:
+            return positions
+        metadata = self._get_metadata()
+        matches = []
+        for i in positions:
+            entry_name, entry_tags, _ = metadata[i]
+            if name is not None and entry_name != name:
+                continue
+            if tags is not None and any(
+                entry_tags.get(k) != v for k, v in tags.items()
+            ):
+                continue
+            matches.append(i)
+        return matches
+
+    def reader(self, i: int):
+        """
+        Return an :class:`IndexedProfileReader` of the profile at position
+        `i`, to read only some of its columns
+        """
+        _, offset, length = self._table[i].tolist()
+        with self._buffer[offset : offset + length] as view:
+            reader = IndexedProfileReader(view)
+        self._readers.add(reader)
+        return reader
+
+    def read(self, i: int, columns: list = None, lazy: bool = False):
+        """
+        Read the profile at position `i`.  See
+        :func:`IndexedProfileReader.read_profile`
+        """
+        return self.reader(i).read_profile(columns, lazy=lazy)
+
+    def profiles(self, columns: list = None, lazy: bool = False, **filters):
+        """
+        Iterate over the profiles matching the filters of
+        :func:`ProfileArchiveReader.find`
+        """
+        for i in self.find(**filters):
+            yield self.read(i, columns, lazy=lazy)
+
+    def close(self):
+        """
+        Close the memory map.  Profiles which were read stay valid, but the
+        readers returned by :func:`ProfileArchiveReader.reader` are closed
+        """
+        for reader in list(self._readers):
+            reader.close()
+        self._table = None
+        if self._metadata_view is not None:
+            self._metadata_view.release()
+            self._metadata_view = None
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
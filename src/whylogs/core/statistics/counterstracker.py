@@ -22,23 +22,23 @@ class CountersTracker:
         self.true_count = true_count
         self.null_count = null_count
 
-    def increment_count(self):
+    def increment_count(self, n: int = 1):
         """
-        Add one to the count of total objects
+        Add `n` (default 1) to the count of total objects
         """
-        self.count += 1
+        self.count += n
 
-    def increment_bool(self):
+    def increment_bool(self, n: int = 1):
         """
-        Add one to the boolean count
+        Add `n` (default 1) to the boolean count
         """
-        self.true_count += 1
+        self.true_count += n
 
-    def increment_null(self):
+    def increment_null(self, n: int = 1):
         """
-        Add one to the null count
+        Add `n` (default 1) to the null count
         """
-        self.null_count += 1
+        self.null_count += n
 
     def merge(self, other):
         """
@@ -49,11 +49,29 @@ class CountersTracker:
         new_tracker : CountersTracker
             The merged tracker
         """
-        return CountersTracker(
-            count=self.count + other.count,
-            true_count=self.true_count + other.true_count,
-            null_count=self.null_count + other.null_count,
-        )
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another counter tracker into this one, in place
+
+        Returns
+        -------
+        self : CountersTracker
+        """
+        self.count += other.count
+        self.true_count += other.true_count
+        self.null_count += other.null_count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return CountersTracker(self.count, self.true_count, self.null_count)
 
     def to_protobuf(self):
         """
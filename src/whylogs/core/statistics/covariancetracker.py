@@ -0,0 +1,249 @@
+"""
+Streaming covariance and correlation tracking across numeric columns
+"""
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+_HEADER = struct.Struct("<BI")
+_SERIAL_VERSION = 1
+
+
+class CovarianceTracker:
+    """
+    Track the pairwise covariances and correlations of numeric columns.
+
+    Null values are handled pairwise: the statistics of each pair of columns
+    are computed over the rows where both are non-null.  For every pair
+    ``(i, j)`` the tracker keeps, as ``d x d`` matrices:
+
+    * `count`: number of rows where both columns are non-null
+    * `mean`: mean of column ``i`` over those rows
+    * `m2`: sum of squared deviations of column ``i`` from that mean
+    * `comoment`: sum of products of the deviations of ``i`` and ``j``
+
+    Batches are folded in with matrix products and combined with the
+    parallel algorithm of
+    :func:`whylogs.core.statistics.datatypes.VarianceTracker.merge`, applied
+    elementwise, so there is no Python level loop over pairs of columns.
+
+    Parameters
+    ----------
+    columns : list
+        Names of the tracked columns
+    count, mean, m2, comoment : np.ndarray, optional
+        Initial statistics.  See above
+    """
+
+    def __init__(
+        self,
+        columns: list,
+        count: np.ndarray = None,
+        mean: np.ndarray = None,
+        m2: np.ndarray = None,
+        comoment: np.ndarray = None,
+    ):
+        d = len(columns)
+        if count is None:
+            count = np.zeros((d, d))
+        if mean is None:
+            mean = np.zeros((d, d))
+        if m2 is None:
+            m2 = np.zeros((d, d))
+        if comoment is None:
+            comoment = np.zeros((d, d))
+        self.columns = [str(c) for c in columns]
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.comoment = comoment
+
+    def update(self, df: pd.DataFrame):
+        """
+        Track a batch of rows.  Columns are matched by their names as
+        strings.  Columns which are missing from `df` are treated as null,
+        and non-numeric values are ignored.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Dataframe containing (some of) the tracked columns
+        """
+        if len(df) == 0:
+            return
+        df = df.set_axis([str(c) for c in df.columns], axis=1)
+        x = _numeric_array(df.reindex(columns=self.columns))
+        valid = ~np.isnan(x)
+        w = valid.astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Center on the column means for numerical stability
+            shift = np.nansum(x, axis=0) / w.sum(axis=0)
+        shift[~np.isfinite(shift)] = 0.0
+        xc = np.where(valid, x - shift, 0.0)
+
+        products = xc.T @ xc
+        if valid.all():
+            # Every pair is complete: only the products need a matrix product
+            n, d = x.shape
+            count = np.full((d, d), float(n))
+            sums = np.repeat(xc.sum(axis=0)[:, None], d, axis=1)
+            squares = np.repeat(np.einsum("ij,ij->j", xc, xc)[:, None], d, axis=1)
+        else:
+            count = w.T @ w
+            # sums[i, j] = sum of column i over the rows where j is also valid
+            sums = xc.T @ w
+            squares = (xc * xc).T @ w
+        with np.errstate(invalid="ignore", divide="ignore"):
+            batch_mean = np.where(count > 0, sums / count, 0.0)
+        batch_m2 = squares - batch_mean * sums
+        batch_comoment = products - batch_mean * sums.T
+        batch_mean += shift[:, None]
+        self._combine(count, batch_mean, batch_m2, batch_comoment)
+
+    def _combine(self, count, mean, m2, comoment):
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(total > 0, count / total, 0.0)
+        delta = mean - self.mean
+        self.m2 = self.m2 + m2 + delta * delta * self.count * ratio
+        self.comoment = self.comoment + comoment + delta * delta.T * self.count * ratio
+        self.mean = self.mean + delta * ratio
+        self.count = total
+
+    def merge(self, other):
+        """
+        Merge another `CovarianceTracker` of the same columns with this one,
+        returning a new object
+
+        Parameters
+        ----------
+        other : CovarianceTracker
+
+        Returns
+        -------
+        merged : CovarianceTracker
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `CovarianceTracker` of the same columns into this one,
+        in place
+
+        Parameters
+        ----------
+        other : CovarianceTracker
+
+        Returns
+        -------
+        self : CovarianceTracker
+        """
+        if self.columns != other.columns:
+            raise ValueError("Cannot merge covariances of different columns")
+        self._combine(other.count, other.mean, other.m2, other.comoment)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        # The matrices are never modified in place, so they can be shared
+        return CovarianceTracker(
+            self.columns, self.count, self.mean, self.m2, self.comoment
+        )
+
+    def covariance(self):
+        """
+        Return the pairwise sample covariance matrix
+
+        Returns
+        -------
+        covariance : pd.DataFrame
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = np.where(self.count > 1, self.comoment / (self.count - 1), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """
+        Return the pairwise Pearson correlation matrix
+
+        Returns
+        -------
+        correlation : pd.DataFrame
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr[self.count < 2] = np.nan
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def correlation_summary(self):
+        """
+        Return the correlation matrix as JSON values, for dataset summaries,
+        which have no field for it.  NaN correlations are None.
+
+        Returns
+        -------
+        summary : dict
+            The column names under ``columns`` and the rows of the
+            correlation matrix under ``correlation``
+        """
+        return {
+            "columns": list(self.columns),
+            "correlation": [
+                [None if np.isnan(v) else v for v in row]
+                for row in self.correlation().values.tolist()
+            ],
+        }
+
+    def serialize(self):
+        """
+        Serialize this object
+
+        Returns
+        -------
+        msg : bytes
+        """
+        columns = json.dumps(self.columns).encode("utf-8")
+        parts = [_HEADER.pack(_SERIAL_VERSION, len(columns)), columns]
+        for matrix in (self.count, self.mean, self.m2, self.comoment):
+            parts.append(matrix.astype("<f8").tobytes())
+        return b"".join(parts)
+
+    @staticmethod
+    def deserialize(msg: bytes):
+        """
+        Deserialize the output of :func:`CovarianceTracker.serialize`
+
+        Returns
+        -------
+        tracker : CovarianceTracker
+        """
+        version, size = _HEADER.unpack_from(msg)
+        if version != _SERIAL_VERSION:
+            raise ValueError("Unsupported serial version: {}".format(version))
+        pos = _HEADER.size
+        columns = json.loads(msg[pos : pos + size].decode("utf-8"))
+        pos += size
+        d = len(columns)
+        matrices = []
+        for _ in range(4):
+            matrix = np.frombuffer(msg, "<f8", d * d, pos).reshape(d, d).copy()
+            matrices.append(matrix)
+            pos += 8 * d * d
+        return CovarianceTracker(columns, *matrices)
+
+
+def _numeric_array(df: pd.DataFrame):
+    """
+    Convert a dataframe to a float array, with NaN for null and non-numeric
+    values
+    """
+    if all(kind in "biuf" for kind in df.dtypes.map(lambda t: t.kind)):
+        return df.to_numpy(dtype=np.float64)
+    return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
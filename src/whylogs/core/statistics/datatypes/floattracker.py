@@ -91,14 +91,37 @@ class FloatTracker:
         merged : FloatTracker
             A new float tracker
         """
-        this_copy = FloatTracker(self.min, self.max, self.sum, self.count)
-        if other.min < this_copy.min:
-            this_copy.min = other.min
-        if other.max > this_copy.max:
-            this_copy.max = other.max
-        this_copy.sum += other.sum
-        this_copy.count += other.count
-        return this_copy
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another tracker into this one, in place
+
+        Parameters
+        ----------
+        other : FloatTracker
+            The other float tracker
+
+        Returns
+        -------
+        self : FloatTracker
+        """
+        if other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+        self.sum += other.sum
+        self.count += other.count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return FloatTracker(self.min, self.max, self.sum, self.count)
 
     def to_protobuf(self):
         """
@@ -80,12 +80,35 @@ class IntTracker:
         new : IntTracker
             New, merged tracker
         """
-        x = IntTracker(self.min, self.max, self.sum, self.count)
-        x.min = min(x.min, other.min)
-        x.max = max(x.max, other.max)
-        x.sum += other.sum
-        x.count += other.count
-        return x
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge values of another IntTracker into this one, in place
+
+        Parameters
+        ----------
+        other : IntTracker
+            Other tracker
+
+        Returns
+        -------
+        self : IntTracker
+        """
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+        self.count += other.count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return IntTracker(self.min, self.max, self.sum, self.count)
 
     def to_protobuf(self):
         """
@@ -1,12 +1,23 @@
-from datasketches import frequent_strings_sketch
+import struct
+
+import numpy as np
+import pandas as pd
+from datasketches import frequent_strings_sketch, kll_floats_sketch
 
 from whylogs.core.statistics.thetasketch import ThetaSketch
-from whylogs.core.summaryconverters import from_string_sketch
-from whylogs.proto import StringsMessage, StringsSummary
+from whylogs.core.summaryconverters import (
+    from_string_sketch,
+    histogram_from_sketch,
+    quantiles_from_sketch,
+)
+from whylogs.proto import NumberSummary, StringsMessage, StringsSummary
 from whylogs.util import dsketch
 
 MAX_ITEMS_SIZE = 32
 MAX_SUMMARY_ITEMS = 100
+# Parameter controlling the accuracy of the length distributions
+DEFAULT_LENGTH_K = 256
+_LENGTH_HEADER = struct.Struct("<I")
 
 
 class StringTracker:
@@ -21,6 +32,10 @@ class StringTracker:
         Sketch for tracking string counts
     theta_sketch : ThetaSketch
         Sketch for approximate cardinality tracking
+    length : kll_floats_sketch
+        Distribution of the string lengths (in characters)
+    token_length : kll_floats_sketch
+        Distribution of the number of whitespace separated tokens per string
     """
 
     def __init__(
@@ -28,6 +43,8 @@ class StringTracker:
         count: int = None,
         items: frequent_strings_sketch = None,
         theta_sketch: ThetaSketch = None,
+        length: kll_floats_sketch = None,
+        token_length: kll_floats_sketch = None,
     ):
         if count is None:
             count = 0
@@ -35,22 +52,88 @@ class StringTracker:
             items = frequent_strings_sketch(MAX_ITEMS_SIZE)
         if theta_sketch is None:
             theta_sketch = ThetaSketch()
+        if length is None:
+            length = kll_floats_sketch(DEFAULT_LENGTH_K)
+        if token_length is None:
+            token_length = kll_floats_sketch(DEFAULT_LENGTH_K)
         self.count = count
         self.items = items
         self.theta_sketch = theta_sketch
+        self.length = length
+        self.token_length = token_length
 
-    def update(self, value: str):
+    def update(self, value: str, sketches: bool = True, lengths: bool = True):
         """
         Add a string to the tracking statistics.
 
         If `value` is `None`, nothing will be done
+
+        Parameters
+        ----------
+        value : str
+            String to track
+        sketches : bool
+            Also update the cardinality and frequent strings sketches.  Set
+            to False when distinct values are being counted elsewhere, see
+            :func:`StringTracker.update_sketches`
+        lengths : bool
+            Also update the length distributions.  Set to False when the
+            lengths are tracked in batch, see
+            :func:`StringTracker.update_lengths`
         """
         if value is None:
             return
 
         self.count += 1
-        self.theta_sketch.update(value)
-        self.items.update(value)
+        if sketches:
+            self.update_sketches(value)
+        if lengths:
+            self.length.update(len(value))
+            self.token_length.update(len(value.split()))
+
+    def update_lengths(self, values):
+        """
+        Update the length distributions with a batch of values.
+
+        The lengths and token counts of all the strings are computed at once
+        with the pandas string methods, and values which are not strings are
+        ignored.
+
+        Parameters
+        ----------
+        values : np.ndarray, list
+            Values to track the lengths of
+        """
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            return
+        strings = pd.Series(values, dtype=object)
+        if pd.api.types.infer_dtype(strings, skipna=True) == "string":
+            strings = strings.dropna()
+        else:
+            strings = strings[[isinstance(v, str) for v in strings]]
+        if len(strings) == 0:
+            return
+        dsketch.update_kll(self.length, strings.str.len().to_numpy())
+        dsketch.update_kll(self.token_length, strings.str.split().str.len().to_numpy())
+
+    def update_sketches(self, value: str, weight: int = 1, theta: bool = True):
+        """
+        Update the cardinality and frequent strings sketches only
+
+        Parameters
+        ----------
+        value : str
+            String to track
+        weight : int
+            Number of times the value appears
+        theta : bool
+            Update the cardinality sketch.  Set to False if the sketch is
+            shared with (and updated by) a column level
+            :class:`whylogs.core.statistics.thetasketch.TypedThetaSketch`
+        """
+        if theta:
+            self.theta_sketch.update(value)
+        self.items.update(value, weight)
 
     def merge(self, other):
         """
@@ -66,12 +149,43 @@ class StringTracker:
         new : StringTracker
             Merged values
         """
-        items_copy = frequent_strings_sketch.deserialize(self.items.serialize())
-        items_copy.merge(other.items)
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge the values of another string tracker into this one, in place.
+        The sketches are merged directly, without copying them.
+
+        Parameters
+        ----------
+        other : StringTracker
+            The other StringTracker
+
+        Returns
+        -------
+        self : StringTracker
+        """
+        self.count += other.count
+        self.items.merge(other.items)
+        self.theta_sketch.merge_into(other.theta_sketch)
+        self.length.merge(other.length)
+        self.token_length.merge(other.token_length)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
 
-        new_theta = self.theta_sketch.merge(other.theta_sketch)
-        count = self.count + other.count
-        return StringTracker(count, items_copy, new_theta)
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return StringTracker(
+            self.count,
+            frequent_strings_sketch.deserialize(self.items.serialize()),
+            self.theta_sketch.copy(),
+            kll_floats_sketch.deserialize(self.length.serialize()),
+            kll_floats_sketch.deserialize(self.token_length.serialize()),
+        )
 
     def to_protobuf(self):
         """
@@ -108,6 +222,52 @@ class StringTracker:
             theta_sketch=theta,
         )
 
+    def serialize_lengths(self):
+        """
+        Serialize the length distributions, which are not part of the
+        protobuf message
+
+        Returns
+        -------
+        msg : bytes
+        """
+        length = self.length.serialize()
+        return _LENGTH_HEADER.pack(len(length)) + length + self.token_length.serialize()
+
+    def deserialize_lengths(self, msg: bytes):
+        """
+        Load the length distributions from the output of
+        :func:`StringTracker.serialize_lengths`
+        """
+        (size,) = _LENGTH_HEADER.unpack_from(msg)
+        start = _LENGTH_HEADER.size
+        self.length = kll_floats_sketch.deserialize(msg[start : start + size])
+        self.token_length = kll_floats_sketch.deserialize(msg[start + size :])
+
+    def length_summary(self):
+        """
+        Summarize the distribution of the string lengths
+
+        Returns
+        -------
+        summary : NumberSummary
+            Count, min, max, histogram and quantiles of the lengths.  None if
+            no lengths have been tracked
+        """
+        return _length_summary(self.length)
+
+    def token_length_summary(self):
+        """
+        Summarize the distribution of the number of tokens per string
+
+        Returns
+        -------
+        summary : NumberSummary
+            Count, min, max, histogram and quantiles of the token counts.
+            None if no lengths have been tracked
+        """
+        return _length_summary(self.token_length)
+
     def to_summary(self):
         """
         Generate a summary of the statistics
@@ -127,3 +287,15 @@ class StringTracker:
                 opts["frequent"] = frequent_strings
 
         return StringsSummary(**opts)
+
+
+def _length_summary(sketch: kll_floats_sketch):
+    if sketch.is_empty():
+        return None
+    return NumberSummary(
+        count=sketch.get_n(),
+        min=sketch.get_min_value(),
+        max=sketch.get_max_value(),
+        histogram=histogram_from_sketch(sketch),
+        quantiles=quantiles_from_sketch(sketch),
+    )
@@ -59,7 +59,23 @@ class VarianceTracker:
 
     def merge(self, other: "VarianceTracker"):
         """
-        Merge statistics from another VarianceTracker into this one
+        Merge statistics from another VarianceTracker with this one
+
+        Parameters
+        ----------
+        other : VarianceTracker
+            Other variance tracker
+
+        Returns
+        -------
+        merged : VarianceTracker
+            A new variance tracker from the merged statistics
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other: "VarianceTracker"):
+        """
+        Merge statistics from another VarianceTracker into this one, in place
 
         See:
         https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Parallel_algorithm
@@ -71,27 +87,28 @@ class VarianceTracker:
 
         Returns
         -------
-        merged : VarianceTracker
-            A new variance tracker from the merged statistics
+        self : VarianceTracker
         """
         if other.count == 0:
-            return self.copy()
+            return self
 
         if self.count == 0:
-            return other.copy()
+            self.count = other.count
+            self.sum = other.sum
+            self.mean = other.mean
+            return self
 
         delta = self.mean - other.mean
         total_count = self.count + other.count
         this_ratio = self.count / total_count
         other_ratio = 1.0 - this_ratio
-        # Create new tracker
-        this_copy = self.copy()
-        this_copy.sum += (
-            other.sum + (delta ** 2) * this_copy.count * other.count / total_count
-        )
-        this_copy.mean = this_copy.mean * this_ratio + other.mean * other_ratio
-        this_copy.count += other.count
-        return this_copy
+        self.sum += other.sum + (delta ** 2) * self.count * other.count / total_count
+        self.mean = self.mean * this_ratio + other.mean * other_ratio
+        self.count = total_count
+        return self
+
+    def __iadd__(self, other: "VarianceTracker"):
+        return self.merge_into(other)
 
     def copy(self):
         """
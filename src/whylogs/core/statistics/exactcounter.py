@@ -0,0 +1,118 @@
+"""
+Exact value counting for low-cardinality columns
+"""
+import numpy as np
+
+#: Default maximum number of distinct values tracked exactly
+DEFAULT_THRESHOLD = 100
+#: Value types which can be counted exactly
+EXACT_TYPES = (str, bool, int, float, np.number, np.bool_)
+
+
+class ExactCounter:
+    """
+    Exact value -> count tracking for low-cardinality data.
+
+    Values are keyed by their type as well as their value so that ``1``,
+    ``1.0`` and ``True`` are counted separately, just as they are by the
+    frequent items sketches.  Null values are ignored.
+
+    Parameters
+    ----------
+    threshold : int, optional
+        Maximum number of distinct values to track before the counter is
+        considered full.  Default = :data:`DEFAULT_THRESHOLD`
+    counts : dict, optional
+        Initial ``(type, value) -> count`` mapping
+    """
+
+    def __init__(self, threshold: int = None, counts: dict = None):
+        if threshold is None:
+            threshold = DEFAULT_THRESHOLD
+        if counts is None:
+            counts = {}
+        self.threshold = threshold
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, value, weight: int = 1):
+        """
+        Count a value.
+
+        Parameters
+        ----------
+        value : object
+            Value to count
+        weight : int
+            Number of times the value appears
+
+        Returns
+        -------
+        tracked : bool
+            False if `value` is of a type which cannot be counted exactly, in
+            which case nothing is recorded.
+        """
+        if not isinstance(value, EXACT_TYPES):
+            return False
+        if value != value:
+            # NaN
+            return True
+        key = (type(value), value)
+        self.counts[key] = self.counts.get(key, 0) + weight
+        return True
+
+    def is_full(self):
+        """
+        Return True if more than `threshold` distinct values have been counted
+        """
+        return len(self.counts) > self.threshold
+
+    def items(self):
+        """
+        Return an iterator over ``(value, count)`` pairs
+        """
+        return ((value, count) for (_, value), count in self.counts.items())
+
+    def merge(self, other):
+        """
+        Merge another counter with this one, returning a new object.
+
+        The merged counter may be full.
+
+        Parameters
+        ----------
+        other : ExactCounter
+
+        Returns
+        -------
+        merged : ExactCounter
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another counter into this one, in place.  The counter may then
+        be full.
+
+        Parameters
+        ----------
+        other : ExactCounter
+
+        Returns
+        -------
+        self : ExactCounter
+        """
+        for key, count in list(other.counts.items()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this counter
+        """
+        return ExactCounter(self.threshold, dict(self.counts))
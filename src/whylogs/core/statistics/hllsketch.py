@@ -1,37 +1,94 @@
-import datetime
-from enum import Enum
-
 import datasketches
-import pandas as pd
 
 from whylogs.proto import HllSketchMessage, UniqueCountSummary
+from whylogs.util.encoding import serialize_item
 
 DEFAULT_LG_K = 12
+# Types which are passed to the sketch directly
+_NATIVE_TYPES = {str, int, float, bool}
+# Types which the sketch does not support, and are serialized instead
+_SERIALIZED_TYPES = set()
 
 
 class HllSketch:
+    """
+    Cardinality tracking with a HyperLogLog sketch.
+
+    Merged sketches are accumulated in a `datasketches.hll_union`, which is
+    only materialized when the sketch is next used, so that merging many
+    sketches into one does not build a union per merge.
+
+    Parameters
+    ----------
+    lg_k : int, optional
+        Log2 of the number of buckets
+    sketch : datasketches.hll_sketch, optional
+        Initial sketch
+    """
+
     def __init__(self, lg_k=None, sketch=None):
         if sketch is None:
             if lg_k is None:
                 lg_k = DEFAULT_LG_K
             sketch = datasketches.hll_sketch(lg_k)
         assert isinstance(sketch, datasketches.hll_sketch)
-        self.sketch = sketch
+        self._sketch = sketch
+        self._union = None
         self.lg_k = lg_k
 
+    @property
+    def sketch(self):
+        """
+        The `datasketches.hll_sketch`, including any merged sketches
+        """
+        if self._union is not None:
+            self._sketch = self._union.get_result()
+            self._union = None
+        return self._sketch
+
+    @sketch.setter
+    def sketch(self, sketch):
+        self._sketch = sketch
+        self._union = None
+
     def update(self, value):
-        try:
-            self.sketch.update(value)
-        except TypeError:
-            value = self._serialize_item(value)
+        value_type = type(value)
+        if value_type in _NATIVE_TYPES:
             self.sketch.update(value)
+        elif value_type in _SERIALIZED_TYPES:
+            self.sketch.update(self._serialize_item(value))
+        else:
+            try:
+                self.sketch.update(value)
+            except TypeError:
+                # Don't try updating the sketch with this type again
+                _SERIALIZED_TYPES.add(value_type)
+                self.sketch.update(self._serialize_item(value))
 
     def merge(self, other):
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `HllSketch` into this one, in place.  Returns this
+        object.
+        """
+        other_sketch = other.sketch
         lg_k = max(self.lg_k, other.lg_k)
-        union = datasketches.hll_union(lg_k)
-        union.update(self.sketch)
-        union.update(other.sketch)
-        return HllSketch(lg_k, union.get_result())
+        if self._union is None or lg_k > self.lg_k:
+            union = datasketches.hll_union(lg_k)
+            union.update(self.sketch)
+            self._union = union
+        self._union.update(other_sketch)
+        self.lg_k = lg_k
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        sketch = datasketches.hll_sketch.deserialize(self.sketch.serialize_compact())
+        return HllSketch(self.lg_k, sketch)
 
     def get_estimate(self):
         return self.sketch.get_estimate()
@@ -46,12 +103,7 @@ class HllSketch:
         return HllSketchMessage(sketch=self.sketch.serialize_compact(), lg_k=self.lg_k)
 
     def _serialize_item(self, x):
-        if isinstance(x, datetime.datetime):
-            return x.isoformat()
-        elif isinstance(x, Enum):
-            return x.value
-        else:
-            return pd.io.json.dumps(x)
+        return serialize_item(x)
 
     def is_empty(self):
         return self.sketch.is_empty()
@@ -73,7 +73,7 @@ class NumberTracker:
     def count(self):
         return self.variance.count
 
-    def track(self, number):
+    def track(self, number, sketches: bool = True):
         """
         Add a number to statistics tracking
 
@@ -81,12 +81,16 @@ class NumberTracker:
         ----------
         number : int, float
             A numeric value
+        sketches : bool
+            Also update the cardinality and frequent numbers sketches.  Set to
+            False when distinct values are being counted elsewhere, see
+            :func:`NumberTracker.update_sketches`
         """
         if pd.isnull(number):
             return
         self.variance.update(number)
-        self.theta_sketch.update(number)
-        self.frequent_numbers.update(number)
+        if sketches:
+            self.update_sketches(number)
         # TODO: histogram update
         # Update floats/ints counting
         f_value = float(number)
@@ -102,22 +106,76 @@ class NumberTracker:
             self.ints.set_defaults()
             self.floats.update(f_value)
 
+    def update_sketches(self, number, weight: int = 1, theta: bool = True):
+        """
+        Update the cardinality and frequent numbers sketches only
+
+        Parameters
+        ----------
+        number : int, float
+            A numeric value
+        weight : int
+            Number of times the value appears
+        theta : bool
+            Update the cardinality sketch.  Set to False if the sketch is
+            shared with (and updated by) a column level
+            :class:`whylogs.core.statistics.thetasketch.TypedThetaSketch`
+        """
+        if theta:
+            self.theta_sketch.update(number)
+        self.frequent_numbers.update(number, weight)
+
     def merge(self, other):
-        # Make a copy of the histogram
-        hist_copy = datasketches.kll_floats_sketch.deserialize(
-            self.histogram.serialize()
-        )
-        hist_copy.merge(other.histogram)
+        """
+        Merge another `NumberTracker` with this one, returning a new object
+
+        Parameters
+        ----------
+        other : NumberTracker
 
-        theta_sketch = self.theta_sketch.merge(other.theta_sketch)
-        frequent_numbers = self.frequent_numbers.merge(other.frequent_numbers)
+        Returns
+        -------
+        merged : NumberTracker
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `NumberTracker` into this one, in place.  The sketches
+        are merged directly, without copying them.
+
+        Parameters
+        ----------
+        other : NumberTracker
+
+        Returns
+        -------
+        self : NumberTracker
+        """
+        self.variance.merge_into(other.variance)
+        self.floats.merge_into(other.floats)
+        self.ints.merge_into(other.ints)
+        self.theta_sketch.merge_into(other.theta_sketch)
+        self.histogram.merge(other.histogram)
+        self.frequent_numbers.merge_into(other.frequent_numbers)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
         return NumberTracker(
-            variance=self.variance.merge(other.variance),
-            floats=self.floats.merge(other.floats),
-            ints=self.ints.merge(other.ints),
-            theta_sketch=theta_sketch,
-            histogram=hist_copy,
-            frequent_numbers=frequent_numbers,
+            variance=self.variance.copy(),
+            floats=self.floats.copy(),
+            ints=self.ints.copy(),
+            theta_sketch=self.theta_sketch.copy(),
+            histogram=datasketches.kll_floats_sketch.deserialize(
+                self.histogram.serialize()
+            ),
+            frequent_numbers=self.frequent_numbers.copy(),
         )
 
     def to_protobuf(self):
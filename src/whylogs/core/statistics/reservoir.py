@@ -0,0 +1,322 @@
+"""
+Bounded-memory reservoir samples of raw column values
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from whylogs.util.encoding import serialize_item
+
+#: Default maximum number of bytes of the sampled values of a reservoir
+DEFAULT_RESERVOIR_MAX_BYTES = 64 * 1024
+_NUMBER_BYTES = 8
+_MIN_LONG = -(2 ** 63)
+_MAX_LONG = 2 ** 63 - 1
+# Skips are computed as floats, which are exact integers below 2 ** 53
+_MAX_SKIP = 2.0 ** 52
+_SERIAL_VERSION = 1
+
+
+class ReservoirSampler:
+    """
+    Keep a uniform random sample of the non-null values of a column, of at
+    most `size` values, with Algorithm L (Li, 1994).
+
+    Instead of drawing a random number for every value, Algorithm L draws the
+    number of values to skip until the next value enters the reservoir.
+    Batches are sampled with NumPy: the positions of all the values which
+    enter the reservoir are generated at once, and only those values are
+    looked at.
+
+    Sampled values are kept as strings or numbers.  Other values are
+    converted with :func:`whylogs.util.encoding.serialize_item`.  Numbers
+    count as 8 bytes and strings as their UTF-8 encoding, which is truncated
+    to ``max_bytes // size`` bytes, so the sampled values never exceed
+    `max_bytes`.
+
+    Parameters
+    ----------
+    size : int
+        Maximum number of sampled values
+    max_bytes : int
+        Maximum total number of bytes of the sampled values
+    count : int
+        Number of values seen
+    items : list, optional
+        Sampled values
+    random_state : int, np.random.Generator, optional
+        Seed or generator of the random numbers.  Default = a generator
+        seeded from the OS
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_bytes: int = DEFAULT_RESERVOIR_MAX_BYTES,
+        count: int = 0,
+        items: list = None,
+        random_state=None,
+    ):
+        if size < 1:
+            raise ValueError("size must be positive")
+        if max_bytes // size < _NUMBER_BYTES:
+            raise ValueError(
+                "max_bytes must allow at least {} bytes per value".format(_NUMBER_BYTES)
+            )
+        if items is None:
+            items = []
+        self.size = size
+        self.max_bytes = max_bytes
+        self.count = count
+        self._rng = np.random.default_rng(random_state)
+        self._item_bytes = max_bytes // size
+        self.items = [self._item(v) for v in items]
+        # Algorithm L state: log of the threshold W, and the index of the next
+        # value to enter the reservoir
+        self._log_w = None
+        self._next = None
+        if len(self.items) >= size:
+            self._reset_threshold()
+
+    @property
+    def nbytes(self):
+        """
+        Total number of bytes of the sampled values
+        """
+        return sum(_item_size(v) for v in self.items)
+
+    def _item(self, value):
+        if isinstance(value, np.generic) and value.dtype.kind in "biuf":
+            value = value.item()
+        if isinstance(value, float) or (
+            isinstance(value, int) and _MIN_LONG <= value <= _MAX_LONG
+        ):
+            return value
+        if not isinstance(value, str):
+            value = str(serialize_item(value))
+        encoded = value.encode("utf-8")
+        if len(encoded) > self._item_bytes:
+            value = encoded[: self._item_bytes].decode("utf-8", "ignore")
+        return value
+
+    def _reset_threshold(self):
+        """
+        Draw the threshold W after `count` values: the largest of the `size`
+        smallest of `count` uniform random keys, which is Beta distributed
+        """
+        w = self._rng.beta(self.size, self.count - self.size + 1)
+        self._log_w = float(np.log(w))
+        self._next = self.count + int(_skips(np.array([self._log_w]), self._rng)[0])
+
+    def add(self, value):
+        """
+        Add a single value.  Null values are ignored.
+        """
+        if value is None or (pd.api.types.is_scalar(value) and pd.isnull(value)):
+            return
+        if len(self.items) < self.size:
+            self.items.append(self._item(value))
+            self.count += 1
+            if len(self.items) == self.size:
+                self._reset_threshold()
+            return
+        if self.count == self._next:
+            self.items[self._rng.integers(self.size)] = self._item(value)
+            self._log_w += np.log(1.0 - self._rng.random()) / self.size
+            self._next += int(_skips(np.array([self._log_w]), self._rng)[0]) + 1
+        self.count += 1
+
+    def update(self, values):
+        """
+        Add a batch of values.  Null values are ignored.
+
+        Parameters
+        ----------
+        values : np.ndarray, list
+            Values to sample
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in "fcmMO":
+            values = values[pd.notnull(values)]
+        n = len(values)
+        if n == 0:
+            return
+        start = self.count
+        fill = min(self.size - len(self.items), n)
+        if fill > 0:
+            self.items.extend(self._item(v) for v in _to_list(values[:fill]))
+            self.count += fill
+            if len(self.items) == self.size:
+                self._reset_threshold()
+        end = start + n
+        if self._next is not None:
+            positions = self._accept_positions(end)
+            slots = self._rng.integers(self.size, size=len(positions))
+            chosen = _to_list(values[positions - start])
+            # Later values overwrite earlier ones in the same slot
+            for slot, value in zip(slots.tolist(), chosen):
+                self.items[slot] = self._item(value)
+        self.count = end
+
+    def _accept_positions(self, end: int):
+        """
+        Return the indices of the values which enter the reservoir, before
+        index `end`, and advance the Algorithm L state past `end`
+        """
+        accepted = []
+        while self._next < end:
+            # Roughly the expected number of values entering the reservoir
+            m = int(self.size * np.log(end / self._next)) + 16
+            log_w = self._log_w + np.cumsum(
+                np.log(1.0 - self._rng.random(m)) / self.size
+            )
+            positions = self._next + np.concatenate(
+                ([0.0], np.cumsum(_skips(log_w, self._rng) + 1))
+            )
+            n_accepted = min(int(np.searchsorted(positions, end)), m)
+            accepted.append(positions[:n_accepted])
+            if n_accepted > 0:
+                self._log_w = float(log_w[n_accepted - 1])
+            self._next = int(positions[n_accepted])
+        if len(accepted) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(accepted).astype(np.int64)
+
+    def merge(self, other):
+        """
+        Merge another `ReservoirSampler` with this one, returning a new object.
+
+        The merged reservoir is a uniform sample of the values seen by both:
+        the number of values taken from each reservoir is drawn from a
+        hypergeometric distribution, weighted by their counts.  The smaller
+        `size` and `max_bytes` are used.
+
+        Parameters
+        ----------
+        other : ReservoirSampler
+
+        Returns
+        -------
+        merged : ReservoirSampler
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `ReservoirSampler` into this one, in place.  See
+        :func:`ReservoirSampler.merge`
+
+        Parameters
+        ----------
+        other : ReservoirSampler
+
+        Returns
+        -------
+        self : ReservoirSampler
+        """
+        size = min(self.size, other.size)
+        count = self.count + other.count
+        n = min(size, count)
+        if other.count == 0:
+            n_self = n
+        elif self.count == 0:
+            n_self = 0
+        else:
+            n_self = int(self._rng.hypergeometric(self.count, other.count, n))
+        items = _choose(self.items, n_self, self._rng) + _choose(
+            other.items, n - n_self, self._rng
+        )
+        self.size = size
+        self.max_bytes = min(self.max_bytes, other.max_bytes)
+        self._item_bytes = self.max_bytes // size
+        self.count = count
+        self.items = [self._item(v) for v in items]
+        self._log_w = None
+        self._next = None
+        if len(self.items) >= size:
+            self._reset_threshold()
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this reservoir, including its random state.  The
+        copy shares the random number generator
+        """
+        reservoir = ReservoirSampler(
+            self.size, self.max_bytes, self.count, random_state=self._rng
+        )
+        reservoir.items = list(self.items)
+        reservoir._log_w = self._log_w
+        reservoir._next = self._next
+        return reservoir
+
+    def serialize(self):
+        """
+        Serialize this object
+
+        Returns
+        -------
+        msg : bytes
+        """
+        return json.dumps(
+            {
+                "version": _SERIAL_VERSION,
+                "size": self.size,
+                "max_bytes": self.max_bytes,
+                "count": self.count,
+                "items": self.items,
+            }
+        ).encode("utf-8")
+
+    @staticmethod
+    def deserialize(msg: bytes, random_state=None):
+        """
+        Deserialize the output of :func:`ReservoirSampler.serialize`.  The
+        random numbers are drawn from `random_state`, see
+        :class:`ReservoirSampler`
+
+        Returns
+        -------
+        reservoir : ReservoirSampler
+        """
+        state = json.loads(msg.decode("utf-8"))
+        if state["version"] != _SERIAL_VERSION:
+            raise ValueError("Unsupported serial version: {}".format(state["version"]))
+        return ReservoirSampler(
+            state["size"],
+            max_bytes=state["max_bytes"],
+            count=state["count"],
+            items=state["items"],
+            random_state=random_state,
+        )
+
+
+def _skips(log_w: np.ndarray, rng: np.random.Generator):
+    """
+    Draw the number of values skipped before the next value enters the
+    reservoir, for thresholds ``exp(log_w)``
+    """
+    u = 1.0 - rng.random(len(log_w))
+    with np.errstate(divide="ignore"):
+        skips = np.floor(np.log(u) / np.log1p(-np.exp(log_w)))
+    return np.minimum(skips, _MAX_SKIP)
+
+
+def _to_list(values: np.ndarray):
+    if values.dtype.kind in "biuf":
+        return values.tolist()
+    return list(values)
+
+
+def _choose(items: list, n: int, rng: np.random.Generator):
+    return [items[i] for i in rng.permutation(len(items))[:n].tolist()]
+
+
+def _item_size(item):
+    if isinstance(item, str):
+        return len(item.encode("utf-8"))
+    return _NUMBER_BYTES
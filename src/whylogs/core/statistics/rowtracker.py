@@ -0,0 +1,274 @@
+"""
+Statistics of whole rows: distinct rows and null patterns
+"""
+import json
+import struct
+
+import datasketches
+import numpy as np
+import pandas as pd
+
+from whylogs.core.statistics.hllsketch import HllSketch
+from whylogs.util.encoding import encode_item
+
+#: Maximum number of distinct null patterns tracked by the frequent items
+#: sketch is ``2 ** NULL_PATTERNS_LG_MAX_K``
+NULL_PATTERNS_LG_MAX_K = 7
+_HEADER = struct.Struct("<BIQII")
+_SERIAL_VERSION = 2
+_CONTAINER_TYPES = (list, dict, set, np.ndarray)
+
+
+class RowTracker:
+    """
+    Track statistics of whole rows, which cannot be derived from the
+    per-column statistics.
+
+    * Distinct rows: every row is hashed with `pd.util.hash_pandas_object`
+      and the hashes are tracked by an HLL sketch, giving an estimate of the
+      number of distinct (and therefore duplicate) rows.
+    * Null patterns: the names of the null columns of every row are counted
+      by a frequent items sketch.  Patterns are stored as JSON lists of the
+      sorted column names, so that they do not depend on the column order
+      and sketches can always be merged as they are.
+
+    Both are computed for a whole batch at once.  Rows are identified by
+    the values of all their columns, regardless of the column order.
+
+    Parameters
+    ----------
+    columns : list, optional
+        Names of the tracked columns, in the order they were first seen
+    count : int
+        Number of rows tracked
+    distinct : HllSketch, optional
+        Sketch of the row hashes
+    null_patterns : datasketches.frequent_strings_sketch, optional
+        Sketch of the null patterns
+    """
+
+    def __init__(
+        self,
+        columns: list = None,
+        count: int = 0,
+        distinct: HllSketch = None,
+        null_patterns: datasketches.frequent_strings_sketch = None,
+    ):
+        if columns is None:
+            columns = []
+        if distinct is None:
+            distinct = HllSketch()
+        if null_patterns is None:
+            null_patterns = datasketches.frequent_strings_sketch(NULL_PATTERNS_LG_MAX_K)
+        self.columns = list(columns)
+        self._known = set(self.columns)
+        self.count = count
+        self.distinct = distinct
+        self.null_patterns = null_patterns
+
+    def update(self, df: pd.DataFrame):
+        """
+        Track the rows of a dataframe
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+        """
+        if len(df) == 0:
+            return
+        names = [str(c) for c in df.columns]
+        self._add_columns(names)
+        frame = df.set_axis(names, axis=1)
+        names = sorted(names)
+        frame = frame[names]
+        self.count += len(frame)
+
+        hashes = _hash_rows(frame)
+        sketch = self.distinct.sketch
+        for h in hashes.view(np.int64).tolist():
+            sketch.update(h)
+
+        # Count the distinct masks bit-packed, and build the keys of the
+        # distinct patterns only
+        packed = np.packbits(frame.isnull().values, axis=1, bitorder="little")
+        patterns, counts = np.unique(packed, axis=0, return_counts=True)
+        bits = np.unpackbits(patterns, axis=1, count=len(names), bitorder="little")
+        for nulls, n in zip(bits.astype(bool), counts.tolist()):
+            key = json.dumps([name for name, null in zip(names, nulls) if null])
+            self.null_patterns.update(key, n)
+
+    def _add_columns(self, names: list):
+        """
+        Append the columns which are not tracked yet
+        """
+        for name in names:
+            if name not in self._known:
+                self._known.add(name)
+                self.columns.append(name)
+
+    @staticmethod
+    def null_columns(pattern: str):
+        """
+        Return the sorted names of the null columns of a null pattern
+        """
+        return json.loads(pattern)
+
+    def distinct_estimate(self):
+        """
+        Estimated number of distinct rows
+        """
+        return min(self.distinct.get_estimate(), self.count)
+
+    def duplicate_rate(self):
+        """
+        Estimated fraction of the rows which duplicate an earlier row
+        """
+        if self.count == 0:
+            return 0.0
+        return 1.0 - self.distinct_estimate() / self.count
+
+    def frequent_null_patterns(self):
+        """
+        Return the most frequent null patterns
+
+        Returns
+        -------
+        patterns : list
+            List of ``(null_columns, estimate)`` tuples, where `null_columns`
+            is a sorted tuple of column names, in descending order of frequency
+        """
+        items = self.null_patterns.get_frequent_items(
+            datasketches.frequent_items_error_type.NO_FALSE_NEGATIVES
+        )
+        return [(tuple(self.null_columns(item[0])), item[1]) for item in items]
+
+    def summary(self):
+        """
+        Return the row statistics as JSON values, for dataset summaries,
+        which have no field for them
+
+        Returns
+        -------
+        summary : dict
+            The row ``count``, ``distinct_estimate`` and ``duplicate_rate``,
+            and the frequent null patterns under ``null_patterns``, as
+            ``[null_columns, estimate]`` pairs
+        """
+        return {
+            "count": self.count,
+            "distinct_estimate": self.distinct_estimate(),
+            "duplicate_rate": self.duplicate_rate(),
+            "null_patterns": [
+                [list(columns), estimate]
+                for columns, estimate in self.frequent_null_patterns()
+            ],
+        }
+
+    def merge(self, other):
+        """
+        Merge another `RowTracker` with this one, returning a new object.
+
+        The columns of the other tracker which this one does not have are
+        appended.  Null patterns do not depend on the column order, so the
+        sketches are merged as they are, whatever the columns.
+
+        Parameters
+        ----------
+        other : RowTracker
+
+        Returns
+        -------
+        merged : RowTracker
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `RowTracker` into this one, in place.  See
+        :func:`RowTracker.merge`
+
+        Parameters
+        ----------
+        other : RowTracker
+
+        Returns
+        -------
+        self : RowTracker
+        """
+        self._add_columns(other.columns)
+        self.count += other.count
+        self.distinct.merge_into(other.distinct)
+        self.null_patterns.merge(other.null_patterns)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return RowTracker(
+            columns=self.columns,
+            count=self.count,
+            distinct=self.distinct.copy(),
+            null_patterns=datasketches.frequent_strings_sketch.deserialize(
+                self.null_patterns.serialize()
+            ),
+        )
+
+    def serialize(self):
+        """
+        Serialize this object
+
+        Returns
+        -------
+        msg : bytes
+        """
+        columns = json.dumps(self.columns).encode("utf-8")
+        distinct = self.distinct.sketch.serialize_compact()
+        header = _HEADER.pack(
+            _SERIAL_VERSION, len(columns), self.count, len(distinct), self.distinct.lg_k
+        )
+        return b"".join([header, columns, distinct, self.null_patterns.serialize()])
+
+    @staticmethod
+    def deserialize(msg: bytes):
+        """
+        Deserialize the output of :func:`RowTracker.serialize`
+
+        Returns
+        -------
+        tracker : RowTracker
+        """
+        version, n_columns, count, n_distinct, lg_k = _HEADER.unpack_from(msg)
+        if version != _SERIAL_VERSION:
+            raise ValueError("Unsupported serial version: {}".format(version))
+        pos = _HEADER.size
+        columns = json.loads(msg[pos : pos + n_columns].decode("utf-8"))
+        pos += n_columns
+        distinct = datasketches.hll_sketch.deserialize(msg[pos : pos + n_distinct])
+        pos += n_distinct
+        return RowTracker(
+            columns=columns,
+            count=count,
+            distinct=HllSketch(lg_k, distinct),
+            null_patterns=datasketches.frequent_strings_sketch.deserialize(msg[pos:]),
+        )
+
+
+def _hash_rows(frame: pd.DataFrame):
+    try:
+        return pd.util.hash_pandas_object(frame, index=False).values
+    except TypeError:
+        # Unhashable values, such as lists, are hashed by their encoding
+        frame = frame.apply(_encode_containers)
+        return pd.util.hash_pandas_object(frame, index=False).values
+
+
+def _encode_containers(series: pd.Series):
+    if series.dtype != object:
+        return series
+    return series.map(
+        lambda v: encode_item(v) if isinstance(v, _CONTAINER_TYPES) else v
+    )
@@ -26,14 +26,14 @@ class SchemaTracker:
             type_counts = {k: v for k, v in type_counts.items()}
         self.type_counts = type_counts
 
-    def track(self, item_type):
+    def track(self, item_type, n: int = 1):
         """
-        Track an item type
+        Track an item type, seen `n` times (default 1)
         """
         try:
-            self.type_counts[item_type] += 1
+            self.type_counts[item_type] += n
         except KeyError:
-            self.type_counts[item_type] = 1
+            self.type_counts[item_type] = n
 
     def get_count(self, item_type):
         """
@@ -118,14 +118,26 @@ class SchemaTracker:
         merged : SchemaTracker
             Merged tracker
         """
-        this_copy = self.copy()
-        all_types = Type.values()
-        for t in all_types:
-            if (t in self.type_counts) or (t in other.type_counts):
-                this_copy.type_counts[t] = this_copy.type_counts.get(
-                    t, 0
-                ) + other.type_counts.get(t, 0)
-        return this_copy
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another schema tracker into this one, in place
+
+        Parameters
+        ----------
+        other : SchemaTracker
+
+        Returns
+        -------
+        self : SchemaTracker
+        """
+        for t, count in list(other.type_counts.items()):
+            self.type_counts[t] = self.type_counts.get(t, 0) + count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
 
     def copy(self):
         """
@@ -1,6 +1,7 @@
 import datasketches
 
 from whylogs.proto import UniqueCountSummary
+from whylogs.util.encoding import serialize_item
 
 
 def _copy_union(union):
@@ -18,20 +19,60 @@ class ThetaSketch:
 
     Currently, datasketches only implements merging for compact (read-only)
     theta sketches.
+
+    The compact result is cached until the sketch is next updated or merged
+    into.  A sketch which only holds a compact sketch (e.g. deserialized
+    from a compact sketch, copied, or merged and not updated since) is kept
+    in compact-only form: the update sketch and union are only allocated if
+    it is modified again.
     """
 
     def __init__(self, theta_sketch=None, union=None, compact_theta=None):
-        if theta_sketch is None:
-            theta_sketch = datasketches.update_theta_sketch()
-        if union is None:
-            union = datasketches.theta_union()
-        else:
-            union = _copy_union(union)
+        self._result = None
+        self._theta_sketch = theta_sketch
+        self._union = None
+        if union is not None:
+            self._union = _copy_union(union)
         if compact_theta is not None:
-            union.update(compact_theta)
+            if theta_sketch is None and union is None:
+                # Compact-only
+                self._result = compact_theta
+                return
+            if self._union is None:
+                self._union = datasketches.theta_union()
+            self._union.update(compact_theta)
+        if self._theta_sketch is None:
+            self._theta_sketch = datasketches.update_theta_sketch()
 
-        self.theta_sketch = theta_sketch
-        self.union = union
+    def _invalidate(self):
+        """
+        Drop the cached result, allocating the update sketch and union of a
+        compact-only sketch
+        """
+        if self._theta_sketch is None:
+            self._union = datasketches.theta_union()
+            self._union.update(self._result)
+            self._theta_sketch = datasketches.update_theta_sketch()
+        self._result = None
+
+    @property
+    def theta_sketch(self):
+        """
+        The update sketch.  Accessing it invalidates the cached result
+        """
+        self._invalidate()
+        return self._theta_sketch
+
+    @property
+    def union(self):
+        """
+        The union of merged sketches.  Accessing it invalidates the cached
+        result
+        """
+        self._invalidate()
+        if self._union is None:
+            self._union = datasketches.theta_union()
+        return self._union
 
     def update(self, value):
         """
@@ -42,7 +83,9 @@ class ThetaSketch:
         value : object
             Value to follow
         """
-        self.theta_sketch.update(value)
+        if self._result is not None:
+            self._invalidate()
+        self._theta_sketch.update(value)
 
     def merge(self, other):
         """
@@ -58,24 +101,59 @@ class ThetaSketch:
         new : ThetaSketch
             New theta sketch with merged statistics
         """
-        new_union = datasketches.theta_union()
-        new_union.update(self.get_result())
-        new_union.update(other.get_result())
-        return ThetaSketch(union=new_union)
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `ThetaSketch` into this one, in place.  The (cached)
+        result of the other sketch is added to the union, without building a
+        new one.
+
+        Parameters
+        ----------
+        other : ThetaSketch
+            Other theta sketch
+
+        Returns
+        -------
+        self : ThetaSketch
+        """
+        result = other.get_result()
+        self.union.update(result)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a compact-only copy of this sketch.  Compact sketches are
+        read-only, so the copy shares the cached result.
+        """
+        return ThetaSketch(compact_theta=self.get_result())
 
     def get_result(self):
         """
-        Generate a theta sketch
+        Generate a theta sketch.  The result is cached until the sketch is
+        modified.
 
         Returns
         -------
         compact_sketch : datasketches.compact_theta_sketch
             Read-only compact theta sketch with full statistics.
         """
+        if self._result is not None:
+            return self._result
         new_union = datasketches.theta_union()
-        new_union.update(self.union.get_result())
-        new_union.update(self.theta_sketch)
-        return new_union.get_result()
+        if self._union is not None:
+            new_union.update(self._union.get_result())
+        new_union.update(self._theta_sketch)
+        self._result = new_union.get_result()
+        if self._theta_sketch.is_empty():
+            # Nothing was tracked directly: keep the compact result only
+            self._theta_sketch = None
+            self._union = None
+        return self._result
 
     def serialize(self):
         """
@@ -140,6 +218,182 @@ class ThetaSketch:
         )
 
 
+class TypedThetaSketch:
+    """
+    Cardinality tracking for mixed data types, partitioned by data type.
+
+    Each (converted) value is hashed into one theta sketch, chosen by its
+    type: numbers, strings, or anything else.  The number and string
+    partitions can be shared with a `NumberTracker` and a `StringTracker`,
+    so that a column only hashes each value once.
+
+    Like the theta sketch of a `StringTracker`, the string partition tracks
+    the raw strings, including those which were converted to another type
+    (e.g. ``"1"`` to ``1``).  Those are also tracked by the `converted`
+    partition, so that the overall cardinality, the union of the partitions
+    less the converted strings, counts each converted value once.
+
+    Parameters
+    ----------
+    numbers : ThetaSketch, optional
+        Sketch for `int` and `float` values (excluding `bool`)
+    strings : ThetaSketch, optional
+        Sketch for raw `str` values
+    other : ThetaSketch, optional
+        Sketch for all other values
+    converted : ThetaSketch, optional
+        Sketch for the raw `str` values which were converted to another type
+    """
+
+    def __init__(
+        self,
+        numbers: ThetaSketch = None,
+        strings: ThetaSketch = None,
+        other: ThetaSketch = None,
+        converted: ThetaSketch = None,
+    ):
+        if numbers is None:
+            numbers = ThetaSketch()
+        if strings is None:
+            strings = ThetaSketch()
+        if other is None:
+            other = ThetaSketch()
+        if converted is None:
+            converted = ThetaSketch()
+        self.numbers = numbers
+        self.strings = strings
+        self.other = other
+        self.converted = converted
+
+    def update(self, value, raw=None):
+        """
+        Update the partition matching the type of `value`
+
+        Parameters
+        ----------
+        value : object
+            Value to follow.  None if `raw` is a string which was converted
+            to a null value
+        raw : object, optional
+            Value which `value` was converted from.  Raw strings are tracked
+            by the string partition, and by the converted partition if
+            `value` is not a string
+        """
+        if isinstance(raw, str):
+            self.strings.update(raw)
+            if isinstance(value, str):
+                return
+            self.converted.update(raw)
+            if value is None:
+                return
+        if isinstance(value, str):
+            self.strings.update(value)
+        elif isinstance(value, (float, int)) and not isinstance(value, bool):
+            self.numbers.update(value)
+        else:
+            try:
+                self.other.update(value)
+            except TypeError:
+                self.other.update(serialize_item(value))
+
+    def merge(self, other):
+        """
+        Merge another `TypedThetaSketch` with this one, returning a new object
+
+        Parameters
+        ----------
+        other : TypedThetaSketch
+
+        Returns
+        -------
+        new : TypedThetaSketch
+            New sketch with merged statistics
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge each partition of another `TypedThetaSketch` into this one, in
+        place
+
+        Parameters
+        ----------
+        other : TypedThetaSketch
+
+        Returns
+        -------
+        self : TypedThetaSketch
+        """
+        self.numbers.merge_into(other.numbers)
+        self.strings.merge_into(other.strings)
+        self.other.merge_into(other.other)
+        self.converted.merge_into(other.converted)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this sketch
+        """
+        return TypedThetaSketch(
+            numbers=self.numbers.copy(),
+            strings=self.strings.copy(),
+            other=self.other.copy(),
+            converted=self.converted.copy(),
+        )
+
+    def get_result(self):
+        """
+        Generate a theta sketch of all converted values, regardless of type
+
+        Returns
+        -------
+        compact_sketch : datasketches.compact_theta_sketch
+            Read-only compact theta sketch with full statistics.
+        """
+        union = datasketches.theta_union()
+        union.update(self.numbers.get_result())
+        union.update(self.other.get_result())
+        union.update(
+            datasketches.theta_a_not_b().compute(
+                self.strings.get_result(), self.converted.get_result()
+            )
+        )
+        return union.get_result()
+
+    def get_estimate(self):
+        return self.get_result().get_estimate()
+
+    def is_empty(self):
+        return self.get_result().is_empty()
+
+    def to_summary(self, num_std_devs=1):
+        """
+        Generate a summary protobuf message for all values.  Returns None if
+        no values have been tracked.
+
+        Parameters
+        ----------
+        num_std_devs : float
+            For estimating bounds
+
+        Returns
+        -------
+        summary : UniqueCountSummary
+            Summary protobuf message
+        """
+        compact_theta = self.get_result()
+        if compact_theta.is_empty():
+            return None
+        return UniqueCountSummary(
+            estimate=compact_theta.get_estimate(),
+            upper=compact_theta.get_upper_bound(num_std_devs),
+            lower=compact_theta.get_lower_bound(num_std_devs),
+        )
+
+
 def numbers_summary(sketch: ThetaSketch, num_std_devs=1):
     """
     Generate a summary protobuf message from a thetasketch based on numeric
@@ -0,0 +1,392 @@
+"""
+Statistics tracking for vector (e.g. embedding) columns
+"""
+import struct
+
+import datasketches
+import numpy as np
+
+from whylogs.core.statistics.datatypes import VarianceTracker
+from whylogs.core.summaryconverters import histogram_from_sketch, quantiles_from_sketch
+from whylogs.proto import ColumnSummary, Counters, NumberSummary
+from whylogs.util import dsketch
+
+# Parameter controlling the accuracy of the norm distribution
+DEFAULT_NORMS_K = 256
+_HEADER = struct.Struct("<BIQQQdd")
+_SERIAL_VERSION = 1
+
+
+def stack_vectors(values):
+    """
+    Stack a sequence of equal length 1D arrays into a 2D float array
+
+    Parameters
+    ----------
+    values : sequence
+        Vectors to stack.  Can also be a 2D array
+
+    Returns
+    -------
+    stacked : np.ndarray
+        Array of shape ``(len(values), dim)``
+    """
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        stacked = values
+    else:
+        stacked = np.stack(values)
+    if stacked.ndim != 2:
+        raise ValueError("Expected 1 dimensional vectors")
+    return stacked.astype(np.float64, copy=False)
+
+
+def is_vector(value):
+    """
+    Return True if `value` is tracked as a vector, i.e. a 1D numpy array
+    """
+    return isinstance(value, np.ndarray) and value.ndim == 1
+
+
+class VectorTracker:
+    """
+    Track statistics of fixed length numeric vectors, such as embeddings.
+
+    Vectors are tracked in batches, stacked into a 2D array, with NumPy:
+    the per-dimension mean and variance are combined with the batch
+    (parallel) Welford algorithm, NaN values are counted per dimension and
+    the distribution of the L2 norms is tracked by a KLL sketch.
+
+    Parameters
+    ----------
+    dim : int, optional
+        Length of the vectors.  Set by the first update if not specified
+    count : int
+        Number of vectors tracked
+    null_count : int
+        Number of null values tracked
+    dim_count : np.ndarray, optional
+        Number of non-NaN values per dimension
+    mean : np.ndarray, optional
+        Mean per dimension
+    m2 : np.ndarray, optional
+        Sum of squared differences from the mean, per dimension
+    norm_variance : VarianceTracker, optional
+        Mean and variance of the norms
+    norms : datasketches.kll_floats_sketch, optional
+        Distribution of the norms of the vectors without NaN values
+    """
+
+    def __init__(
+        self,
+        dim: int = None,
+        count: int = 0,
+        null_count: int = 0,
+        dim_count: np.ndarray = None,
+        mean: np.ndarray = None,
+        m2: np.ndarray = None,
+        norm_variance: VarianceTracker = None,
+        norms: datasketches.kll_floats_sketch = None,
+    ):
+        if norm_variance is None:
+            norm_variance = VarianceTracker()
+        if norms is None:
+            norms = datasketches.kll_floats_sketch(DEFAULT_NORMS_K)
+        self.dim = None
+        self.count = count
+        self.null_count = null_count
+        self.dim_count = dim_count
+        self.mean = mean
+        self.m2 = m2
+        self.norm_variance = norm_variance
+        self.norms = norms
+        if dim is not None:
+            self._init_dim(dim)
+
+    def _init_dim(self, dim: int):
+        self.dim = dim
+        if self.dim_count is None:
+            self.dim_count = np.zeros(dim, dtype=np.int64)
+        if self.mean is None:
+            self.mean = np.zeros(dim)
+        if self.m2 is None:
+            self.m2 = np.zeros(dim)
+
+    def update(self, vectors):
+        """
+        Track a batch of vectors
+
+        Parameters
+        ----------
+        vectors : sequence
+            Equal length 1D arrays, or a 2D array with one vector per row
+        """
+        x = stack_vectors(vectors)
+        n, dim = x.shape
+        if n == 0:
+            return
+        if self.dim is None:
+            self._init_dim(dim)
+        elif dim != self.dim:
+            raise ValueError(
+                "Expected vectors of length {}, got {}".format(self.dim, dim)
+            )
+        self.count += n
+
+        nan = np.isnan(x)
+        has_nan = nan.any()
+        if has_nan:
+            x = np.where(nan, 0.0, x)
+            batch_count = n - nan.sum(axis=0)
+        else:
+            batch_count = np.full(dim, n, dtype=np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            batch_mean = x.sum(axis=0) / batch_count
+        batch_mean[batch_count == 0] = 0.0
+        deviations = x - batch_mean
+        if has_nan:
+            deviations[nan] = 0.0
+        batch_m2 = np.einsum("ij,ij->j", deviations, deviations)
+        self.mean, self.m2 = _combine_moments(
+            self.dim_count, self.mean, self.m2, batch_count, batch_mean, batch_m2
+        )
+        self.dim_count = self.dim_count + batch_count
+
+        norms = np.sqrt(np.einsum("ij,ij->i", x, x))
+        if has_nan:
+            norms = norms[~nan.any(axis=1)]
+        if len(norms) > 0:
+            self.norm_variance = self.norm_variance.merge(
+                VarianceTracker(
+                    count=len(norms),
+                    sum=float(((norms - norms.mean()) ** 2).sum()),
+                    mean=float(norms.mean()),
+                )
+            )
+            dsketch.update_kll(self.norms, norms)
+
+    def increment_null(self, n: int = 1):
+        """
+        Count `n` null values
+        """
+        self.null_count += n
+
+    @property
+    def nan_count(self):
+        """
+        Number of NaN values per dimension
+        """
+        if self.dim is None:
+            return None
+        return self.count - self.dim_count
+
+    @property
+    def variance(self):
+        """
+        Sample variance per dimension
+        """
+        if self.dim is None:
+            return None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.dim_count > 1, self.m2 / (self.dim_count - 1), np.nan)
+
+    def merge(self, other):
+        """
+        Merge another `VectorTracker` with this one, returning a new object
+
+        Parameters
+        ----------
+        other : VectorTracker
+
+        Returns
+        -------
+        merged : VectorTracker
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge another `VectorTracker` into this one, in place
+
+        Parameters
+        ----------
+        other : VectorTracker
+
+        Returns
+        -------
+        self : VectorTracker
+        """
+        if self.dim is not None and other.dim is not None and self.dim != other.dim:
+            raise ValueError(
+                "Cannot merge vectors of length {} and {}".format(self.dim, other.dim)
+            )
+        if self.dim is None:
+            # Arrays are never modified in place, so they can be shared
+            self.dim = other.dim
+            self.dim_count, self.mean, self.m2 = other.dim_count, other.mean, other.m2
+        elif other.dim is not None:
+            self.mean, self.m2 = _combine_moments(
+                self.dim_count,
+                self.mean,
+                self.m2,
+                other.dim_count,
+                other.mean,
+                other.m2,
+            )
+            self.dim_count = self.dim_count + other.dim_count
+        self.count += other.count
+        self.null_count += other.null_count
+        self.norm_variance.merge_into(other.norm_variance)
+        self.norms.merge(other.norms)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
+    def copy(self):
+        """
+        Return a copy of this tracker
+        """
+        return VectorTracker(
+            dim=self.dim,
+            count=self.count,
+            null_count=self.null_count,
+            dim_count=self.dim_count,
+            mean=self.mean,
+            m2=self.m2,
+            norm_variance=self.norm_variance.copy(),
+            norms=datasketches.kll_floats_sketch.deserialize(self.norms.serialize()),
+        )
+
+    def to_summary(self):
+        """
+        Generate a summary of the statistics.  The number summary describes
+        the distribution of the norms of the vectors.
+
+        Returns
+        -------
+        summary : ColumnSummary
+        """
+        counters = Counters(count=self.count + self.null_count)
+        if self.null_count > 0:
+            counters.null_count.value = self.null_count
+        summary = ColumnSummary(counters=counters)
+        if self.norm_variance.count > 0:
+            summary.number_summary.CopyFrom(
+                NumberSummary(
+                    count=self.norm_variance.count,
+                    min=self.norms.get_min_value(),
+                    max=self.norms.get_max_value(),
+                    mean=self.norm_variance.mean,
+                    stddev=self.norm_variance.stddev(),
+                    histogram=histogram_from_sketch(self.norms),
+                    quantiles=quantiles_from_sketch(self.norms),
+                )
+            )
+        return summary
+
+    def dimension_summary(self):
+        """
+        Summarize the per-dimension statistics, which have no field in the
+        `ColumnSummary`.  NaN values (e.g. the variance of dimensions with
+        fewer than 2 values) are None.  Returns None if no vectors were
+        tracked.
+
+        Returns
+        -------
+        summary : dict
+            Lists of the mean, sample variance and number of NaN values of
+            each dimension, under ``mean``, ``variance`` and ``nan_count``
+        """
+        if self.dim is None:
+            return None
+        return {
+            "mean": _float_list(self.mean),
+            "variance": _float_list(self.variance),
+            "nan_count": self.nan_count.tolist(),
+        }
+
+    def serialize(self):
+        """
+        Serialize this object
+
+        Returns
+        -------
+        msg : bytes
+        """
+        dim = 0 if self.dim is None else self.dim
+        header = _HEADER.pack(
+            _SERIAL_VERSION,
+            dim,
+            self.count,
+            self.null_count,
+            self.norm_variance.count,
+            self.norm_variance.sum,
+            self.norm_variance.mean,
+        )
+        parts = [header]
+        if self.dim is not None:
+            parts += [
+                self.dim_count.astype("<i8").tobytes(),
+                self.mean.astype("<f8").tobytes(),
+                self.m2.astype("<f8").tobytes(),
+            ]
+        parts.append(self.norms.serialize())
+        return b"".join(parts)
+
+    @staticmethod
+    def deserialize(msg: bytes):
+        """
+        Deserialize the output of :func:`VectorTracker.serialize`
+
+        Returns
+        -------
+        tracker : VectorTracker
+        """
+        (
+            version,
+            dim,
+            count,
+            null_count,
+            norm_count,
+            norm_sum,
+            norm_mean,
+        ) = _HEADER.unpack_from(msg)
+        if version != _SERIAL_VERSION:
+            raise ValueError("Unsupported serial version: {}".format(version))
+        pos = _HEADER.size
+        arrays = []
+        if dim > 0:
+            for dtype in ("<i8", "<f8", "<f8"):
+                arrays.append(np.frombuffer(msg, dtype, dim, pos).copy())
+                pos += 8 * dim
+        else:
+            dim = None
+            arrays = [None, None, None]
+        dim_count, mean, m2 = arrays
+        return VectorTracker(
+            dim=dim,
+            count=count,
+            null_count=null_count,
+            dim_count=dim_count,
+            mean=mean,
+            m2=m2,
+            norm_variance=VarianceTracker(norm_count, norm_sum, norm_mean),
+            norms=dsketch.deserialize_kll_floats_sketch(msg[pos:]),
+        )
+
+
+def _float_list(values: np.ndarray):
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def _combine_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Combine the per-dimension means and M2 of two batches
+    """
+    count = count_a + count_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio_b = np.where(count > 0, count_b / count, 0.0)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * ratio_b
+    m2 = m2_a + m2_b + delta * delta * count_a * ratio_b
+    return mean, m2
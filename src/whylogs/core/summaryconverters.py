@@ -11,6 +11,7 @@ from datasketches import (
 )
 
 from whylogs.proto import (
+    ColumnSummary,
     FrequentStringsSummary,
     HistogramSummary,
     QuantileSummary,
@@ -144,3 +145,56 @@ def histogram_from_sketch(
         bins=bins,
         n=n,
     )
+
+
+def scale_column_summary(summary: ColumnSummary, sample_rate: float):
+    """
+    Scale the statistics of a column summary generated from a sample of the
+    rows, in place.
+
+    The counters and schema are assumed to be exact.  Counts estimated from
+    the sample (numeric count, histogram counts and frequent item estimates)
+    are scaled by ``1 / sample_rate``.  Unique count estimates are left as
+    they are, since a sample contains at most as many unique values as the
+    full data, but their upper bounds are widened by the number of non-null
+    values which were not sampled.
+
+    Parameters
+    ----------
+    summary : ColumnSummary
+        Summary to scale
+    sample_rate : float
+        Fraction of the rows which were sampled
+    """
+    scale = 1.0 / sample_rate
+    n_unsampled = (summary.counters.count - summary.counters.null_count.value) * (
+        1 - sample_rate
+    )
+
+    def scale_count(x):
+        return int(round(x * scale))
+
+    def widen(unique_count):
+        unique_count.upper += n_unsampled
+
+    if summary.HasField("unique_count"):
+        widen(summary.unique_count)
+    for item in summary.frequent_items.items:
+        item.estimate = scale_count(item.estimate)
+    if summary.HasField("number_summary"):
+        numbers = summary.number_summary
+        numbers.count = scale_count(numbers.count)
+        numbers.histogram.n = scale_count(numbers.histogram.n)
+        numbers.histogram.counts[:] = [scale_count(x) for x in numbers.histogram.counts]
+        for item in list(numbers.frequent_numbers.doubles) + list(
+            numbers.frequent_numbers.longs
+        ):
+            item.estimate = scale_count(item.estimate)
+        if numbers.HasField("unique_count"):
+            widen(numbers.unique_count)
+    if summary.HasField("string_summary"):
+        strings = summary.string_summary
+        for item in strings.frequent.items:
+            item.estimate = scale_count(item.estimate)
+        if strings.HasField("unique_count"):
+            widen(strings.unique_count)
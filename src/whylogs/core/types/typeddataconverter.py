@@ -64,7 +64,7 @@ class TypedDataConverter:
         dtype : TYPES
         """
         dtype = TYPES.UNKNOWN
-        if pd.isnull(typed_data):
+        if pd.api.types.is_scalar(typed_data) and pd.isnull(typed_data):
             dtype = TYPES.NULL
         elif isinstance(typed_data, bool):
             dtype = TYPES.BOOLEAN
@@ -3,6 +3,13 @@ Utility functions for interacting with data
 """
 from collections import OrderedDict
 
+import numpy as np
+import pandas as pd
+
+#: Supported values for the `arrays` argument of :func:`flatten_dataframe`
+ARRAY_MODES = ("keep", "length", "index")
+_MAX_KEYS = np.iinfo(np.int64).max
+
 
 def getter(x, k: str, *args):
     """
@@ -101,6 +108,153 @@ def _remap(x, mapping: dict, y: dict):
             y[mapper] = val
 
 
+def flatten_dataframe(
+    df: pd.DataFrame, max_depth: int = None, arrays: str = "keep", sep: str = "."
+):
+    """
+    Expand columns of nested dicts into columns with dotted names.
+
+    Nested values are extracted column-wise, one level at a time, in the
+    style of `pd.json_normalize`: all the dicts of a column are expanded
+    into a frame at once, and the resulting columns are flattened in turn.
+    Missing keys become NaN.  Columns which mix dicts with other non-null
+    values are left as they are.
+
+    .. code-block:: python
+
+        >>> df = pd.DataFrame({"e": [{"a": {"b": 1}, "c": [1, 2]}]})
+        >>> list(flatten_dataframe(df, arrays="length").columns)
+        ['e.a.b', 'e.c']
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe to flatten
+    max_depth : int, optional
+        Maximum number of nesting levels to expand.  Unlimited by default
+    arrays : str
+        How to handle list values:
+
+        * ``"keep"``: leave lists as they are
+        * ``"length"``: replace lists by their lengths
+        * ``"index"``: expand list items into columns named by their
+          position, e.g. ``e.c.0``, which counts as a nesting level
+    sep : str
+        Separator of the nested names
+
+    Returns
+    -------
+    flat : pd.DataFrame
+        The flattened dataframe.  `df` is returned if nothing is expanded.
+    """
+    if arrays not in ARRAY_MODES:
+        raise ValueError(
+            "Unsupported array handling: {}.  Use one of {}".format(arrays, ARRAY_MODES)
+        )
+    columns = OrderedDict()
+    for col in df.columns:
+        _flatten_column(str(col), df[col].values, 0, max_depth, arrays, sep, columns)
+    if len(columns) == len(df.columns) and all(
+        flat is df[col].values for flat, col in zip(columns.values(), df.columns)
+    ):
+        return df
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _flatten_column(name, values, depth, max_depth, arrays, sep, out):
+    if values.dtype == object and (max_depth is None or depth < max_depth):
+        container = _container_type(values)
+        if container is dict:
+            level = pd.DataFrame([v if isinstance(v, dict) else {} for v in values])
+        elif container is list and arrays == "length":
+            out[name] = np.array(
+                [len(v) if isinstance(v, list) else np.nan for v in values]
+            )
+            return
+        elif container is list and arrays == "index":
+            level = pd.DataFrame([v if isinstance(v, list) else [] for v in values])
+        else:
+            level = None
+        if level is not None and len(level.columns) > 0:
+            for key in level.columns:
+                _flatten_column(
+                    "{}{}{}".format(name, sep, key),
+                    level[key].values,
+                    depth + 1,
+                    max_depth,
+                    arrays,
+                    sep,
+                    out,
+                )
+            return
+    out[name] = values
+
+
+def _container_type(values: np.ndarray):
+    """
+    Return `dict` or `list` if all the non-null values are of that type
+    """
+    container = None
+    for v in values:
+        v_type = type(v)
+        if v is None or (v_type is float and v != v):
+            # Null, or NaN from a missing key
+            continue
+        if v_type is not dict and v_type is not list:
+            return None
+        if container is None:
+            container = v_type
+        elif v_type is not container:
+            return None
+    return container
+
+
+def group_indices(columns: list):
+    """
+    Group the rows of one or more columns by their values, in a single pass.
+
+    The codes of the factorized columns are combined into one integer key
+    per row.  When the number of possible keys would overflow, the partial
+    keys are renumbered first, so any number of columns can be grouped.
+
+    Parameters
+    ----------
+    columns : list
+        Columns of the same length (e.g. `pd.Series` or arrays)
+
+    Returns
+    -------
+    groups : iterator
+        Iterator of ``(values, indices)`` pairs, where `values` is the tuple
+        of the values of the columns in the group (None for null values) and
+        `indices` are the positions of the rows of the group, in order
+    """
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    n_keys = 1
+    factorized = []
+    for values in columns:
+        codes, uniques = pd.factorize(values)
+        # Null values have a code of -1
+        n_codes = len(uniques) + 1
+        if n_keys * n_codes > _MAX_KEYS:
+            key, partial_keys = pd.factorize(key)
+            n_keys = len(partial_keys)
+        key = key * n_codes + (codes + 1)
+        n_keys *= n_codes
+        factorized.append((codes, uniques))
+    order = np.argsort(key, kind="stable")
+    boundaries = np.flatnonzero(np.diff(key[order])) + 1
+    for indices in np.split(order, boundaries):
+        if len(indices) == 0:
+            continue
+        first = indices[0]
+        values = tuple(
+            None if codes[first] < 0 else uniques[codes[first]]
+            for codes, uniques in factorized
+        )
+        yield values, indices
+
+
 def get_valid_filename(s):
     """
     Return the given string converted to a string that can be used for a clean
@@ -1,10 +1,12 @@
 """
 Define functions and classes for interfacing with `datasketches`
 """
-import json
+import itertools
+import struct
 from collections import defaultdict
 
 import datasketches
+import numpy as np
 import pandas as pd
 
 from whylogs.proto import (
@@ -13,6 +15,17 @@ from whylogs.proto import (
     FrequentNumbersSketchMessage,
     FrequentNumbersSummary,
 )
+from whylogs.util.encoding import encode_item
+
+# Constants of the datasketches frequent items sketch and its serialization
+_LOAD_FACTOR = 0.75
+_LG_MIN_MAP_SIZE = 3
+_SERIAL_VERSION = 1
+_FAMILY_ID = 10
+# preamble longs, serial version, family, lg max size, lg cur size, flags
+_FREQUENT_ITEMS_PREAMBLE = struct.Struct("<BBBBBBH")
+_MIN_LONG = -(2 ** 63)
+_MAX_LONG = 2 ** 63 - 1
 
 
 def deserialize_kll_floats_sketch(x: bytes, kind: str = "float"):
@@ -45,6 +58,43 @@ def deserialize_kll_floats_sketch(x: bytes, kind: str = "float"):
     return h
 
 
+def update_kll(sketch, values: np.ndarray):
+    """
+    Update a KLL sketch with an array of values.
+
+    Bindings of `datasketches` whose ``update`` accepts arrays are updated in
+    a single call.  Older bindings only take one value at a time, and are
+    updated from a list of the values.
+
+    Parameters
+    ----------
+    sketch : kll_floats_sketch, kll_ints_sketch
+        Sketch to update
+    values : np.ndarray
+        1D array of values
+    """
+    global _kll_bulk_update
+    if len(values) == 0:
+        return
+    # Single values are not used to detect array support: scalar bindings
+    # convert one element arrays to floats
+    if _kll_bulk_update or (_kll_bulk_update is None and len(values) > 1):
+        try:
+            sketch.update(values)
+            _kll_bulk_update = True
+            return
+        except TypeError:
+            if _kll_bulk_update:
+                raise
+            _kll_bulk_update = False
+    for value in values.tolist():
+        sketch.update(value)
+
+
+# Whether the KLL sketches accept arrays, None until first tried
+_kll_bulk_update = None
+
+
 def deserialize_frequent_strings_sketch(x: bytes):
     """
     Deserialize a frequent strings sketch.  Compatible with WhyLogs-Java
@@ -192,11 +242,26 @@ class FrequentItemsSketch:
         other: FrequentItemsSketch
             The other sketch
         """
-        # We want all our "merge" methods to return a NEW object.
-        # TODO: investigate relaxing this constraint
-        self_copy = self.copy()
-        self_copy.sketch.merge(other.sketch)
-        return self_copy
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge the item counts of another sketch into this one, in place.
+
+        Parameters
+        ----------
+        other: FrequentItemsSketch
+            The other sketch
+
+        Returns
+        -------
+        self : FrequentItemsSketch
+        """
+        self.sketch.merge(other.sketch)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
 
     def copy(self):
         """
@@ -238,7 +303,7 @@ class FrequentItemsSketch:
         weight : int
             Number of times the item appears
         """
-        self.sketch.update(self._encode_item(x), weight)
+        self.sketch.update(encode_item(x), weight)
 
     def to_summary(self, max_items=30, min_count=1):
         """
@@ -293,7 +358,7 @@ class FrequentItemsSketch:
 
     @staticmethod
     def _encode_item(x):
-        return pd.io.json.dumps(x)
+        return encode_item(x)
 
     @staticmethod
     def _decode_item(x):
@@ -312,11 +377,292 @@ class FrequentItemsSketch:
         return FrequentItemsSketch(sketch=sketch)
 
 
-class FrequentNumbersSketch(FrequentItemsSketch):
+class FrequentNumbersSketch:
     """
-    A class to implement frequent number counting
+    A class to implement frequent number counting.
+
+    A native implementation of the `datasketches` frequent items sketch
+    (Misra-Gries with reverse purging) for numbers.  Integers and floats are
+    counted in separate ``dict`` maps, so that ``1`` and ``1.0`` are tracked
+    as different items, and no string encoding is required when tracking
+    values.
+
+    When the number of active items exceeds the capacity of the map, the
+    median count is subtracted from all items, items with non-positive counts
+    are dropped, and the median is added to the maximum error ("offset").  The
+    estimate for an item is ``count + offset`` and its lower and upper bounds
+    are ``count`` and ``count + offset``, as for
+    `datasketches.frequent_strings_sketch`.
+
+    The serialized form is a `datasketches.frequent_strings_sketch` with JSON
+    encoded numbers as items, compatible with previous versions of WhyLogs
+    and with WhyLogs-Java.
+
+    Parameters
+    ----------
+    lg_max_k : int, optional
+        Parameter controlling the size and accuracy of the sketch.  A larger
+        number increases accuracy and the memory requirements for the sketch
+    longs : dict, optional
+        Initial ``int -> count`` mapping
+    doubles : dict, optional
+        Initial ``float -> count`` mapping
+    total_weight : int, optional
+        Total weight of the items tracked so far
+    offset : int, optional
+        Maximum error of the item counts
     """
 
+    DEFAULT_MAX_ITEMS_SIZE = FrequentItemsSketch.DEFAULT_MAX_ITEMS_SIZE
+    DEFAULT_ERROR_TYPE = FrequentItemsSketch.DEFAULT_ERROR_TYPE
+
+    def __init__(
+        self,
+        lg_max_k: int = None,
+        longs: dict = None,
+        doubles: dict = None,
+        total_weight: int = 0,
+        offset: int = 0,
+    ):
+        if longs is None:
+            longs = {}
+        if doubles is None:
+            doubles = {}
+        self.lg_max_k = lg_max_k
+        self.longs = longs
+        self.doubles = doubles
+        self.total_weight = total_weight
+        self.offset = offset
+
+    @property
+    def lg_max_k(self):
+        return self._lg_max_k
+
+    @lg_max_k.setter
+    def lg_max_k(self, lg_max_k):
+        self._lg_max_k = lg_max_k
+        # Maximum number of active items before purging
+        self._capacity = _LOAD_FACTOR * 2 ** self._lg_max_map_size
+
+    @property
+    def _lg_max_map_size(self):
+        if self.lg_max_k is None:
+            return self.DEFAULT_MAX_ITEMS_SIZE
+        return self.lg_max_k
+
+    def _get_map(self, x):
+        """
+        Return the map for counting `x` and the key to count it with
+        """
+        if isinstance(x, (int, np.integer)) and _MIN_LONG <= x <= _MAX_LONG:
+            return self.longs, int(x)
+        return self.doubles, float(x)
+
+    def get_apriori_error(self, lg_max_map_size: int, estimated_total_weight: int):
+        """
+        Return an apriori estimate of the uncertainty for various parameters
+
+        Parameters
+        ----------
+        lg_max_map_size : int
+            The `lg_max_k` value
+        estimated_total_weight
+            Total weight (see :func:`FrequentNumbersSketch.get_total_weight`)
+        Returns
+        -------
+        error : float
+            Approximate uncertainty
+        """
+        return datasketches.frequent_strings_sketch.get_apriori_error(
+            lg_max_map_size, estimated_total_weight
+        )
+
+    def get_epsilon_for_lg_size(self, lg_max_map_size: int):
+        return datasketches.frequent_strings_sketch.get_epsilon_for_lg_size(
+            lg_max_map_size
+        )
+
+    def get_estimate(self, item):
+        return self.get_lower_bound(item) + self.offset
+
+    def get_lower_bound(self, item):
+        counts, key = self._get_map(item)
+        return counts.get(key, 0)
+
+    def get_upper_bound(self, item):
+        return self.get_estimate(item)
+
+    def get_frequent_items(
+        self,
+        err_type: datasketches.frequent_items_error_type = None,
+        threshold: int = 0,
+        decode: bool = True,
+    ):
+        """
+        Retrieve the frequent items.
+
+        Parameters
+        ----------
+        err_type : datasketches.frequent_items_error_type
+            Override default error type
+        threshold : int
+            Minimum count for returned items.  As for `datasketches`, a value
+            of 0 means the maximum error of the sketch.
+        decode : bool (default=True)
+            If False, return the items JSON encoded, as they are serialized
+
+        Returns
+        -------
+        items : list
+            A list of tuples of items: ``[(item, estimate, lower_bound,
+            upper_bound)]``, in descending order by estimate
+        """
+        if err_type is None:
+            err_type = self.DEFAULT_ERROR_TYPE
+        if threshold == 0:
+            threshold = self.offset
+        if err_type == datasketches.frequent_items_error_type.NO_FALSE_POSITIVES:
+            offset = 0
+        else:
+            offset = self.offset
+        items = []
+        for counts in (self.longs, self.doubles):
+            for key, count in counts.items():
+                if count + offset > threshold:
+                    items.append((key, count + self.offset, count, count + self.offset))
+        items.sort(key=lambda x: x[1], reverse=True)
+        if not decode:
+            items = [(_encode_number(x[0]),) + x[1:] for x in items]
+        return items
+
+    def get_num_active_items(self):
+        return len(self.longs) + len(self.doubles)
+
+    def get_serialized_size_bytes(self):
+        return len(self.serialize())
+
+    def get_sketch_epsilon(self):
+        return self.get_epsilon_for_lg_size(self._lg_max_map_size)
+
+    def get_total_weight(self):
+        return self.total_weight
+
+    def is_empty(self):
+        return self.get_num_active_items() == 0
+
+    def update(self, x, weight=1):
+        """
+        Track a number.
+
+        Parameters
+        ----------
+        x : int, float
+            Number to track
+        weight : int
+            Number of times the number appears
+        """
+        if weight <= 0:
+            return
+        self.total_weight += weight
+        # Fast paths for the builtin types
+        if type(x) is float:
+            counts = self.doubles
+        elif type(x) is int and _MIN_LONG <= x <= _MAX_LONG:
+            counts = self.longs
+        else:
+            counts, x = self._get_map(x)
+        if x in counts:
+            counts[x] += weight
+            return
+        counts[x] = weight
+        if len(self.longs) + len(self.doubles) > self._capacity:
+            self._purge()
+
+    def update_array(self, x, weights=None):
+        """
+        Track an array of numbers.
+
+        Equivalent to calling :func:`FrequentNumbersSketch.update` for every
+        element, but each distinct value is only counted once.
+
+        Parameters
+        ----------
+        x : array-like
+            Numbers to track.  Integer arrays are tracked as integers, all
+            other arrays as floats.
+        weights : array-like, optional
+            Number of times each number appears.  Defaults to 1
+        """
+        x = np.asarray(x)
+        if x.size == 0:
+            return
+        if weights is None:
+            values, weights = np.unique(x, return_counts=True)
+        else:
+            values, inverse = np.unique(x, return_inverse=True)
+            weights = np.bincount(inverse, weights=weights).astype(np.int64)
+        if np.issubdtype(x.dtype, np.integer):
+            counts = self.longs
+        else:
+            counts = self.doubles
+            values = values.astype(float)
+        for value, weight in zip(values.tolist(), weights.tolist()):
+            if weight > 0:
+                counts[value] = counts.get(value, 0) + weight
+                self.total_weight += weight
+        while self.get_num_active_items() > self._capacity:
+            self._purge()
+
+    def _purge(self):
+        """
+        Subtract the median count from all items, dropping non-positive counts
+        """
+        counts = np.fromiter(
+            itertools.chain(self.longs.values(), self.doubles.values()), dtype=np.int64,
+        )
+        median = int(np.partition(counts, len(counts) // 2)[len(counts) // 2])
+        self.longs = {k: v - median for k, v in self.longs.items() if v > median}
+        self.doubles = {k: v - median for k, v in self.doubles.items() if v > median}
+        self.offset += median
+
+    def merge(self, other):
+        """
+        Merge the item counts of this sketch with another.
+
+        This object will not be modified.  This operation is commutative.
+
+        Parameters
+        ----------
+        other: FrequentNumbersSketch
+            The other sketch
+        """
+        return self.copy().merge_into(other)
+
+    def merge_into(self, other):
+        """
+        Merge the item counts of another sketch into this one, in place.
+
+        Parameters
+        ----------
+        other: FrequentNumbersSketch
+            The other sketch
+
+        Returns
+        -------
+        self : FrequentNumbersSketch
+        """
+        total_weight = self.total_weight + other.total_weight
+        offset = other.offset
+        for counts in (list(other.longs.items()), list(other.doubles.items())):
+            for key, count in counts:
+                self.update(key, count)
+        self.offset += offset
+        self.total_weight = total_weight
+        return self
+
+    def __iadd__(self, other):
+        return self.merge_into(other)
+
     def copy(self):
         """
         Returns
@@ -324,11 +670,55 @@ class FrequentNumbersSketch(FrequentItemsSketch):
         self_copy : FrequentNumbersSketch
             A copy of this object
         """
-        self_copy = FrequentNumbersSketch.deserialize(self.serialize())
-        if self_copy is None:
-            # Self must be empty
-            self_copy = FrequentNumbersSketch(self.lg_max_k)
-        return self_copy
+        return FrequentNumbersSketch(
+            self.lg_max_k,
+            longs=dict(self.longs),
+            doubles=dict(self.doubles),
+            total_weight=self.total_weight,
+            offset=self.offset,
+        )
+
+    def serialize(self):
+        """
+        Serialize this sketch as a bytes string, in the format of a
+        `datasketches.frequent_strings_sketch` with JSON encoded items.
+
+        See also :func:`FrequentNumbersSketch.deserialize`
+
+        Returns
+        -------
+        data : bytes
+            Serialized object.
+        """
+        lg_max = self._lg_max_map_size
+        if self.is_empty():
+            return _FREQUENT_ITEMS_PREAMBLE.pack(
+                1, _SERIAL_VERSION, _FAMILY_ID, lg_max, _LG_MIN_MAP_SIZE, 1, 0
+            )
+        # Distinct numbers may have the same encoding
+        items = defaultdict(int)
+        for counts in (self.longs, self.doubles):
+            for key, count in counts.items():
+                items[_encode_number(key).encode("utf-8")] += count
+        lg_cur = _LG_MIN_MAP_SIZE
+        while len(items) > _LOAD_FACTOR * 2 ** lg_cur and lg_cur < lg_max:
+            lg_cur += 1
+        parts = [
+            _FREQUENT_ITEMS_PREAMBLE.pack(
+                4, _SERIAL_VERSION, _FAMILY_ID, lg_max, lg_cur, 0, 0
+            ),
+            struct.pack("<IIQQ", len(items), 0, self.total_weight, self.offset),
+            struct.pack("<{}Q".format(len(items)), *items.values()),
+        ]
+        for item in items:
+            parts.append(struct.pack("<I", len(item)))
+            parts.append(item)
+        return b"".join(parts)
+
+    def to_string(self, print_items=False):
+        return datasketches.frequent_strings_sketch.deserialize(
+            self.serialize()
+        ).to_string(print_items)
 
     def to_summary(self, max_items=30, min_count=1):
         """
@@ -369,9 +759,7 @@ class FrequentNumbersSketch(FrequentItemsSketch):
         lg_max_k = self.lg_max_k
         if lg_max_k is None:
             lg_max_k = -1
-        return FrequentNumbersSketchMessage(
-            sketch=self.sketch.serialize(), lg_max_k=lg_max_k,
-        )
+        return FrequentNumbersSketchMessage(sketch=self.serialize(), lg_max_k=lg_max_k,)
 
     @staticmethod
     def from_protobuf(message: FrequentNumbersSketchMessage):
@@ -385,14 +773,34 @@ class FrequentNumbersSketch(FrequentItemsSketch):
     @staticmethod
     def deserialize(x: bytes):
         """
-        Deserialize a frequent numbers sketch.
+        Deserialize a frequent numbers sketch, serialized as a
+        `datasketches.frequent_strings_sketch` with JSON encoded items.
 
-        If x is an empty sketch, None is returned
+        If x is an empty sketch, an empty sketch is returned
         """
         if len(x) <= 8:
             return FrequentNumbersSketch()
-        sketch = datasketches.frequent_strings_sketch.deserialize(x)
-        return FrequentNumbersSketch(sketch=sketch)
+        preamble = _FREQUENT_ITEMS_PREAMBLE.unpack_from(x)
+        lg_max_k = preamble[3]
+        offset = _FREQUENT_ITEMS_PREAMBLE.size
+        num_items, _, total_weight, max_error = struct.unpack_from("<IIQQ", x, offset)
+        offset += 24
+        weights = struct.unpack_from("<{}Q".format(num_items), x, offset)
+        offset += 8 * num_items
+        sketch = FrequentNumbersSketch(
+            lg_max_k, total_weight=total_weight, offset=max_error
+        )
+        for weight in weights:
+            (n,) = struct.unpack_from("<I", x, offset)
+            offset += 4
+            value = _decode_number(x[offset : offset + n].decode("utf-8"))
+            offset += n
+            if value is None:
+                # Non-finite floats are encoded as null
+                value = float("nan")
+            counts, key = sketch._get_map(value)
+            counts[key] = counts.get(key, 0) + weight
+        return sketch
 
     @staticmethod
     def flatten_summary(summary: FrequentItemsSummary):
@@ -406,10 +814,12 @@ class FrequentNumbersSketch(FrequentItemsSketch):
                 counts["count"].append(msg.estimate)
         return counts
 
-    @staticmethod
-    def _encode_number(x):
-        return json.dumps(x)
 
-    @staticmethod
-    def _decode_number(x):
-        return json.loads(x)
+def _encode_number(x):
+    # Use the same encoding as FrequentItemsSketch, for compatibility with
+    # sketches serialized by previous versions
+    return FrequentItemsSketch._encode_item(x)
+
+
+def _decode_number(x):
+    return FrequentItemsSketch._decode_item(x)
@@ -0,0 +1,74 @@
+"""
+Fast, memoized JSON encoding of tracked items.
+
+Sketches which only support strings track other values by their JSON
+encoding.  The encodings must not change, since they are part of serialized
+sketches, so :func:`encode_item` returns exactly what `pd.io.json.dumps`
+returns.
+"""
+import datetime
+import functools
+from enum import Enum
+
+import pandas as pd
+
+#: Maximum number of cached encodings of strings and complex values
+ENCODING_CACHE_SIZE = 4096
+
+_MIN_LONG = -(2 ** 63)
+_MAX_LONG = 2 ** 63 - 1
+_dumps = pd.io.json.dumps
+# Containers which can be equal with different encodings, e.g. (1, 2) and
+# (1.0, 2.0)
+_UNCACHED_TYPES = {tuple, frozenset}
+
+
+def encode_item(x):
+    """
+    Encode an item as JSON, identically to `pd.io.json.dumps`.
+
+    Integers are formatted directly and floats are passed straight to the
+    encoder.  Strings and other hashable values are memoized in an LRU cache,
+    since tracked values tend to repeat.
+
+    Parameters
+    ----------
+    x : object
+        Item to encode
+
+    Returns
+    -------
+    encoded : str
+        JSON encoding of `x`
+    """
+    x_type = type(x)
+    if x_type is int:
+        if _MIN_LONG <= x <= _MAX_LONG:
+            return str(x)
+    elif x_type is float or x_type in _UNCACHED_TYPES:
+        return _dumps(x)
+    try:
+        return _cached_dumps(x)
+    except TypeError:
+        # Unhashable
+        return _dumps(x)
+
+
+def serialize_item(x):
+    """
+    Serialize an item for a sketch which does not support its type.
+
+    Datetimes are formatted as ISO 8601 strings, enums are serialized as
+    their values and everything else is encoded with :func:`encode_item`.
+    """
+    if isinstance(x, datetime.datetime):
+        return x.isoformat()
+    elif isinstance(x, Enum):
+        return x.value
+    else:
+        return encode_item(x)
+
+
+@functools.lru_cache(maxsize=ENCODING_CACHE_SIZE, typed=True)
+def _cached_dumps(x):
+    return _dumps(x)
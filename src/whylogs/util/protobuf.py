@@ -2,11 +2,15 @@
 Functions for interacting with protobuf
 """
 import google.protobuf.message
+from google.protobuf.internal.decoder import _DecodeVarint
 from google.protobuf.json_format import MessageToDict, MessageToJson
 from google.protobuf.pyext._message import MessageMapContainer
 
 from whylogs.util import varint
 
+#: Default number of bytes read at once from multi-message files
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
 
 def message_to_json(x, **kwargs):
     """
@@ -36,36 +40,98 @@ def message_to_json(x: google.protobuf.message):
     return MessageToJson(x, including_default_value_fields=True)
 
 
-def _varint_delim_reader(fp):
-    msg_bytes = varint.decode_stream(fp)
-    while msg_bytes is not None:
-        if msg_bytes <= 0:
-            raise RuntimeError("Invalid message size: {}".format(msg_bytes))
-        msg_raw = fp.read(msg_bytes)
-        yield msg_raw
-        msg_bytes = varint.decode_stream(fp)
+class _DelimitedBuffer:
+    """
+    Split blocks of varint delimited data into messages.
 
+    Length prefixes and messages can span blocks: the incomplete end of a
+    block is kept and prepended to the next one.  The buffer does no I/O, so
+    it is shared by the sync and async readers.
+    """
 
-def _varint_delim_iterator(f):
+    def __init__(self):
+        self._rest = b""
+        # Number of bytes missing to complete the next message, if known
+        self.missing = 0
+
+    def split(self, block: bytes):
+        """
+        Return the messages completed by a block, as a list of `bytes`
+        """
+        data = self._rest + block if self._rest else block
+        end = len(data)
+        msgs = []
+        pos = 0
+        self.missing = 0
+        while pos < end:
+            msg_bytes = data[pos]
+            if msg_bytes < 0x80:
+                # Single byte prefix, the common case for small messages
+                start = pos + 1
+            else:
+                try:
+                    msg_bytes, start = _DecodeVarint(data, pos)
+                except IndexError:
+                    # The length prefix continues in the next block
+                    break
+            if msg_bytes <= 0:
+                raise RuntimeError("Invalid message size: {}".format(msg_bytes))
+            stop = start + msg_bytes
+            if stop > end:
+                self.missing = stop - end
+                break
+            msgs.append(data[start:stop])
+            pos = stop
+        self._rest = data[pos:]
+        return msgs
+
+    def close(self):
+        """
+        Check that the data ended with a complete message
+        """
+        if self._rest:
+            raise RuntimeError("Truncated message at the end of the data")
+
+    def read_size(self, block_size: int):
+        """
+        Number of bytes to read next: a block, or the rest of the next
+        message if it is larger
+        """
+        return max(block_size, self.missing)
+
+
+def _varint_delim_reader(fp, block_size: int = DEFAULT_BLOCK_SIZE):
+    buffer = _DelimitedBuffer()
+    while True:
+        block = fp.read(buffer.read_size(block_size))
+        if not block:
+            break
+        yield from buffer.split(bytes(block))
+    buffer.close()
+
+
+def _varint_delim_iterator(f, block_size: int = DEFAULT_BLOCK_SIZE):
     """
     Return an iterator to read delimited protobuf messages.  The iterator will
     return protobuf messages one by one as raw `bytes` objects.
     """
     if isinstance(f, str):
         with open(f, "rb") as fp:
-            for msg in _varint_delim_reader(fp):
-                yield msg
+            yield from _varint_delim_reader(fp, block_size)
     else:
-        for msg in _varint_delim_reader(f):
-            yield msg
+        yield from _varint_delim_reader(f, block_size)
 
 
-def multi_msg_reader(f, msg_class):
+def multi_msg_reader(f, msg_class, block_size: int = DEFAULT_BLOCK_SIZE):
     """
     Return an iterator to iterate through protobuf messages in a multi-message
     protobuf file.
 
-    See also: `write_multi_msg()`
+    The file is read in blocks of `block_size` bytes, which are split into
+    messages in memory, so that file objects with costly reads (e.g. remote
+    files opened with `fsspec`) are only read once per block.
+
+    See also: `write_multi_msg()`, `async_multi_msg_reader()`
 
     Parameters
     ----------
@@ -74,16 +140,45 @@ def multi_msg_reader(f, msg_class):
     msg_class : class
         The Protobuf message class, gets instantiated with a call to
         `msg_class()`
+    block_size : int
+        Number of bytes read at once.  Larger messages are read whole
 
     Returns
     -------
     msg_iterator
         Iterator which returns protobuf messages
     """
-    for raw_msg in _varint_delim_iterator(f):
-        msg = msg_class()
-        msg = msg.FromString(raw_msg)
-        yield msg
+    for raw_msg in _varint_delim_iterator(f, block_size):
+        yield msg_class.FromString(raw_msg)
+
+
+async def async_multi_msg_reader(f, msg_class, block_size: int = DEFAULT_BLOCK_SIZE):
+    """
+    Asynchronous version of :func:`multi_msg_reader`, for file objects with
+    a coroutine ``read(size)`` method, such as the files of `aiofiles`.
+
+    Parameters
+    ----------
+    f : file-object
+        Open asynchronous file object to read from
+    msg_class : class
+        The Protobuf message class
+    block_size : int
+        Number of bytes read at once.  Larger messages are read whole
+
+    Returns
+    -------
+    msg_iterator
+        Asynchronous iterator which returns protobuf messages
+    """
+    buffer = _DelimitedBuffer()
+    while True:
+        block = await f.read(buffer.read_size(block_size))
+        if not block:
+            break
+        for raw_msg in buffer.split(bytes(block)):
+            yield msg_class.FromString(raw_msg)
+    buffer.close()
 
 
 def read_multi_msg(f, msg_class):
@@ -24,6 +24,35 @@ def test_write_template_path():
     assert writer.file_name(dp, ".txt") == "dataset-profile-name.txt"
 
 
+def test_write_template_segment():
+    writer_config = WriterConfig("local", ["protobuf"], "output", "$name/$segment")
+    writer = writer_from_config(writer_config)
+    dp = DatasetProfile("name")
+    assert writer.path_suffix(dp) == "name/all"
+    segment = dp.track_dataframe(
+        pd.DataFrame({"a b": ["x/y"], "c": [1]}), segment_by=["a b", "c"]
+    )
+    (segment_profile,) = segment.values()
+    assert writer.path_suffix(segment_profile) == "name/a_b=x-y,c=1"
+
+
+def test_log_dataframe_segments(tmpdir):
+    p = tmpdir.mkdir("whylogs")
+    writer_config = WriterConfig(
+        "local", ["protobuf"], p.realpath(), "$name/$segment", "profile"
+    )
+    session_config = SessionConfig("project", "pipeline", writers=[writer_config])
+    session = session_from_config(session_config)
+    df = pd.DataFrame({"state": ["CA", "WA", "CA"], "amount": [1.0, 2.0, 3.0]})
+    with session.logger("segmented") as logger:
+        logger.log_dataframe(df, segment_by=["state"])
+    session.close()
+    assert sorted(os.listdir(os.path.join(p, "segmented"))) == [
+        "state=CA",
+        "state=WA",
+    ]
+
+
 def test_config_api(tmpdir):
     p = tmpdir.mkdir("whylogs")
 
@@ -0,0 +1,140 @@
+import datetime
+import os
+
+import pytest
+
+from whylogs.app.rollup import (
+    ROLLED_UP_SUFFIX,
+    expand_paths,
+    rollup,
+    rollup_files,
+)
+from whylogs.core import DatasetProfile
+
+
+def _profile(name, minute, values):
+    timestamp = datetime.datetime(
+        2020, 8, 1, 10, tzinfo=datetime.timezone.utc
+    ) + datetime.timedelta(minutes=minute)
+    profile = DatasetProfile(
+        name, data_timestamp=timestamp, session_timestamp=timestamp
+    )
+    for value in values:
+        profile.track("x", value)
+    return profile
+
+
+def _write(directory, profile, filename):
+    path = os.path.join(directory, filename)
+    with open(path, "wb") as f:
+        f.write(profile.to_protobuf().SerializeToString())
+    return path
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return DatasetProfile.from_protobuf_string(f.read())
+
+
+def _count(profile):
+    return profile.columns["x"].number_tracker.count
+
+
+def test_rollup():
+    profiles = [
+        _profile("a", 1, [1, 2]),
+        _profile("a", 59, [3]),
+        _profile("a", 61, [4]),
+        _profile("b", 2, [5]),
+    ]
+    rollups = rollup(profiles, "hour")
+    assert len(rollups) == 3
+    hour = datetime.datetime(2020, 8, 1, 10, tzinfo=datetime.timezone.utc)
+    (a,) = [p for p in rollups.values() if p.name == "a" and p.data_timestamp == hour]
+    assert _count(a) == 3
+    assert a.session_timestamp == hour
+
+    (day,) = rollup(profiles[:3], "day").values()
+    assert _count(day) == 4
+
+    with pytest.raises(ValueError):
+        rollup(profiles, "week")
+
+
+def test_rollup_different_sample_rates(tmpdir):
+    profiles = []
+    for minute, sample_rate in ((1, 0.5), (2, 0.25), (3, None)):
+        profile = _profile("a", minute, [])
+        profile.sample_rate = sample_rate
+        for value in range(8):
+            profile.track("x", value)
+        profiles.append(profile)
+
+    (rolled_up,) = rollup(profiles, "hour").values()
+    assert rolled_up.sample_rate == pytest.approx((0.5 + 0.25 + 1) / 3)
+    assert rolled_up.columns["x"].counters.count == 24
+
+    inputs = tmpdir.mkdir("minutes")
+    for i, profile in enumerate(profiles):
+        _write(inputs, profile, "{}.bin".format(i))
+    (output,) = rollup_files(expand_paths([str(inputs)]), str(tmpdir.join("hours")))
+    assert _read(output).sample_rate == pytest.approx(rolled_up.sample_rate)
+
+
+def test_rollup_files(tmpdir):
+    inputs = tmpdir.mkdir("minutes")
+    output_dir = str(tmpdir.join("hours"))
+    for minute in range(4):
+        for name in ("a", "b"):
+            profile = _profile(name, minute * 30, [minute, minute + 1])
+            _write(inputs, profile, "{}-{}.bin".format(minute, name))
+
+    # Only one group in memory: outputs are written and merged again
+    outputs = rollup_files(expand_paths([str(inputs)]), output_dir, max_groups=1)
+    assert len(outputs) == 4
+    assert sorted(_count(_read(p)) for p in outputs) == [4, 4, 4, 4]
+    assert {_read(p).name for p in outputs} == {"a", "b"}
+
+    # Rolled up inputs are skipped, new ones are merged
+    _write(inputs, _profile("a", 15, [10]), "a-new.bin")
+    outputs = rollup_files(
+        expand_paths([str(inputs.join("*.bin"))]), output_dir, on_complete="mark"
+    )
+    assert len(outputs) == 1
+    assert _count(_read(outputs[0])) == 5
+    assert os.path.exists(str(inputs.join("a-new.bin" + ROLLED_UP_SUFFIX)))
+    assert expand_paths([str(inputs)]) == sorted(
+        str(p) for p in inputs.listdir() if not p.basename.startswith("a-new")
+    )
+    assert rollup_files(expand_paths([str(inputs)]), output_dir) == []
+
+
+def test_rollup_files_resumes_pending_inputs(tmpdir, monkeypatch):
+    import whylogs.app.rollup as rollup_module
+
+    inputs = tmpdir.mkdir("minutes")
+    output_dir = str(tmpdir.join("hours"))
+    _write(inputs, _profile("a", 1, [1, 2]), "1.bin")
+    _write(inputs, _profile("a", 2, [3]), "2.bin")
+
+    # Interrupted between writing the output and deleting its inputs
+    complete = rollup_module._complete
+    monkeypatch.setattr(rollup_module, "_complete", lambda action, paths: None)
+    (output,) = rollup_files(
+        expand_paths([str(inputs)]), output_dir, on_complete="delete"
+    )
+    assert len(inputs.listdir()) == 2
+    monkeypatch.setattr(rollup_module, "_complete", complete)
+
+    assert rollup_files(expand_paths([str(inputs)]), output_dir) == []
+    assert inputs.listdir() == []
+    assert _count(_read(output)) == 3
+
+    # Once completed, inputs are no longer recorded
+    _write(inputs, _profile("a", 3, [4]), "3.bin")
+    assert rollup_files(expand_paths([str(inputs)]), output_dir) == [output]
+    profile = _read(output)
+    assert _count(profile) == 4
+    assert profile.metadata == {}
+    recorded = [os.path.join("..", "minutes", "3.bin")]
+    assert profile.extensions["rollup"] == {"inputs": recorded}
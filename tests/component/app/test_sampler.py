@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from whylogs.app.logger import Logger
+from whylogs.app.sampler import AdaptiveSampler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rows_per_second_budget():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(max_rows_per_second=100, window=1.0, clock=clock)
+    assert sampler.rate == 1.0
+    sampler.record(500, 500, 0.0)
+    clock.now = 0.5
+    sampler.record(500, 500, 0.0)
+    assert sampler.rate == 1.0
+    clock.now = 1.0
+    sampler.record(1000, 1000, 0.0)
+    # 2000 rows per second
+    assert sampler.rate == pytest.approx(0.05)
+    assert sampler.effective_rate == 1.0
+    assert sampler.shed_rows == 0
+
+    clock.now = 2.0
+    sampler.record(1000, 50, 0.0)
+    assert sampler.rate == pytest.approx(0.1)
+    assert sampler.shed_rows == 950
+    assert sampler.effective_rate == pytest.approx(2050 / 3000)
+
+
+def test_cpu_budget():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(max_cpu_fraction=0.1, min_rate=0.01, clock=clock)
+    clock.now = 1.0
+    sampler.record(1000, 1000, 0.5)
+    assert sampler.rate == pytest.approx(0.2)
+    clock.now = 2.0
+    sampler.record(1000, 200, 0.5)
+    assert sampler.rate == pytest.approx(0.04)
+    clock.now = 3.0
+    sampler.record(1000, 40, 0.01)
+    assert sampler.rate == pytest.approx(0.4)
+    clock.now = 4.0
+    sampler.record(1000, 400, 100.0)
+    assert sampler.rate == 0.01
+
+
+def test_logger_with_sampler():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(max_rows_per_second=10, clock=clock)
+    logger = Logger("test", writers=[], sampler=sampler)
+    df = pd.DataFrame({"x": np.arange(100) + 0.5})
+    clock.now = 1.0
+    logger.log_dataframe(df)
+    assert sampler.rate == pytest.approx(0.1)
+
+    threads = [
+        threading.Thread(target=logger.log_dataframe, args=(df,)) for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    profile = logger._profile
+    column = profile.columns["x"]
+    assert column.counters.count == 500
+    assert logger.shed_rows == 500 - column.number_tracker.count
+    assert profile.sample_rate == pytest.approx(column.number_tracker.count / 500)
+    assert 0 < logger.shed_rows < 400
+
+    # A logger sharing the sampler only counts its own rows
+    other = Logger("other", writers=[], sampler=sampler)
+    other.log_dataframe(df)
+    sampled = other._profile.columns["x"].number_tracker.count
+    assert other.shed_rows == 100 - sampled
+    assert other._profile.sample_rate == pytest.approx(sampled / 100)
+    assert profile.columns["x"].counters.count == 500
+
+
+def test_logger_with_sampler_and_segments():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(max_rows_per_second=10, clock=clock)
+    logger = Logger("test", writers=[], sampler=sampler)
+    df = pd.DataFrame({"x": np.arange(100) + 0.5, "s": ["a", "b"] * 50})
+    clock.now = 1.0
+    logger.log_dataframe(df)
+    logger.log_dataframe(df)
+    profile = logger._profile
+    sample_rate = profile.sample_rate
+    assert sample_rate < 1
+
+    logger.log_dataframe(df, segment_by=["s"])
+    logger.log_dataframe(df, segment_by=["s"])
+    assert profile.sample_rate == sample_rate
+    assert logger.shed_rows == 200 - profile.columns["x"].number_tracker.count
+    for segment in profile.segments.values():
+        assert segment.sample_rate is None
+        assert segment.columns["x"].number_tracker.count == 100
+
+
+def test_sampler_requires_budget():
+    with pytest.raises(ValueError):
+        AdaptiveSampler()
+    with pytest.raises(ValueError):
+        Logger("test", writers=[], sample_rate=0.5, sampler=AdaptiveSampler(10))
@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+
+from whylogs.app.config import SessionConfig, WriterConfig
+from whylogs.app.session import session_from_config
+from whylogs.util import time
+
+
+def _bucket(t):
+    return pd.Timestamp(t, tz="UTC").to_pydatetime()
+
+
+def test_log_dataframe_time_buckets(tmpdir):
+    p = tmpdir.mkdir("whylogs")
+    writer_config = WriterConfig(
+        "local", ["protobuf"], p.realpath(), "$name/$dataset_timestamp", "$session_id"
+    )
+    session_config = SessionConfig("project", "pipeline", writers=[writer_config])
+    session = session_from_config(session_config)
+    df = pd.DataFrame(
+        {
+            "time": ["2020-08-01 10:15", "2020-08-01 11:20", "2020-08-01 10:59", None,],
+            "x": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    session.log_dataframe(df, "events", datetime_column="time")
+    # The 10:00 bucket is closed by the rows of the 11:00 bucket
+    assert set(session._bucket_loggers) == {
+        ("events", _bucket("2020-08-01 11:00")),
+        ("events", None),
+    }
+    eleven = session._bucket_loggers[("events", _bucket("2020-08-01 11:00"))]
+    session.log_dataframe(df.iloc[1:2], "events", datetime_column="time")
+    assert eleven._profile.columns["x"].number_tracker.count == 2
+    # Late rows go to a new logger, which is closed right away
+    session.log_dataframe(df.iloc[:1], "events", datetime_column="time")
+    assert len(session._bucket_loggers) == 2
+    # The loggers of Session.logger are separate
+    assert session.logger("events") is not eleven
+    session.close()
+    assert not eleven.is_active()
+
+    buckets = {
+        str(time.to_utc_ms(pd.Timestamp(t, tz="UTC"))): n
+        for t, n in (("2020-08-01 10:00", 2), ("2020-08-01 11:00", 1))
+    }
+    # Rows without a timestamp, and the logger of Session.logger
+    buckets["batch"] = 2
+    events = os.path.join(p, "events")
+    assert sorted(os.listdir(events)) == sorted(buckets)
+    for bucket, n in buckets.items():
+        assert len(os.listdir(os.path.join(events, bucket, "protobuf"))) == n
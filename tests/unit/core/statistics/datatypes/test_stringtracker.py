@@ -1,3 +1,4 @@
+import numpy as np
 import datasketches
 
 from whylogs.core.statistics.datatypes import StringTracker
@@ -75,3 +76,47 @@ def test_summary():
         actual_items.reset_index(drop=True).sort_index(axis=1),
         expected_items.reset_index(drop=True).sort_index(axis=1),
     )
+
+
+def test_lengths_batch_matches_single_values():
+    data = ["one", "two words", "", "  three   words here ", None, 5]
+    single = StringTracker()
+    for record in data:
+        if isinstance(record, str):
+            single.update(record)
+    batch = StringTracker()
+    for record in data:
+        if isinstance(record, str):
+            batch.update(record, lengths=False)
+    batch.update_lengths(data)
+
+    for x in (single, batch):
+        assert x.length.get_n() == 4
+        assert x.length.get_max_value() == 21
+        assert x.token_length.get_quantiles([0, 1]) == [0, 3]
+    assert single.length_summary() == batch.length_summary()
+
+    restored = StringTracker()
+    restored.deserialize_lengths(batch.merge(single).serialize_lengths())
+    assert restored.length_summary().count == 8
+    assert restored.token_length_summary().max == 3
+    assert StringTracker().length_summary() is None
+
+    strings = StringTracker()
+    strings.update_lengths(np.array(["a b", None, "c", np.nan], dtype=object))
+    assert strings.token_length.get_quantiles([0, 1]) == [1, 2]
+
+
+def test_merge_into():
+    x = StringTracker()
+    y = StringTracker()
+    for v in ["a", "b b", "c"]:
+        x.update(v)
+        y.update(v * 2)
+
+    merged = x.merge(y)
+    assert x.merge_into(y) is x
+    assert x.to_protobuf() == merged.to_protobuf()
+    assert x.count == 6
+    assert x.length.get_n() == 6
+    assert y.count == 3
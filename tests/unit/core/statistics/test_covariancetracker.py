@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from whylogs.core.statistics.covariancetracker import CovarianceTracker
+
+
+def _frame(n=1000, seed=0):
+    rng = np.random.RandomState(seed)
+    x = rng.normal(size=(n, 4)) + 1000
+    x[:, 1] += 2 * x[:, 0]
+    x[rng.random_sample((n, 4)) < 0.1] = np.nan
+    return pd.DataFrame(x, columns=["a", "b", "c", "d"])
+
+
+def test_batches_and_merge_match_pandas():
+    df = _frame()
+    first = CovarianceTracker(["a", "b", "c", "d"])
+    first.update(df.iloc[:100])
+    first.update(df.iloc[100:400])
+    second = CovarianceTracker(["a", "b", "c", "d"])
+    second.update(df.iloc[400:])
+    merged = first.merge(second)
+    assert np.allclose(merged.covariance(), df.cov())
+    assert np.allclose(merged.correlation(), df.corr())
+
+    complete = df.dropna()
+    tracker = CovarianceTracker(["a", "b", "c", "d"])
+    tracker.update(complete)
+    assert np.allclose(tracker.correlation(), complete.corr())
+
+
+def test_missing_and_non_numeric_columns():
+    df = pd.DataFrame({"a": [1.0, 2.0, 4.0], "s": ["x", "1", "y"]})
+    tracker = CovarianceTracker(["a", "s", "missing"])
+    tracker.update(df)
+    assert tracker.count.tolist() == [[3, 1, 0], [1, 1, 0], [0, 0, 0]]
+    assert np.isnan(tracker.correlation().loc["a", "missing"])
+
+
+def test_serialize():
+    tracker = CovarianceTracker(["a", "b", "c", "d"])
+    tracker.update(_frame())
+    roundtrip = CovarianceTracker.deserialize(tracker.serialize())
+    assert roundtrip.columns == tracker.columns
+    assert np.array_equal(roundtrip.comoment, tracker.comoment)
+    with pytest.raises(ValueError):
+        roundtrip.merge(CovarianceTracker(["a"]))
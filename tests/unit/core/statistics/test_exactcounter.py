@@ -0,0 +1,37 @@
+import numpy as np
+
+from whylogs.core.statistics.exactcounter import ExactCounter
+
+
+def test_values_keyed_by_type():
+    counter = ExactCounter()
+    for v in [1, 1.0, True, "1", 1]:
+        assert counter.update(v)
+    assert len(counter) == 4
+    assert sorted(c for _, c in counter.items()) == [1, 1, 1, 2]
+
+
+def test_nan_ignored_and_unsupported_types_rejected():
+    counter = ExactCounter()
+    assert counter.update(np.nan)
+    assert len(counter) == 0
+    assert not counter.update([1, 2])
+    assert not counter.update({"a": 1})
+    assert len(counter) == 0
+
+
+def test_is_full():
+    counter = ExactCounter(threshold=3)
+    for v in range(3):
+        counter.update(v)
+    assert not counter.is_full()
+    counter.update(3)
+    assert counter.is_full()
+
+
+def test_merge():
+    x1 = ExactCounter(counts={(str, "a"): 1, (int, 2): 3})
+    x2 = ExactCounter(counts={(str, "a"): 2})
+    merged = x1.merge(x2)
+    assert dict(merged.items()) == {"a": 3, 2: 3}
+    assert dict(x1.items()) == {"a": 1, 2: 3}
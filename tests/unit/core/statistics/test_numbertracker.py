@@ -136,3 +136,19 @@ def test_track_floats_ints_unique_in_cardinality_estimate():
         x.track(float(val))
 
     assert x.to_summary().unique_count.estimate == 8
+
+
+def test_merge_into():
+    x = NumberTracker()
+    y = NumberTracker()
+    for v in [10, 11, 13]:
+        x.track(v)
+        y.track(v + 0.5)
+
+    expected = x.merge(y).to_protobuf()
+    y_before = y.to_protobuf()
+    histogram = x.histogram
+    x += y
+    assert x.histogram is histogram
+    assert x.to_protobuf() == expected
+    assert y.to_protobuf() == y_before
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from whylogs.core.statistics.reservoir import ReservoirSampler
+
+
+def _bucket_fractions(items):
+    counts = np.bincount(np.array(items, dtype=int) // 100, minlength=10)
+    return counts / counts.sum()
+
+
+def test_batches_are_sampled_uniformly():
+    rng = np.random.default_rng(0)
+    items = []
+    for _ in range(200):
+        reservoir = ReservoirSampler(50, random_state=rng)
+        for batch in np.array_split(np.arange(1000, dtype=float), 7):
+            reservoir.update(batch)
+        assert reservoir.count == 1000
+        assert len(set(reservoir.items)) == 50
+        items += reservoir.items
+    assert np.allclose(_bucket_fractions(items), 0.1, atol=0.02)
+
+
+def test_single_values_are_sampled_uniformly():
+    rng = np.random.default_rng(0)
+    items = []
+    for _ in range(100):
+        reservoir = ReservoirSampler(50, random_state=rng)
+        for value in range(1000):
+            reservoir.add(value)
+        items += reservoir.items
+    assert np.allclose(_bucket_fractions(items), 0.1, atol=0.02)
+
+
+def test_random_state_is_reproducible():
+    samples = []
+    for _ in range(2):
+        reservoir = ReservoirSampler(10, random_state=42)
+        reservoir.update(np.arange(1000))
+        for value in range(1000, 1100):
+            reservoir.add(value)
+        samples.append(reservoir.merge(reservoir.copy()).items)
+    assert samples[0] == samples[1]
+
+
+def test_merge_is_weighted_by_count():
+    rng = np.random.default_rng(0)
+    items = []
+    for _ in range(200):
+        first = ReservoirSampler(50, random_state=rng)
+        first.update(np.arange(300))
+        second = ReservoirSampler(50, random_state=rng)
+        second.update(np.arange(300, 1000))
+        merged = first.merge(second)
+        assert merged.count == 1000
+        assert len(merged.items) == 50
+        items += merged.items
+    assert np.allclose(_bucket_fractions(items), 0.1, atol=0.02)
+
+    small = ReservoirSampler(50)
+    small.update([1, 2])
+    assert sorted(small.merge(ReservoirSampler(50)).items) == [1, 2]
+
+
+def test_nulls_are_ignored():
+    reservoir = ReservoirSampler(10)
+    reservoir.update(np.array([1.0, np.nan, 2.0]))
+    reservoir.update(np.array(["a", None], dtype=object))
+    reservoir.add(None)
+    reservoir.add(float("nan"))
+    assert reservoir.count == 3
+    assert reservoir.items == [1.0, 2.0, "a"]
+
+
+def test_byte_cap():
+    reservoir = ReservoirSampler(16, max_bytes=256)
+    values = np.array(["é" * n for n in range(100)] + [[1, 2], 3], dtype=object)
+    reservoir.update(values)
+    assert reservoir.nbytes <= 256
+    assert all(
+        len(v.encode("utf-8")) <= 16 for v in reservoir.items if isinstance(v, str)
+    )
+    with pytest.raises(ValueError):
+        ReservoirSampler(16, max_bytes=64)
+
+
+def test_serialize():
+    reservoir = ReservoirSampler(5)
+    reservoir.update(np.array(["a", "b", 1, 2.5, {"x": 1}, "c"], dtype=object))
+    roundtrip = ReservoirSampler.deserialize(reservoir.serialize())
+    assert roundtrip.items == reservoir.items
+    assert roundtrip.count == 6
+    roundtrip.update(np.arange(100))
+    assert roundtrip.count == 106
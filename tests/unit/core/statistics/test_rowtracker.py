@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from whylogs.core.statistics.rowtracker import RowTracker
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "a": [1, 1, 2, 3, None, None],
+            "b": ["x", "x", "y", None, None, "z"],
+            "l": [[1], [1], [2], None, [3], [4]],
+        }
+    )
+
+
+def test_distinct_rows_and_null_patterns():
+    tracker = RowTracker()
+    tracker.update(_frame())
+    assert tracker.count == 6
+    assert tracker.distinct_estimate() == pytest.approx(5, abs=0.01)
+    assert tracker.duplicate_rate() == pytest.approx(1 / 6, abs=0.01)
+    assert tracker.frequent_null_patterns()[0] == ((), 3)
+    assert sorted(tracker.frequent_null_patterns()[1:]) == [
+        (("a",), 1),
+        (("a", "b"), 1),
+        (("b", "l"), 1),
+    ]
+
+
+def test_rows_match_regardless_of_column_order():
+    df = _frame()
+    tracker = RowTracker()
+    tracker.update(df)
+    tracker.update(df[["l", "b", "a"]])
+    assert tracker.distinct_estimate() == pytest.approx(5, abs=0.01)
+    assert tracker.frequent_null_patterns()[0] == ((), 6)
+
+
+def test_merge_and_serialize():
+    df = _frame()
+    first = RowTracker()
+    first.update(df[["a"]])
+    second = RowTracker()
+    second.update(df)
+    merged = first.merge(second)
+    assert merged.columns == ["a", "b", "l"]
+    assert merged.count == 12
+    estimates = dict(merged.frequent_null_patterns())
+    assert estimates[("a",)] == 3
+
+    roundtrip = RowTracker.deserialize(merged.serialize())
+    assert roundtrip.columns == merged.columns
+    assert roundtrip.distinct_estimate() == merged.distinct_estimate()
+    assert roundtrip.frequent_null_patterns() == merged.frequent_null_patterns()
+
+
+def test_merge_reordered_columns():
+    df = _frame()
+    first = RowTracker()
+    first.update(df)
+    second = RowTracker()
+    second.update(df[["l", "b", "a"]])
+    second.update(df[["b"]].assign(c=None))
+    merged = first.merge(second)
+    assert merged.columns == ["a", "b", "l", "c"]
+    assert merged.count == 3 * len(df)
+    assert dict(merged.frequent_null_patterns()) == {
+        (): 6,
+        ("a",): 2,
+        ("a", "b"): 2,
+        ("b", "l"): 2,
+        ("c",): 4,
+        ("b", "c"): 2,
+    }
+
+
+def test_many_columns():
+    df = pd.DataFrame(np.ones((3, 100)))
+    df.iloc[0, 99] = np.nan
+    tracker = RowTracker()
+    tracker.update(df)
+    assert tracker.frequent_null_patterns()[-1] == (("99",), 1)
+
+
+def test_merge_reordered_columns_keeps_rare_patterns():
+    # Every null pattern of eight columns puts the sketch far past its
+    # capacity, with the single row of pattern ["a", "c"] below its error
+    names = list("abcdefgh")
+    masks = np.array([[m >> i & 1 for i in range(8)] for m in range(1, 256)])
+    counts = np.where(np.arange(1, 256) == 0b101, 1, 50)
+    df = pd.DataFrame(np.repeat(masks, counts, axis=0), columns=names)
+    df = df.where(df == 0)
+    first = RowTracker()
+    first.update(df.iloc[:10])
+    second = RowTracker()
+    second.update(df[names[::-1]])
+    rare = '["a", "c"]'
+    assert second.null_patterns.get_lower_bound(rare) == 0
+    assert second.null_patterns.get_upper_bound(rare) >= 1
+
+    merged = first.merge(second)
+    expected = first.copy().null_patterns
+    expected.merge(second.null_patterns)
+    assert merged.columns == names
+    assert merged.count == 10 + len(df)
+    assert merged.null_patterns.serialize() == expected.serialize()
+    assert merged.null_patterns.get_upper_bound(rare) >= 1
@@ -90,3 +90,66 @@ def test_summary():
     assert summary.estimate == n
     assert summary.upper == n
     assert summary.lower == n
+
+
+def test_typed_theta_sketch_partitions_by_type():
+    theta = thetasketch.TypedThetaSketch()
+    for v in [1, 2, 2.5, "a", "b", "a", True, None]:
+        theta.update(v)
+    assert theta.numbers.get_result().get_estimate() == 3
+    assert theta.strings.get_result().get_estimate() == 2
+    assert theta.other.get_result().get_estimate() == 2
+    # As with the HLL sketch, True is hashed the same as 1
+    assert theta.get_estimate() == 6
+    assert theta.to_summary().estimate == 6
+
+    merged = theta.merge(theta)
+    assert merged.get_estimate() == 6
+    assert thetasketch.TypedThetaSketch().to_summary() is None
+
+
+def test_typed_theta_sketch_converted_strings():
+    theta = thetasketch.TypedThetaSketch()
+    for raw, value in [("1", 1), ("2", 2), ("x", "x"), ("nan", None), (1, 1)]:
+        theta.update(value, raw)
+    # Raw strings are all tracked, as by a StringTracker
+    assert theta.strings.get_result().get_estimate() == 4
+    assert theta.numbers.get_result().get_estimate() == 2
+    assert theta.get_estimate() == 3
+
+
+def test_result_is_cached_until_update():
+    theta = thetasketch.ThetaSketch()
+    for v in range(10):
+        theta.update(v)
+    result = theta.get_result()
+    assert theta.get_result() is result
+    theta.update(10)
+    assert theta.get_result() is not result
+    assert theta.get_result().get_estimate() == 11
+
+    other = thetasketch.ThetaSketch()
+    other.update(20)
+    result = theta.get_result()
+    theta.merge_into(other)
+    assert theta.get_result() is not result
+    assert theta.get_result().get_estimate() == 12
+
+
+def test_compact_only():
+    theta = thetasketch.ThetaSketch()
+    for v in range(10):
+        theta.update(v)
+
+    for compact in (
+        thetasketch.ThetaSketch.deserialize(theta.serialize()),
+        theta.copy(),
+        thetasketch.ThetaSketch().merge(theta),
+    ):
+        assert compact.get_result().get_estimate() == 10
+        assert compact._theta_sketch is None
+        assert compact._union is None
+        compact.update(10)
+        assert compact.get_result().get_estimate() == 11
+        compact.merge_into(compact)
+        assert compact.get_result().get_estimate() == 11
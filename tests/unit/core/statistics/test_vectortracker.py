@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from whylogs.core.statistics.vectortracker import VectorTracker
+
+
+def _vectors(n=500, dim=8, seed=0):
+    x = np.random.RandomState(seed).normal(size=(n, dim))
+    x[3, 2] = np.nan
+    return x
+
+
+def test_batches_match_numpy():
+    x = _vectors()
+    tracker = VectorTracker()
+    tracker.update(list(x[:123]))
+    tracker.update(x[123:])
+
+    masked = np.ma.masked_invalid(x)
+    assert tracker.count == len(x)
+    assert np.allclose(tracker.mean, masked.mean(axis=0))
+    assert np.allclose(tracker.variance, masked.var(axis=0, ddof=1))
+    assert tracker.nan_count.tolist() == [0, 0, 1] + [0] * 5
+
+    norms = np.linalg.norm(np.delete(x, 3, axis=0), axis=1)
+    summary = tracker.to_summary().number_summary
+    assert summary.count == len(x) - 1
+    assert summary.mean == pytest.approx(norms.mean())
+    assert summary.stddev == pytest.approx(norms.std(ddof=1))
+    assert summary.max == pytest.approx(norms.max())
+
+    dimensions = tracker.dimension_summary()
+    assert dimensions["nan_count"] == [0, 0, 1] + [0] * 5
+    assert np.allclose(dimensions["variance"], tracker.variance)
+    assert VectorTracker().dimension_summary() is None
+
+
+def test_merge_and_serialize():
+    x = _vectors()
+    full = VectorTracker()
+    full.update(x)
+    a = VectorTracker()
+    a.update(x[:200])
+    b = VectorTracker()
+    b.update(x[200:])
+    b.increment_null(2)
+    merged = VectorTracker().merge(a).merge(b)
+    assert np.allclose(merged.mean, full.mean)
+    assert np.allclose(merged.m2, full.m2)
+    assert merged.null_count == 2
+
+    roundtrip = VectorTracker.deserialize(merged.serialize())
+    assert roundtrip.dim == 8
+    assert roundtrip.count == merged.count
+    assert np.array_equal(roundtrip.m2, merged.m2)
+    assert roundtrip.to_summary() == merged.to_summary()
+    empty = VectorTracker.deserialize(VectorTracker().serialize())
+    assert empty.dim is None and empty.count == 0
+
+
+def test_dimension_mismatch():
+    tracker = VectorTracker()
+    tracker.update(np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        tracker.update(np.zeros((2, 4)))
@@ -147,3 +147,199 @@ def test_merge():
     assert merged.number_tracker.ints.count == 0
     assert merged.number_tracker.floats.count == 4
     assert merged.string_tracker.count == 2
+
+
+def test_exact_counting_matches_sketches():
+    from whylogs.core.statistics.exactcounter import ExactCounter
+
+    vals = [1, 2, 2, 3.5, "a", "a", "b", "4", True, None]
+    exact = ColumnProfile("col", exact_counter=ExactCounter())
+    sketched = ColumnProfile("col")
+    for v in vals:
+        exact.track(v)
+        sketched.track(v)
+
+    assert exact.exact_counter is not None
+    assert exact.frequent_items.is_empty()
+    assert exact.cardinality_tracker.is_empty()
+
+    exact_summary = message_to_dict(exact.to_summary())
+    sketched_summary = message_to_dict(sketched.to_summary())
+    assert exact_summary.pop("uniqueCount") == {
+        "estimate": 7.0,
+        "upper": 7.0,
+        "lower": 7.0,
+    }
+    sketched_summary.pop("uniqueCount")
+    assert exact_summary == sketched_summary
+
+    roundtrip = ColumnProfile.from_protobuf(exact.to_protobuf())
+    compare_frequent_items(
+        roundtrip.frequent_items.get_frequent_items(),
+        sketched.frequent_items.get_frequent_items(),
+    )
+
+
+def test_exact_unique_count_keeps_types_apart():
+    from whylogs.core.statistics.exactcounter import ExactCounter
+
+    col = ColumnProfile("col", exact_counter=ExactCounter())
+    for v in ["1", 1, "1"]:
+        col.track(v)
+    assert col.to_summary().unique_count.estimate == 2
+
+
+def test_exact_counter_promotes_on_overflow():
+    from whylogs.core.statistics.exactcounter import ExactCounter
+
+    col = ColumnProfile("col", exact_counter=ExactCounter(threshold=5))
+    for v in range(5):
+        col.track(v)
+        col.track(v)
+    assert col.exact_counter is not None
+    col.track(5)
+    assert col.exact_counter is None
+    assert col.frequent_items.get_total_weight() == 11
+    assert col.number_tracker.frequent_numbers.get_estimate(0) == 2
+    assert col.cardinality_tracker.get_estimate() == pytest.approx(6, 1e-4)
+
+
+def test_merge_exact_columns():
+    from whylogs.core.statistics.exactcounter import ExactCounter
+
+    x1 = ColumnProfile("col", exact_counter=ExactCounter(threshold=3))
+    x2 = ColumnProfile("col", exact_counter=ExactCounter(threshold=3))
+    x1.track("a")
+    x2.track("b")
+    merged = x1.merge(x2)
+    assert len(merged.exact_counter) == 2
+
+    x2.track("c")
+    x2.track("d")
+    merged = x1.merge(x2)
+    assert merged.exact_counter is None
+    assert merged.string_tracker.items.get_num_active_items() == 4
+    assert x1.exact_counter is not None
+
+    sketched = ColumnProfile("col")
+    sketched.track("e")
+    merged = x1.merge(sketched)
+    assert merged.exact_counter is None
+    assert merged.frequent_items.get_num_active_items() == 2
+
+
+def test_shared_cardinality():
+    import datetime
+
+    from whylogs.core.statistics.thetasketch import TypedThetaSketch
+
+    vals = [1, 2, 2, 3.5, "a", "a", "b", None, datetime.date(2020, 1, 1)]
+    col = ColumnProfile("col", cardinality_tracker=TypedThetaSketch())
+    for v in vals:
+        col.track(v)
+
+    assert col.cardinality_tracker.numbers is col.number_tracker.theta_sketch
+    assert col.cardinality_tracker.strings is col.string_tracker.theta_sketch
+    summary = col.to_summary()
+    assert summary.unique_count.estimate == 6
+    assert summary.number_summary.unique_count.estimate == 3
+    assert summary.string_summary.unique_count.estimate == 2
+
+    merged = col.merge(ColumnProfile("col"))
+    assert merged.shared_cardinality
+    assert merged.to_summary().unique_count.estimate == 6
+
+    message = col.to_protobuf()
+    roundtrip = ColumnProfile.from_protobuf(message, col.cardinality_state())
+    assert roundtrip.shared_cardinality
+    assert roundtrip.to_summary() == summary
+    # Without the other partitions, only numbers and strings are counted
+    partial = ColumnProfile.from_protobuf(message)
+    assert partial.shared_cardinality
+    assert partial.to_summary().unique_count.estimate == 5
+    assert partial.merge(col).to_summary().unique_count.estimate == 6
+    assert ColumnProfile("col").cardinality_state() is None
+    hll = ColumnProfile.from_protobuf(ColumnProfile("col").to_protobuf())
+    assert not hll.shared_cardinality
+
+    unshared = ColumnProfile("col")
+    unshared.track("c")
+    with pytest.raises(ValueError):
+        col.merge(unshared)
+    with pytest.raises(ValueError):
+        unshared.merge(col)
+
+
+def test_shared_cardinality_keeps_string_counts():
+    from whylogs.core.statistics.thetasketch import TypedThetaSketch
+
+    vals = ["1", "2", "x", True, False, "nan", 1]
+    shared = ColumnProfile("col", cardinality_tracker=TypedThetaSketch())
+    hll = ColumnProfile("col")
+    for v in vals:
+        shared.track(v)
+        hll.track(v)
+    summary = shared.to_summary()
+    expected = hll.to_summary()
+    assert summary.string_summary == expected.string_summary
+    assert summary.string_summary.unique_count.estimate == 4
+    assert summary.number_summary.unique_count == expected.number_summary.unique_count
+    assert summary.unique_count.estimate == pytest.approx(
+        expected.unique_count.estimate, 1e-3
+    )
+
+
+def test_merge_into_matches_merge():
+    from whylogs.core.statistics.exactcounter import ExactCounter
+    from whylogs.core.statistics.thetasketch import TypedThetaSketch
+
+    def column(vals, **kwargs):
+        col = ColumnProfile("col", **kwargs)
+        for v in vals:
+            col.track(v)
+        return col
+
+    pairs = [
+        (column([1, 2.5, "a", None]), column([2, "b", True])),
+        (
+            column(["a"], exact_counter=ExactCounter(threshold=3)),
+            column(["b", "c", "d"], exact_counter=ExactCounter(threshold=3)),
+        ),
+        (column([1, "a"], exact_counter=ExactCounter()), column([3, "b"])),
+        (column([None]), column([2, 4, "b"], cardinality_tracker=TypedThetaSketch())),
+    ]
+    for x, y in pairs:
+        merged = x.merge(y)
+        y_before = y.to_protobuf()
+        x += y
+        assert x.to_protobuf() == merged.to_protobuf()
+        assert x.exact_counter is None
+        assert x.shared_cardinality == merged.shared_cardinality
+        assert x.to_summary() == merged.to_summary()
+        assert y.to_protobuf() == y_before
+
+
+def test_trackers_allocated_on_use():
+    numbers = ColumnProfile("col")
+    for v in [1, 2.5, None]:
+        numbers.track(v)
+    numbers.update_batch([1, 2.5, None])
+    assert numbers._number_tracker is not None
+    assert numbers._string_tracker is None
+
+    message = numbers.to_protobuf()
+    assert not message.HasField("strings")
+    roundtrip = ColumnProfile.from_protobuf(message)
+    assert roundtrip._string_tracker is None
+    assert roundtrip.to_protobuf() == message
+
+    nulls = ColumnProfile("col")
+    nulls.track(None)
+    strings = ColumnProfile("col")
+    strings.track("a")
+    merged = nulls.merge(strings).merge(numbers)
+    assert merged.counters.count == 5
+    assert merged.string_tracker.count == 1
+    assert merged.number_tracker.count == 2
+    assert merged.string_tracker is not strings.string_tracker
+    assert nulls._number_tracker is None
@@ -1,12 +1,26 @@
 import datetime
+import io
 import json
 from uuid import uuid4
 
 import numpy as np
-
-from whylogs.core.datasetprofile import DatasetProfile, array_profile
+import pytest
+
+from whylogs.core.datasetprofile import (
+    DatasetProfile,
+    array_profile,
+    flatten_summary,
+    reassemble_segments,
+)
+from whylogs.core.extensions import ProfileExtensions
+from whylogs.proto import MessageSegment
 from whylogs.util import time
-from whylogs.util.protobuf import message_to_dict, message_to_json
+from whylogs.util.protobuf import (
+    message_to_dict,
+    message_to_json,
+    multi_msg_reader,
+    write_multi_msg,
+)
 from whylogs.util.time import to_utc_ms
 
 
@@ -238,6 +252,37 @@ def test_write_delimited_multiple():
         assert entry.metadata == original.metadata
 
 
+def test_iter_delimited(tmpdir):
+    profiles = []
+    for i in range(3):
+        profile = DatasetProfile("test", session_id=str(i))
+        profile.track("col1", i)
+        profiles.append(profile)
+    data = b"".join(p.serialize_delimited() for p in profiles)
+    path = str(tmpdir.join("profiles.bin"))
+    with open(path, "wb") as f:
+        f.write(data)
+
+    for source in (path, io.BytesIO(data), data):
+        entries = DatasetProfile.iter_delimited(source)
+        assert next(entries).session_id == "0"
+        assert [p.session_id for p in entries] == ["1", "2"]
+    # Open files are read from their current position
+    with open(path, "rb") as f:
+        f.seek(len(profiles[0].serialize_delimited()))
+        entries = list(DatasetProfile.iter_delimited(f, lazy=True))
+    assert [p.session_id for p in entries] == ["1", "2"]
+    assert entries[1].columns["col1"].counters.count == 1
+    # Stopping early releases the file
+    entries = DatasetProfile.iter_delimited(path)
+    next(entries)
+    entries.close()
+
+    assert list(DatasetProfile.iter_delimited(str(tmpdir.join("e").ensure()))) == []
+    with pytest.raises(ValueError):
+        list(DatasetProfile.iter_delimited(data[:-1]))
+
+
 def test_verify_schema_version():
     dp = DatasetProfile(
         name="test",
@@ -249,3 +294,486 @@ def test_verify_schema_version():
     props = dp.to_properties()
     assert props.schema_major_version == 1
     assert props.schema_minor_version == 1
+
+
+def test_exact_threshold_applies_to_new_columns():
+    x = DatasetProfile("test", exact_threshold=10)
+    x.track({"col1": "value", "col2": 1})
+    assert all(c.exact_counter is not None for c in x.columns.values())
+    assert x.columns["col1"].exact_counter.threshold == 10
+    assert DatasetProfile("test").exact_threshold is None
+
+
+def test_shared_cardinality_applies_to_new_columns():
+    x = DatasetProfile("test", shared_cardinality=True)
+    x.track({"col1": "value", "col2": 1})
+    assert all(c.shared_cardinality for c in x.columns.values())
+    assert x.merge(x).shared_cardinality
+    assert not DatasetProfile("test").columns
+
+    x.track({"col1": datetime.date(2020, 1, 1)})
+    roundtrip = DatasetProfile.from_protobuf(x.to_protobuf())
+    assert roundtrip.columns["col1"].shared_cardinality
+    summary = roundtrip.to_summary().columns["col1"]
+    assert summary.unique_count.estimate == 2
+    assert summary.string_summary.unique_count.estimate == 1
+
+
+def test_sampled_dataframe_counts_are_exact():
+    import pandas as pd
+
+    n = 10000
+    df = pd.DataFrame(
+        {
+            "ints": np.arange(n) % 7,
+            "floats": np.where(np.arange(n) % 10 == 0, np.nan, np.arange(n) % 7 + 0.5),
+            "strings": ["a", "b", None, "1", "true"] * (n // 5),
+            "mixed": [1, 1.0, True, "x"] * (n // 4),
+        }
+    )
+    exact = DatasetProfile("test")
+    exact.track_dataframe(df)
+    sampled = DatasetProfile("test", sample_rate=0.1, random_state=0)
+    sampled.track_dataframe(df)
+
+    for name, column in exact.columns.items():
+        sampled_column = sampled.columns[name]
+        assert sampled_column.counters.__dict__ == column.counters.__dict__
+        assert (
+            sampled_column.schema_tracker.type_counts
+            == column.schema_tracker.type_counts
+        )
+    assert sampled.columns["floats"].number_tracker.count < n / 5
+    sizes = [
+        DatasetProfile("test", random_state=0).track_dataframe_sample(df, 0.1)
+        for _ in range(2)
+    ]
+    assert sizes[0] == sizes[1]
+
+    summary = sampled.to_summary()
+    extensions = ProfileExtensions.pop(dict(summary.properties.metadata))
+    assert extensions.profile["sample_rate"] == 0.1
+    numbers = summary.columns["floats"].number_summary
+    n_numbers = 0.9 * n
+    assert abs(numbers.count - n_numbers) < n / 10
+    assert abs(numbers.histogram.n - n_numbers) < n / 10
+    assert numbers.unique_count.estimate == 7
+    assert numbers.unique_count.upper >= 0.8 * n_numbers
+
+    roundtrip = DatasetProfile.from_protobuf(sampled.to_protobuf())
+    assert roundtrip.sample_rate == 0.1
+    assert roundtrip.metadata == {}
+    assert roundtrip.to_summary().columns["floats"].number_summary == numbers
+
+
+def test_track_dataframe_segments():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        {
+            "state": ["CA", "WA", "CA", None, "WA", "CA"],
+            "grade": ["A", "A", "B", "A", "A", "A"],
+            "amount": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        }
+    )
+    prof = DatasetProfile("test", tags={"env": "test"})
+    segments = prof.track_dataframe(df, segment_by=["state", "grade"])
+    assert segments is prof.segments
+    assert not prof.columns
+    assert set(segments) == {
+        (("grade", "A"), ("state", "CA")),
+        (("grade", "B"), ("state", "CA")),
+        (("grade", "A"), ("state", "WA")),
+        (("grade", "A"), ("state", "None")),
+    }
+    ca_a = segments[(("grade", "A"), ("state", "CA"))]
+    assert ca_a.columns["amount"].number_tracker.count == 2
+    assert ca_a.segment == (("grade", "A"), ("state", "CA"))
+    assert ca_a.tags["env"] == "test"
+    assert ca_a.tags["whylogs.segment.state"] == "CA"
+    assert prof.segment == ()
+
+    prof.track_dataframe(df.iloc[:2], segment_by=["state", "grade"])
+    assert ca_a.columns["amount"].number_tracker.count == 3
+
+    merged = prof.merge(prof)
+    merged_ca_a = merged.segments[(("grade", "A"), ("state", "CA"))]
+    assert merged_ca_a.columns["amount"].number_tracker.count == 6
+
+    roundtrip = DatasetProfile.from_protobuf(ca_a.to_protobuf())
+    assert roundtrip.segment == ca_a.segment
+
+
+def test_track_dataframe_vectors():
+    import pandas as pd
+
+    embeddings = np.random.RandomState(0).normal(size=(20, 4))
+    df = pd.DataFrame({"embedding": list(embeddings), "x": np.arange(20.0)})
+    df.loc[5, "embedding"] = None
+    prof = DatasetProfile("test")
+    prof.track_dataframe(df)
+    prof.track({"embedding": embeddings[0]})
+    assert set(prof.columns) == {"x"}
+    vectors = prof.vectors["embedding"]
+    assert (vectors.count, vectors.null_count) == (20, 1)
+
+    summary = prof.to_summary()
+    assert summary.columns["embedding"].counters.count == 21
+    assert summary.columns["embedding"].number_summary.count == 20
+    dimensions = flatten_summary(summary)["vectors"]["embedding"]
+    assert list(dimensions.columns) == ["mean", "variance", "nan_count"]
+    assert np.allclose(dimensions["mean"], vectors.mean)
+    assert np.allclose(dimensions["variance"], vectors.variance)
+    assert dimensions["nan_count"].tolist() == [0] * 4
+    assert "vectors" not in DatasetProfile("test").flat_summary()
+
+    roundtrip = DatasetProfile.from_protobuf(prof.to_protobuf())
+    assert roundtrip.metadata == {}
+    assert np.array_equal(roundtrip.vectors["embedding"].mean, vectors.mean)
+    merged = prof.merge(prof)
+    assert merged.vectors["embedding"].count == 40
+    assert prof.vectors["embedding"].count == 20
+
+
+def test_track_dataframe_flatten():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        {
+            "event": [
+                {"user": {"id": 1, "country": "US"}, "tags": ["a", "b"]},
+                {"user": {"id": 2}, "tags": []},
+                None,
+            ]
+        }
+    )
+    prof = DatasetProfile("test", flatten=True, flatten_arrays="length")
+    prof.track_dataframe(df)
+    assert set(prof.columns) == {"event.user.id", "event.user.country", "event.tags"}
+    assert prof.columns["event.user.id"].number_tracker.count == 2
+    assert prof.columns["event.tags"].number_tracker.floats.max == 2
+
+    shallow = DatasetProfile("test", flatten=True, flatten_depth=1)
+    shallow.track_dataframe(df)
+    assert set(shallow.columns) == {"event.user", "event.tags"}
+
+
+def test_track_dataframe_string_lengths():
+    import pandas as pd
+
+    df = pd.DataFrame({"text": ["a b c", "hello", None, "x y"]})
+    prof = DatasetProfile("test")
+    prof.track_dataframe(df)
+    strings = prof.columns["text"].string_tracker
+    assert strings.length_summary().count == 3
+    assert strings.token_length_summary().max == 3
+    lengths = prof.flat_summary()["string_lengths"].loc["text"]
+    assert (lengths["length_count"], lengths["length_max"]) == (3, 5)
+    assert lengths["token_length_quantile_0.5000"] == 2
+
+    roundtrip = DatasetProfile.from_protobuf(prof.to_protobuf())
+    assert roundtrip.metadata == {}
+    restored = roundtrip.columns["text"].string_tracker
+    assert restored.length_summary() == strings.length_summary()
+
+
+def test_covariance_columns():
+    import pandas as pd
+
+    x = np.random.RandomState(0).normal(size=(50, 2))
+    df = pd.DataFrame({"a": x[:, 0], "b": x[:, 0] + x[:, 1], "s": ["x"] * 50})
+    prof = DatasetProfile("test", covariance_columns=["a", "b"])
+    prof.track_dataframe(df.iloc[:20])
+    prof.track_dataframe(df.iloc[20:])
+    correlation = prof.flat_summary()["correlation"]
+    assert np.allclose(correlation, df[["a", "b"]].corr())
+    summary = prof.to_summary()
+    summary = type(summary).FromString(summary.SerializeToString())
+    assert flatten_summary(summary)["correlation"].equals(correlation)
+    assert "correlation" not in DatasetProfile("test").flat_summary()
+
+    roundtrip = DatasetProfile.from_protobuf(prof.to_protobuf())
+    assert roundtrip.metadata == {}
+    assert roundtrip.covariance_columns == ["a", "b"]
+    empty = DatasetProfile(
+        "test", session_id=prof.session_id, session_timestamp=prof.session_timestamp
+    )
+    merged = prof.merge(empty)
+    assert np.array_equal(merged.covariance.comoment, prof.covariance.comoment)
+    assert set(merged.columns) == set(prof.columns)
+
+
+def test_track_rows():
+    import pandas as pd
+
+    df = pd.DataFrame({"a": [1.0, 1.0, np.nan], "b": ["x", "x", "y"]})
+    prof = DatasetProfile("test", track_rows=True)
+    prof.track_dataframe(df)
+    flat = prof.flat_summary()
+    assert flat["rows"]["count"] == 3
+    assert abs(flat["rows"]["duplicate_rate"] - 1 / 3) < 0.01
+    assert flat["null_patterns"].to_dict() == {"": 2, "a": 1}
+    summary = prof.to_summary()
+    summary = type(summary).FromString(summary.SerializeToString())
+    assert flatten_summary(summary)["null_patterns"].equals(flat["null_patterns"])
+
+    roundtrip = DatasetProfile.from_protobuf(prof.to_protobuf())
+    assert roundtrip.metadata == {}
+    assert roundtrip.rows.count == 3
+    assert prof.merge(prof).rows.count == 6
+
+
+def test_reservoir_samples():
+    import pandas as pd
+
+    df = pd.DataFrame({"a": np.arange(1000), "b": ["x"] * 999 + [None]})
+    prof = DatasetProfile("test", reservoir_size=20, reservoir_max_bytes=1024)
+    prof.track_dataframe(df)
+    prof.track("a", 1000)
+    reservoir = prof.columns["a"].reservoir
+    assert reservoir.count == 1001
+    assert len(reservoir.items) == 20
+    assert prof.columns["b"].reservoir.count == 999
+
+    roundtrip = DatasetProfile.from_protobuf(prof.to_protobuf())
+    assert roundtrip.metadata == {}
+    assert roundtrip.columns["a"].reservoir.items == reservoir.items
+    merged = roundtrip.merge(roundtrip)
+    assert merged.columns["a"].reservoir.count == 2002
+    assert DatasetProfile("test").columns == {}
+    assert DatasetProfile("test")._new_column("a").reservoir is None
+
+
+def test_extensions_round_trip():
+    import pandas as pd
+
+    from whylogs.core.extensions import EXTENSIONS_METADATA_KEY
+
+    prof = DatasetProfile("test", metadata={"owner": "me"}, track_rows=True)
+    prof.track_dataframe(pd.DataFrame({"a": [1]}))
+    prof.extensions["custom"] = {"x": 1}
+    message = prof.to_protobuf()
+    assert set(message.properties.metadata) == {"owner", EXTENSIONS_METADATA_KEY}
+
+    roundtrip = DatasetProfile.from_protobuf(message)
+    assert roundtrip.metadata == {"owner": "me"}
+    assert roundtrip.extensions == {"custom": {"x": 1}}
+    assert roundtrip.rows.count == 1
+    assert roundtrip.to_protobuf() == message
+
+    message.properties.metadata[EXTENSIONS_METADATA_KEY] = json.dumps(
+        {"version": 99, "profile": {}, "columns": {}}
+    )
+    with pytest.raises(ValueError):
+        DatasetProfile.from_protobuf(message)
+
+
+def test_merge_into():
+    import pandas as pd
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    df = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": ["x", "y", "x"]})
+    kwargs = dict(session_id="s", session_timestamp=now, covariance_columns=["a"])
+    x = DatasetProfile("test", **kwargs)
+    x.track_dataframe(df)
+    x.track_dataframe(df, segment_by="b")
+    y = DatasetProfile("test", **kwargs)
+    y.track_dataframe(df.assign(c=1))
+    y.track_dataframe(df.assign(c=1), segment_by="b")
+
+    merged = x.merge(y)
+    y_before = y.to_protobuf()
+    column = x.columns["a"]
+    x += y
+    assert x.columns["a"] is column
+    assert x.to_summary() == merged.to_summary()
+    assert x.covariance.count[0, 0] == 6
+    assert len(x.segments) == 2
+    for segment, profile in merged.segments.items():
+        assert x.segments[segment].to_summary() == profile.to_summary()
+    assert y.to_protobuf() == y_before
+
+
+def test_merge_many():
+    import pandas as pd
+    import pytest
+
+    # Protobuf messages keep millisecond timestamps
+    now = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def profiles(n):
+        for i in range(n):
+            prof = DatasetProfile("test", now, now, session_id="s")
+            prof.track_dataframe(pd.DataFrame({"a": [i, i + 1], "b": ["x", str(i)]}))
+            yield prof if i % 2 == 0 else prof.to_protobuf().SerializeToString()
+
+    expected = DatasetProfile("test", now, now, session_id="s")
+    for prof in profiles(7):
+        if isinstance(prof, bytes):
+            prof = DatasetProfile.from_protobuf_string(prof)
+        expected = expected.merge(prof)
+
+    for n_jobs in (1, 2):
+        merged = DatasetProfile.merge_many(profiles(7), n_jobs=n_jobs, chunk_size=2)
+        assert merged.columns["a"].counters.count == 14
+        assert merged.columns["b"].cardinality_tracker.get_estimate() == pytest.approx(
+            expected.columns["b"].cardinality_tracker.get_estimate()
+        )
+        assert merged.columns["a"].number_tracker.variance.mean == pytest.approx(
+            expected.columns["a"].number_tracker.variance.mean
+        )
+    assert DatasetProfile.merge_many([]) is None
+    assert DatasetProfile.merge_many([], n_jobs=2) is None
+
+
+def test_merge_different_sample_rates():
+    import pandas as pd
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    kwargs = dict(session_id="s", session_timestamp=now)
+    df = pd.DataFrame({"x": np.arange(100.0)})
+    profiles = []
+    for sample_rate in (0.5, 0.25, None):
+        prof = DatasetProfile("test", sample_rate=sample_rate, **kwargs)
+        prof.track_dataframe(df if sample_rate != 0.25 else pd.concat([df, df]))
+        profiles.append(prof)
+    half, quarter, full = profiles
+
+    merged = half.merge(quarter)
+    assert merged.sample_rate == pytest.approx((100 * 0.5 + 200 * 0.25) / 300)
+    assert merged.columns["x"].counters.count == 300
+    assert DatasetProfile.merge_many(profiles).sample_rate == pytest.approx(
+        (50 + 50 + 100) / 400
+    )
+    empty = DatasetProfile("test", sample_rate=0.5, **kwargs)
+    assert full.merge(empty).sample_rate is None
+    assert DatasetProfile("test", **kwargs).merge(half).sample_rate == 0.5
+    assert half.sample_rate == 0.5
+
+
+def test_merge_many_keeps_segments_and_options():
+    import pandas as pd
+
+    now = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    options = dict(
+        exact_threshold=5, track_rows=True, covariance_columns=["a"], reservoir_size=3
+    )
+    profiles = []
+    for i in range(5):
+        prof = DatasetProfile("test", now, now, session_id="s", **options)
+        df = pd.DataFrame({"a": [i, i + 1.0], "b": ["x", "y"]})
+        prof.track_dataframe(df)
+        prof.track_dataframe(df, segment_by=["b"])
+        profiles.append(prof)
+    before = profiles[0].to_protobuf()
+
+    for n_jobs in (1, 2):
+        merged = DatasetProfile.merge_many(profiles, n_jobs=n_jobs, chunk_size=2)
+        assert merged.exact_threshold == 5
+        assert merged.reservoir_size == 3
+        assert merged.rows.count == 10
+        assert merged.covariance.count[0, 0] == 10
+        assert sorted(merged.segments) == [(("b", "x"),), (("b", "y"),)]
+        segment = merged.segments[(("b", "x"),)]
+        assert segment.columns["a"].counters.count == 5
+        assert segment.exact_threshold == 5
+    assert profiles[0].to_protobuf() == before
+    assert DatasetProfile.merge_many(profiles[:1]) is not profiles[0]
+
+
+def test_merge_sparse_columns():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    kwargs = dict(session_id="s", session_timestamp=now)
+    x = DatasetProfile("test", **kwargs)
+    x.track({"a": 1, "b": None})
+    y = DatasetProfile("test", **kwargs)
+    y.track({"c": "z"})
+    y._get_column("empty")
+
+    assert set(y.to_protobuf().columns) == {"c"}
+    x += y
+    assert set(x.columns) == {"a", "b", "c"}
+    assert x.columns["c"] is not y.columns["c"]
+    assert x.columns["b"]._number_tracker is None
+    assert x.columns["c"].string_tracker.count == 1
+
+
+def test_lazy_columns():
+    import pandas as pd
+
+    from whylogs.core.datasetprofile import LazyColumns
+
+    df = pd.DataFrame({"a": [1.0, 2.0, None], "b": ["x", "yy", "x"], "c": [1, 2, 3]})
+    profile = DatasetProfile("test", reservoir_size=2)
+    profile.track_dataframe(df)
+    data = profile.to_protobuf().SerializeToString()
+    eager = DatasetProfile.from_protobuf_string(data)
+
+    lazy = DatasetProfile.from_protobuf_string(data, lazy=True)
+    columns = lazy.columns
+    assert isinstance(columns, LazyColumns)
+    assert len(columns) == 3 and "b" in columns and "d" not in columns
+    assert sorted(columns) == ["a", "b", "c"]
+    assert not any(columns.is_loaded(name) for name in columns)
+
+    assert columns["b"].string_tracker.count == 3
+    assert columns["b"].reservoir.count == 3
+    assert columns.is_loaded("b") and not columns.is_loaded("a")
+    # Untouched columns and their metadata state are written unchanged
+    assert lazy.to_protobuf() == profile.to_protobuf()
+
+    copy = lazy.copy()
+    assert not copy.columns.is_loaded("a")
+    assert copy.columns["b"] is not columns["b"]
+    del copy.columns["c"]
+    assert "c" not in copy.columns and "c" in columns
+
+    assert lazy.to_summary() == eager.to_summary()
+    assert all(columns.is_loaded(name) for name in columns)
+
+    message = profile.to_protobuf()
+    from_message = DatasetProfile.from_protobuf(message, lazy=True)
+    assert from_message.columns["a"].number_tracker.count == 2
+
+
+def test_chunk_iterator_reassemble():
+    import pandas as pd
+
+    # Protobuf messages keep millisecond timestamps
+    now = datetime.datetime(2020, 8, 1, tzinfo=datetime.timezone.utc)
+    profiles = []
+    for i in range(2):
+        profile = DatasetProfile(
+            "test", session_id=str(i), session_timestamp=now, reservoir_size=5
+        )
+        df = pd.DataFrame(
+            {"col{}".format(j): ["a", "a", "a", "bb", "bb", str(j)] for j in range(20)}
+        )
+        profile.track_dataframe(df)
+        profiles.append(profile)
+    chunks = [list(p.chunk_iterator(max_len=2000)) for p in profiles]
+    assert len(chunks[0]) > 4
+    for segment in chunks[0][1:-1]:
+        assert segment.ByteSize() < 2500
+    # Interleave the segments of both profiles, through a file
+    f = io.BytesIO()
+    write_multi_msg([s for pair in zip(*chunks) for s in pair], f)
+    f.seek(0)
+    segments = list(multi_msg_reader(f, MessageSegment))
+
+    for lazy in (False, True):
+        result = list(reassemble_segments(segments, lazy=lazy))
+        assert [p.session_id for p in result] == ["0", "1"]
+        assert sorted(result[1].columns) == sorted(profiles[1].columns)
+        assert all(c.reservoir.count == 6 for c in result[1].columns.values())
+        summaries = [
+            p.flat_summary()["summary"].set_index("column").sort_index()
+            for p in (result[1], profiles[1])
+        ]
+        pd.testing.assert_frame_equal(*summaries)
+    # A profile with a missing chunk is never yielded
+    with pytest.raises(ValueError):
+        list(reassemble_segments(segments[:2] + segments[3:]))
+    # Profiles without a segment count are yielded at the end
+    result = list(reassemble_segments(segments[:-1]))
+    assert [p.session_id for p in result] == ["0", "1"]
@@ -0,0 +1,175 @@
+import datetime
+import io
+
+import pandas as pd
+import pytest
+
+from whylogs.core import DatasetProfile
+from whylogs.core.indexed import (
+    IndexedProfileReader,
+    ProfileArchiveReader,
+    ProfileArchiveWriter,
+    serialize_indexed,
+    write_indexed,
+)
+
+
+def _profile():
+    df = pd.DataFrame({"a": [1.0, 2.0, None], "b": ["x", "yy", "x"], "c": [1, 2, 3]})
+    # Protobuf messages keep millisecond timestamps
+    now = datetime.datetime(2020, 8, 1, tzinfo=datetime.timezone.utc)
+    profile = DatasetProfile(
+        "test",
+        data_timestamp=now,
+        session_timestamp=now,
+        reservoir_size=2,
+        covariance_columns=["a", "c"],
+    )
+    profile.track_dataframe(df)
+    return profile
+
+
+def test_read_columns():
+    profile = _profile()
+    reader = IndexedProfileReader(io.BytesIO(serialize_indexed(profile)))
+    # Summaries sort the KLL sketches, which changes their serialization
+    message = profile.to_protobuf()
+    assert reader.column_names == ["a", "b", "c"]
+    assert reader.properties.session_id == profile.session_id
+
+    column = reader.read_column("b")
+    assert column.to_summary() == profile.columns["b"].to_summary()
+    assert column.reservoir.count == 3
+    assert reader.read_column_message("c") == message.columns["c"]
+    with pytest.raises(KeyError):
+        reader.read_column("d")
+
+    projected = reader.read_profile(["a", "b"])
+    assert list(projected.columns) == ["a", "b"]
+    assert projected.covariance.count[0, 1] == 2
+    assert projected.to_summary().columns["b"] == profile.to_summary().columns["b"]
+    assert reader.read_profile().to_summary() == profile.to_summary()
+    assert reader.read_profile(lazy=True).to_protobuf() == message
+
+
+def test_lazy_profile_roundtrip(tmpdir):
+    profile = _profile()
+    path = str(tmpdir.join("profile.bin"))
+    lazy = DatasetProfile.from_protobuf_string(
+        profile.to_protobuf().SerializeToString(), lazy=True
+    )
+    with open(path, "wb") as f:
+        size = write_indexed(lazy, f)
+    assert size == tmpdir.join("profile.bin").size()
+
+    with IndexedProfileReader(path) as reader:
+        roundtrip = reader.read_profile(lazy=True)
+    assert roundtrip.to_protobuf() == profile.to_protobuf()
+
+
+def test_not_indexed():
+    data = _profile().to_protobuf().SerializeToString()
+    with pytest.raises(ValueError):
+        IndexedProfileReader(io.BytesIO(data))
+
+
+def test_archive(tmpdir):
+    path = str(tmpdir.join("profiles.bin"))
+    start = datetime.datetime(2020, 8, 1, tzinfo=datetime.timezone.utc)
+    profiles = []
+    with ProfileArchiveWriter(path, mode="w") as writer:
+        for i in range(4):
+            now = start + datetime.timedelta(hours=i)
+            profile = DatasetProfile(
+                "test",
+                data_timestamp=now,
+                session_timestamp=now,
+                tags={"shard": str(i % 2)},
+            )
+            profile.track_dataframe(pd.DataFrame({"a": [i, i + 1], "b": ["x", "y"]}))
+            writer.write(profile)
+            profiles.append(profile)
+    # Appended profiles are indexed with the earlier ones
+    with ProfileArchiveWriter(path) as writer:
+        writer.write(DatasetProfile("other", session_timestamp=start))
+    # An aborted append leaves the archive untouched
+    size = tmpdir.join("profiles.bin").size()
+    with pytest.raises(RuntimeError):
+        with ProfileArchiveWriter(path) as writer:
+            writer.write(profiles[0])
+            raise RuntimeError()
+    assert tmpdir.join("profiles.bin").size() == size
+
+    with ProfileArchiveReader(path) as reader:
+        assert len(reader) == 5
+        assert reader.entries[4].name == "other"
+        assert reader.entries[4].data_timestamp is None
+        assert reader.find(name="test") == [0, 1, 2, 3]
+        assert reader.find(tags={"shard": "1"}) == [1, 3]
+        end = start + datetime.timedelta(hours=2)
+        assert reader.find(start=start + datetime.timedelta(hours=1), end=end) == [1]
+        assert reader.find(name="test", tags={"shard": "0"}, start=start) == [0, 2]
+
+        profile = reader.read(2)
+        assert profile.session_id == profiles[2].session_id
+        assert profile.to_summary() == profiles[2].to_summary()
+        projected = reader.read(3, columns=["a"])
+        assert list(projected.columns) == ["a"]
+        assert reader.reader(3).read_column("b").counters.count == 2
+        assert [p.tags["shard"] for p in reader.profiles(tags={"shard": "0"})] == [
+            "0",
+            "0",
+        ]
+
+    with pytest.raises(ValueError):
+        ProfileArchiveReader(str(tmpdir.join("empty.bin").ensure()))
+
+
+def test_archive_interrupted_append(tmpdir):
+    path = str(tmpdir.join("profiles.bin"))
+    with ProfileArchiveWriter(path, mode="w") as writer:
+        writer.write(_profile())
+    size = tmpdir.join("profiles.bin").size()
+
+    # A crash before the index of an append is written
+    writer = ProfileArchiveWriter(path)
+    writer.write(_profile())
+    writer._file.close()
+    assert tmpdir.join("profiles.bin").size() > size
+    with ProfileArchiveReader(path) as reader:
+        assert len(reader) == 1
+        assert reader.size == size
+
+    with ProfileArchiveWriter(path) as writer:
+        writer.write(DatasetProfile("other"))
+    with ProfileArchiveReader(path) as reader:
+        assert [e.name for e in reader.entries] == ["test", "other"]
+        assert reader.read(1).name == "other"
+
+    # A crash while overwriting leaves the archive untouched
+    writer = ProfileArchiveWriter(path, mode="w")
+    writer.write(_profile())
+    writer._file.close()
+    with ProfileArchiveReader(path) as reader:
+        assert len(reader) == 2
+
+    # Only the footer of an archive with a truncated index
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:8] + data[-24:])
+    with pytest.raises(ValueError):
+        ProfileArchiveReader(path)
+
+
+def test_archive_close_with_open_readers(tmpdir):
+    path = str(tmpdir.join("profiles.bin"))
+    with ProfileArchiveWriter(path, mode="w") as writer:
+        writer.write(_profile())
+    reader = ProfileArchiveReader(path)
+    column_reader = reader.reader(0)
+    profile = column_reader.read_profile(lazy=True)
+    reader.close()
+    assert profile.columns["a"].counters.count == 3
+    with pytest.raises(ValueError):
+        column_reader.read_column("a")
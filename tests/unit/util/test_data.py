@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from whylogs.util.data import flatten_dataframe
+
+
+def _events():
+    return pd.DataFrame(
+        {
+            "e": [
+                {"a": {"b": 1}, "c": [1, 2]},
+                None,
+                {"a": {"b": 2, "d": "x"}, "c": [3]},
+            ],
+            "x": [1, 2, 3],
+        }
+    )
+
+
+def test_flatten_nested_dicts():
+    flat = flatten_dataframe(_events())
+    assert list(flat.columns) == ["e.a.b", "e.a.d", "e.c", "x"]
+    assert flat["e.a.b"].tolist()[::2] == [1.0, 2.0]
+    assert flat["e.c"].tolist()[0] == [1, 2]
+    assert list(flatten_dataframe(_events(), max_depth=1).columns) == [
+        "e.a",
+        "e.c",
+        "x",
+    ]
+
+
+def test_flatten_arrays():
+    lengths = flatten_dataframe(_events(), arrays="length")["e.c"]
+    assert np.array_equal(lengths.values, [2, np.nan, 1], equal_nan=True)
+    indexed = flatten_dataframe(_events(), arrays="index")
+    assert list(indexed.columns) == ["e.a.b", "e.a.d", "e.c.0", "e.c.1", "x"]
+    with pytest.raises(ValueError):
+        flatten_dataframe(_events(), arrays="explode")
+
+
+def test_flatten_leaves_mixed_and_flat_columns():
+    df = pd.DataFrame({"m": [{"a": 1}, "b"], "x": [1, 2]})
+    assert flatten_dataframe(df) is df
+
+
+def test_group_indices_does_not_overflow():
+    from whylogs.util.data import group_indices
+
+    rng = np.random.RandomState(0)
+    # The first columns vary, the last ones have more values but are constant
+    # over most rows: the combined key of 40 columns would overflow int64
+    columns = [pd.Series(rng.choice(["a", "b", None], size=50)) for _ in range(8)]
+    columns += [pd.Series(["a"] * 47 + ["b", "c", None]) for _ in range(32)]
+    groups = list(group_indices(columns))
+    assert sum(len(indices) for _, indices in groups) == 50
+    seen = set()
+    for values, indices in groups:
+        assert values not in seen
+        seen.add(values)
+        for i in indices:
+            assert tuple(None if pd.isnull(c[i]) else c[i] for c in columns) == values
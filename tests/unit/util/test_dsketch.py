@@ -37,3 +37,16 @@ def test_deserialize_full_strings_returns_sketch():
         ("A", 19, 19, 19),
         ("D", 14, 14, 14),
     ]
+
+
+def test_update_kll():
+    import numpy as np
+
+    sketch = datasketches.kll_floats_sketch(256)
+    # One element arrays convert to floats, whatever the bindings
+    dsketch._kll_bulk_update = None
+    dsketch.update_kll(sketch, np.array([99.0]))
+    dsketch.update_kll(sketch, np.arange(99.0))
+    dsketch.update_kll(sketch, np.array([]))
+    assert sketch.get_n() == 100
+    assert sketch.get_max_value() == 99.0
@@ -1,4 +1,5 @@
 import datasketches
+import numpy as np
 import pytest
 from testutil import compare_frequent_items
 
@@ -117,3 +118,65 @@ def test_protobuf_roundtrip(number_sketch):
     msg = number_sketch.to_protobuf()
     sketch2 = dsketch.FrequentNumbersSketch.from_protobuf(msg)
     assert number_sketch.get_frequent_items() == sketch2.get_frequent_items()
+
+
+def test_ints_and_floats_tracked_separately():
+    sketch = dsketch.FrequentNumbersSketch()
+    sketch.update(1)
+    sketch.update(1.0, 2)
+    assert sketch.get_estimate(1) == 1
+    assert sketch.get_estimate(1.0) == 2
+    assert sketch.get_total_weight() == 3
+
+
+def test_serialized_sketch_compatible_with_datasketches():
+    vals = [int(1000 / (i + 1)) for i in range(2000)] + [0.5 * i for i in range(50)]
+    sketch = dsketch.FrequentNumbersSketch(5)
+    string_sketch = datasketches.frequent_strings_sketch(5)
+    for v in vals:
+        sketch.update(v)
+        string_sketch.update(dsketch.FrequentItemsSketch._encode_item(v))
+    assert sketch.offset > 0
+    err_type = datasketches.frequent_items_error_type.NO_FALSE_POSITIVES
+
+    deserialized = datasketches.frequent_strings_sketch.deserialize(sketch.serialize())
+    assert deserialized.get_frequent_items(err_type, 0) == sketch.get_frequent_items(
+        err_type, decode=False
+    )
+    assert deserialized.get_total_weight() == sketch.get_total_weight()
+
+    from_strings = dsketch.FrequentNumbersSketch.deserialize(string_sketch.serialize())
+    compare_frequent_items(
+        from_strings.get_frequent_items(err_type),
+        [
+            (dsketch.FrequentItemsSketch._decode_item(x[0]),) + x[1:]
+            for x in string_sketch.get_frequent_items(err_type, 0)
+        ],
+    )
+
+
+def test_update_array_equivalent_to_update():
+    vals = np.array([3, 1, 2, 3, 3, 1, 7, 8, 9, 10, 11, 3])
+    sketch = dsketch.FrequentNumbersSketch(3)
+    array_sketch = dsketch.FrequentNumbersSketch(3)
+    for v in vals:
+        sketch.update(int(v))
+    array_sketch.update_array(vals)
+    assert array_sketch.get_total_weight() == sketch.get_total_weight()
+    assert array_sketch.get_estimate(3) == sketch.get_estimate(3) == 4
+    assert array_sketch.get_lower_bound(3) >= 4 - array_sketch.offset
+
+    array_sketch.update_array(np.array([0.5, 0.5]), weights=[2, 3])
+    assert array_sketch.get_lower_bound(0.5) == 5
+
+
+def test_merge():
+    x = dsketch.FrequentNumbersSketch()
+    y = dsketch.FrequentNumbersSketch()
+    for v in NUMBER_SKETCH_VALS:
+        x.update(v)
+        y.update(v, 2)
+    merged = x.merge(y)
+    assert merged.get_estimate(1) == 9
+    assert merged.get_total_weight() == 3 * len(NUMBER_SKETCH_VALS)
+    assert x.get_estimate(1) == 3
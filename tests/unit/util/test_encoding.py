@@ -0,0 +1,27 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from whylogs.util.encoding import encode_item, serialize_item
+
+STRINGS = ["", "a", "hello world", "a/b", 'say "hi"', "back\\slash", "\t\n\x00", "é"]
+NUMBERS = [0, -1, 2 ** 63 - 1, -(2 ** 63), 0.0, -0.0, 1.5, 1 / 3, 1e20, 1e-11]
+OTHER = [True, None, float("nan"), float("inf"), np.float64(0.1), np.int64(3)]
+OTHER += [[1, "a"], {"a": 1}, datetime.date(2020, 1, 1)]
+
+
+def test_encoding_identical_to_pandas():
+    for x in STRINGS + NUMBERS + OTHER:
+        assert encode_item(x) == pd.io.json.dumps(x)
+
+
+def test_equal_values_of_different_types_not_confused():
+    for x in [1, 1.0, True, np.int64(1), np.float64(1.0), (1, 2), (1.0, 2.0)]:
+        assert encode_item(x) == pd.io.json.dumps(x)
+
+
+def test_serialize_item():
+    t = datetime.datetime(2020, 1, 2, 3, 4, 5)
+    assert serialize_item(t) == "2020-01-02T03:04:05"
+    assert serialize_item([1]) == "[1]"
@@ -1,5 +1,9 @@
+import asyncio
+import io
 import json
 
+import pytest
+
 from whylogs.proto import DoublesMessage
 from whylogs.util import protobuf
 
@@ -26,3 +30,48 @@ def test_message_to_dict_equals_message_to_json():
     d1 = protobuf.message_to_dict(msg)
     d2 = json.loads(protobuf.message_to_json(msg))
     assert d1 == d2
+
+
+def _messages():
+    # Message sizes from 2 to a few hundred bytes, with 1 and 2 byte prefixes
+    msgs = [DoublesMessage(count=i, sum=float(i)) for i in range(1, 50)]
+    msgs.append(DoublesMessage(count=1, sum=1.0, min=2.0, max=3.0))
+    return msgs
+
+
+def test_multi_msg_reader_blocks():
+    msgs = _messages()
+    f = io.BytesIO()
+    protobuf.write_multi_msg(msgs, f)
+    data = f.getvalue()
+    # Prefixes and messages span blocks, and are larger than blocks
+    for block_size in (1, 3, 7, len(data)):
+        result = list(
+            protobuf.multi_msg_reader(io.BytesIO(data), DoublesMessage, block_size)
+        )
+        assert result == msgs
+    with pytest.raises(RuntimeError):
+        list(protobuf.multi_msg_reader(io.BytesIO(data[:-1]), DoublesMessage))
+
+
+class _AsyncFile:
+    def __init__(self, data):
+        self._file = io.BytesIO(data)
+
+    async def read(self, size):
+        await asyncio.sleep(0)
+        return self._file.read(size)
+
+
+def test_async_multi_msg_reader():
+    msgs = _messages()
+    f = io.BytesIO()
+    protobuf.write_multi_msg(msgs, f)
+
+    async def read_all():
+        reader = protobuf.async_multi_msg_reader(
+            _AsyncFile(f.getvalue()), DoublesMessage, 5
+        )
+        return [msg async for msg in reader]
+
+    assert asyncio.run(read_all()) == msgs